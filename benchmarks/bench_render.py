@@ -0,0 +1,185 @@
+"""End-to-end render benchmark on offline OSM fixtures.
+
+Times the hot paths of a render for each fixture size and reports the best
+wall time over ``--repeat`` runs plus the peak Python heap growth (via
+tracemalloc, measured in a separate untimed run):
+
+* ``get_gdf``           parsing, invalid-geometry repair and clipping, per layer
+* ``smart_filter_gdf``  radius-based filtering, per layer
+* ``plot_gdf``          patch / line collection building, per layer
+* ``plot_extruded_buildings``  papercraft extrusion of the building layer
+* ``_add_glow``         neon halo passes for the streets layer
+* ``savefig``           full map encode, per output format
+
+Usage:
+    python benchmarks/bench_render.py [--sizes 1km 5km 15km] [--repeat 3]
+                                      [--dpi 300] [--json results.json]
+
+Runs fully offline: see benchmarks/fixtures.py for recorded and synthetic
+fixtures.
+"""
+import argparse
+import io
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from copy import deepcopy
+
+import matplotlib
+matplotlib.use('Agg')
+from matplotlib.figure import Figure  # noqa: E402
+from matplotlib.backends.backend_agg import FigureCanvasAgg  # noqa: E402
+import numpy as np  # noqa: E402
+
+from fixtures import SIZES, load_fixture, replay  # noqa: E402
+from umap import __version__  # noqa: E402
+from umap.core import fetch  # noqa: E402
+from umap.core.extrude import plot_extruded_buildings  # noqa: E402
+from umap.core.plot import DEFAULT_LAYERS, _add_glow, plot, plot_gdf  # noqa: E402
+from umap.utils.optimization import optimize_layer_config, smart_filter_gdf  # noqa: E402
+from umap.utils.styles import get_style  # noqa: E402
+
+FORMATS = ['png', 'jpg', 'svg', 'pdf']
+
+
+def _measure(fn, repeat):
+    """Return (best seconds, peak traced MB, last result) for ``fn``."""
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return best, peak / (1024 * 1024), result
+
+
+def _new_axes():
+    fig = Figure(figsize=(12, 12), dpi=100)
+    FigureCanvasAgg(fig)
+    return fig, fig.add_subplot(111, aspect='equal')
+
+
+def bench_fixture(name, repeat, dpi):
+    fixture = load_fixture(name)
+    radius = fixture['radius']
+    rows = []
+
+    def record(stage, layer, fn):
+        seconds, peak_mb, result = _measure(fn, repeat)
+        rows.append({'stage': stage, 'layer': layer, 'seconds': seconds, 'peak_mb': peak_mb})
+        return result
+
+    layers = optimize_layer_config(deepcopy(DEFAULT_LAYERS), radius)
+    minimal = get_style('minimal')
+
+    with replay(fixture):
+        perimeter = fetch.get_perimeter(fixture['center'], radius=radius)
+        clipped = {}
+        for layer, kwargs in layers.items():
+            if layer == 'perimeter' or layer not in fixture['layers']:
+                continue
+            clipped[layer] = record(
+                'get_gdf', layer,
+                lambda layer=layer, kwargs=kwargs: fetch.get_gdf(layer, perimeter, **kwargs),
+            )
+
+        filtered = {}
+        for layer, gdf in clipped.items():
+            filtered[layer] = record(
+                'smart_filter_gdf', layer,
+                lambda layer=layer, gdf=gdf: smart_filter_gdf(
+                    gdf, layer, radius, layers[layer]['_optimization']),
+            )
+
+        for layer, gdf in filtered.items():
+            def draw(layer=layer, gdf=gdf):
+                _, ax = _new_axes()
+                plot_gdf(layer, gdf, ax, width=layers[layer].get('width'),
+                         **minimal.get(layer, {}))
+            record('plot_gdf', layer, draw)
+
+        if 'building' in filtered:
+            extrude = get_style('papercraft')['building']['extrude']
+
+            def extrude_buildings():
+                _, ax = _new_axes()
+                plot_extruded_buildings(filtered['building'], ax, extrude, span=2 * radius / 111320.0)
+            record('plot_extruded_buildings', 'building', extrude_buildings)
+
+        if 'streets' in filtered:
+            lines = [np.asarray(line.coords) for line in filtered['streets'].geometry
+                     if line.geom_type == 'LineString']
+            neon_streets = get_style('neon')['streets']
+
+            def glow():
+                _, ax = _new_axes()
+                _add_glow(ax, lines, 'lines', neon_streets, lw=neon_streets.get('lw', 0.7))
+            record('_add_glow', 'streets', glow)
+
+        map_plot = plot(fixture['center'], radius=radius, style='minimal', use_cache=False)
+        for fmt in FORMATS:
+            record(
+                'savefig', fmt,
+                lambda fmt=fmt: map_plot.fig.savefig(io.BytesIO(), format=fmt, dpi=dpi),
+            )
+
+    feature_counts = {layer: len(gdf) for layer, gdf in filtered.items()}
+    return {
+        'fixture': name,
+        'radius': radius,
+        'synthetic': fixture.get('synthetic', False),
+        'features': feature_counts,
+        'stages': rows,
+    }
+
+
+def _print_report(report):
+    kind = 'synthetic' if report['synthetic'] else 'recorded'
+    print(f"\n== {report['fixture']} ({kind}, radius {report['radius']:.0f} m) ==")
+    print("features: " + ", ".join(f"{k}={v}" for k, v in report['features'].items()))
+    print(f"{'stage':<26} {'layer':<10} {'time (s)':>10} {'peak (MB)':>10}")
+    for row in report['stages']:
+        print(f"{row['stage']:<26} {row['layer']:<10} {row['seconds']:>10.3f} {row['peak_mb']:>10.1f}")
+    total = sum(row['seconds'] for row in report['stages'])
+    print(f"{'total':<37} {total:>10.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the umap render pipeline offline')
+    parser.add_argument('--sizes', nargs='+', default=list(SIZES),
+                        help='Fixture names to run (default: 1km 5km 15km)')
+    parser.add_argument('--repeat', type=int, default=3, help='Timed runs per stage (default: 3)')
+    parser.add_argument('--dpi', type=int, default=300, help='DPI for savefig stages (default: 300)')
+    parser.add_argument('--json', help='Write results as JSON to this path')
+    args = parser.parse_args()
+
+    reports = []
+    for name in args.sizes:
+        report = bench_fixture(name, args.repeat, args.dpi)
+        _print_report(report)
+        reports.append(report)
+
+    if args.json:
+        meta = {
+            'umap_version': __version__,
+            'python': platform.python_version(),
+            'matplotlib': matplotlib.__version__,
+            'dpi': args.dpi,
+            'repeat': args.repeat,
+        }
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'meta': meta, 'results': reports}, f, indent=2)
+        print(f"\nResults written to {args.json}")
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,106 @@
+"""Startup-time benchmark for the ``umap`` package and CLI.
+
+Measures how long importing ``umap`` / ``umap.cli`` and running non-render
+commands takes on top of a bare interpreter, and checks that no heavy
+rendering dependency is imported along the way.
+
+Usage:
+    python benchmarks/bench_startup.py [--runs 10] [--budget-ms 100]
+
+Exits with status 1 if the median overhead exceeds the budget or a heavy
+module is imported, so it can guard against regressions in CI.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules that must only be loaded by the render path
+HEAVY_MODULES = [
+    'osmnx', 'geopandas', 'matplotlib', 'matplotlib.pyplot',
+    'shapely', 'pandas', 'vsketch',
+]
+
+COMMANDS = {
+    'import umap': "import umap",
+    'import umap.cli': "import umap.cli",
+    'umap --help': (
+        "import sys; sys.argv = ['umap', '--help']\n"
+        "from umap.cli import main\n"
+        "try:\n    main()\nexcept SystemExit:\n    pass"
+    ),
+    'umap --list-styles': (
+        "import sys; sys.argv = ['umap', '--list-styles']\n"
+        "from umap.cli import main; main()"
+    ),
+    'umap --cache-info': (
+        "import sys; sys.argv = ['umap', '--cache-info']\n"
+        "from umap.cli import main; main()"
+    ),
+}
+
+
+def _run(code: str) -> float:
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    start = time.perf_counter()
+    subprocess.run(
+        [sys.executable, '-c', code],
+        check=True, env=env,
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    return time.perf_counter() - start
+
+
+def _median_ms(code: str, runs: int) -> float:
+    return statistics.median(_run(code) for _ in range(runs)) * 1000
+
+
+def _loaded_heavy_modules() -> list:
+    code = (
+        "import sys, umap, umap.cli\n"
+        "sys.argv = ['umap', '--list-styles']\n"
+        "import io, contextlib\n"
+        "with contextlib.redirect_stdout(io.StringIO()):\n"
+        "    umap.cli.main()\n"
+        f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    )
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    out = subprocess.run(
+        [sys.executable, '-c', code],
+        check=True, env=env, capture_output=True, text=True,
+    ).stdout.strip()
+    return [m for m in out.split(',') if m]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark umap startup time')
+    parser.add_argument('--runs', type=int, default=10, help='Runs per command (default: 10)')
+    parser.add_argument('--budget-ms', type=float, default=100.0,
+                        help='Maximum allowed overhead over a bare interpreter (default: 100)')
+    args = parser.parse_args()
+
+    baseline = _median_ms("pass", args.runs)
+    print(f"{'bare interpreter':<22} {baseline:8.1f} ms")
+
+    failed = False
+    for name, code in COMMANDS.items():
+        total = _median_ms(code, args.runs)
+        overhead = total - baseline
+        status = 'ok' if overhead <= args.budget_ms else 'SLOW'
+        failed |= status != 'ok'
+        print(f"{name:<22} {total:8.1f} ms  (+{overhead:.1f} ms)  {status}")
+
+    heavy = _loaded_heavy_modules()
+    if heavy:
+        failed = True
+        print(f"Heavy modules imported by non-render commands: {', '.join(heavy)}")
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
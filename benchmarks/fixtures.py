@@ -0,0 +1,309 @@
+"""Offline OSM fixtures for the benchmark suite.
+
+A fixture holds the perimeter and the raw per-layer GeoDataFrames exactly
+as osmnx returned them (before clipping and filtering), so ``get_gdf`` can
+be replayed without network access.
+
+Recorded fixtures live in ``benchmarks/fixtures/<name>.pkl`` and are
+created once with network access:
+
+    python benchmarks/fixtures.py record Istanbul --radius 1000 --name 1km
+
+When no recording exists for a size, a deterministic synthetic city of the
+same radius is generated instead (street grid with two-way edges, building
+blocks with level tags, parks, lakes and a river), so the suite always runs
+offline.
+"""
+import argparse
+import os
+import pickle
+import sys
+from contextlib import contextmanager
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+import shapely
+from geopandas import GeoDataFrame
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from umap.core import fetch  # noqa: E402
+from umap.core.plot import DEFAULT_LAYERS  # noqa: E402
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+# Benchmark sizes: name -> radius in meters
+SIZES = {'1km': 1000, '5km': 5000, '15km': 15000}
+
+_CENTER = (41.0082, 28.9784)
+_M_PER_DEG = 111320.0
+_HIGHWAY_CLASSES = ['residential', 'residential', 'residential', 'tertiary',
+                    'residential', 'secondary', 'residential', 'footway',
+                    'residential', 'primary']
+# Sparse tag columns osmnx typically returns alongside the useful ones
+_SPARSE_TAGS = ['name', 'addr:street', 'addr:housenumber', 'addr:city', 'source',
+                'wikidata', 'wheelchair', 'roof:shape', 'opening_hours', 'website',
+                'operator', 'note', 'fixme', 'start_date', 'layer', 'access']
+
+
+class _GraphFixture:
+    """Stand-in for a networkx graph; carries the recorded edge frame."""
+
+    def __init__(self, edges):
+        self.edges = edges
+
+
+def fixture_path(name: str) -> str:
+    return os.path.join(FIXTURE_DIR, f"{name}.pkl")
+
+
+def load_fixture(name: str) -> dict:
+    """Load a recorded fixture, or synthesize one for a known size."""
+    path = fixture_path(name)
+    if os.path.exists(path):
+        with open(path, 'rb') as f:
+            return pickle.load(f)
+    if name not in SIZES:
+        raise KeyError(f"No recorded fixture {path!r} and {name!r} is not a known size")
+    return synthesize(SIZES[name], name=name)
+
+
+@contextmanager
+def replay(fixture: dict):
+    """Serve osmnx downloads from a fixture for the duration of the block.
+
+    Layers are matched on the tags ``get_gdf`` passes to osmnx, so this works
+    for sequential calls as well as the threaded ``get_gdfs`` path.
+    """
+    raw = fixture['layers']
+    tag_lookup = {}
+    for layer, kwargs in DEFAULT_LAYERS.items():
+        tags = kwargs.get('tags')
+        if tags is not None:
+            tag_lookup[repr(tags)] = layer
+    builtin = {
+        repr({"natural": "coastline"}): 'coastline',
+        repr({"bridge": True, "man_made": "bridge"}): 'bridges',
+    }
+
+    def features_from_polygon(polygon, tags):
+        key = repr(tags)
+        layer = tag_lookup.get(key) or builtin.get(key)
+        if layer is None:
+            if 'waterway' in tags and 'natural' not in tags:
+                layer = 'waterway'
+            elif 'natural' in tags and 'harbour' in tags:
+                layer = 'water'
+        gdf = raw.get(layer)
+        if gdf is None:
+            return GeoDataFrame(geometry=[], crs='EPSG:4326')
+        return gdf.copy()
+
+    def graph_from_polygon(polygon, **kwargs):
+        return _GraphFixture(raw.get('streets'))
+
+    def graph_to_gdfs(graph, nodes=False, **kwargs):
+        return graph.edges.copy()
+
+    with mock.patch.object(fetch.ox, 'features_from_polygon', features_from_polygon), \
+            mock.patch.object(fetch.ox, 'graph_from_polygon', graph_from_polygon), \
+            mock.patch.object(fetch.ox, 'graph_to_gdfs', graph_to_gdfs), \
+            mock.patch.object(fetch.ox, 'geocode', lambda query: fixture['center']):
+        yield
+
+
+def _offsets_to_deg(dx, dy, lat):
+    return dx / (_M_PER_DEG * np.cos(np.radians(lat))), dy / _M_PER_DEG
+
+
+def _sparse_columns(n, rng):
+    columns = {}
+    for tag in _SPARSE_TAGS:
+        values = np.full(n, None, dtype=object)
+        present = rng.random(n) < 0.05
+        values[present] = [f"{tag}-{i}" for i in range(int(present.sum()))]
+        columns[tag] = values
+    return columns
+
+
+def synthesize(radius: float, name: str = 'synthetic', seed: int = 0) -> dict:
+    """Generate a deterministic city shaped like raw osmnx output."""
+    rng = np.random.default_rng(seed)
+    lat0, lon0 = _CENTER
+    extent = radius * 1.05
+    spacing = 90.0
+
+    # Street grid: every edge is emitted in both directions like a directed OSM graph
+    ticks = np.arange(-extent, extent + spacing, spacing)
+    n = len(ticks)
+    xs, ys = np.meshgrid(ticks, ticks)
+    node_id = np.arange(n * n).reshape(n, n)
+    segments, us, vs, highways = [], [], [], []
+    for horizontal in (True, False):
+        if horizontal:
+            a = np.stack([xs[:, :-1], ys[:, :-1]], -1).reshape(-1, 2)
+            b = np.stack([xs[:, 1:], ys[:, 1:]], -1).reshape(-1, 2)
+            ua, vb = node_id[:, :-1].ravel(), node_id[:, 1:].ravel()
+            line_index = np.repeat(np.arange(n), n - 1)
+        else:
+            a = np.stack([xs[:-1, :], ys[:-1, :]], -1).reshape(-1, 2)
+            b = np.stack([xs[1:, :], ys[1:, :]], -1).reshape(-1, 2)
+            ua, vb = node_id[:-1, :].ravel(), node_id[1:, :].ravel()
+            line_index = np.tile(np.arange(n), n - 1)
+        classes = np.array(_HIGHWAY_CLASSES, dtype=object)[line_index % len(_HIGHWAY_CLASSES)]
+        for start, end, u, v in ((a, b, ua, vb), (b, a, vb, ua)):
+            segments.append(np.stack([start, end], 1))
+            us.append(u)
+            vs.append(v)
+            highways.append(classes)
+    segments = np.concatenate(segments)
+    lon, lat = _offsets_to_deg(segments[..., 0], segments[..., 1], lat0)
+    street_geoms = shapely.linestrings(np.stack([lon + lon0, lat + lat0], -1))
+    m = len(street_geoms)
+    streets = GeoDataFrame(
+        {
+            'osmid': np.arange(m),
+            'highway': np.concatenate(highways),
+            'oneway': np.zeros(m, dtype=bool),
+            'length': np.full(m, spacing),
+            'lanes': np.where(rng.random(m) < 0.3, '2', None),
+            'maxspeed': np.where(rng.random(m) < 0.2, '50', None),
+        },
+        geometry=street_geoms,
+        index=pd.MultiIndex.from_arrays(
+            [np.concatenate(us), np.concatenate(vs), np.zeros(m, dtype=int)],
+            names=['u', 'v', 'key'],
+        ),
+        crs='EPSG:4326',
+    )
+
+    # Buildings: four footprints per block, with jittered sizes and level tags
+    block_centers = (ticks[:-1] + ticks[1:]) / 2
+    bx, by = np.meshgrid(block_centers, block_centers)
+    bx, by = bx.ravel(), by.ravel()
+    quads = np.array([[-1, -1], [1, -1], [-1, 1], [1, 1]]) * spacing * 0.22
+    cx = (bx[:, None] + quads[None, :, 0]).ravel()
+    cy = (by[:, None] + quads[None, :, 1]).ravel()
+    k = len(cx)
+    half_w = rng.uniform(6, 17, k)
+    half_h = rng.uniform(6, 17, k)
+    x0, y0 = _offsets_to_deg(cx - half_w, cy - half_h, lat0)
+    x1, y1 = _offsets_to_deg(cx + half_w, cy + half_h, lat0)
+    building_geoms = shapely.box(x0 + lon0, y0 + lat0, x1 + lon0, y1 + lat0)
+    levels = rng.integers(1, 9, k).astype(str).astype(object)
+    levels[rng.random(k) < 0.4] = None
+    buildings = GeoDataFrame(
+        {
+            'building': rng.choice(['yes', 'residential', 'apartments', 'commercial'], k),
+            'building:levels': levels,
+            'height': np.where(rng.random(k) < 0.1, '12', None),
+            **_sparse_columns(k, rng),
+        },
+        geometry=building_geoms,
+        index=pd.MultiIndex.from_arrays(
+            [np.full(k, 'way'), np.arange(k)], names=['element', 'id'],
+        ),
+        crs='EPSG:4326',
+    )
+
+    def blobs(count, min_r, max_r, **columns):
+        centers = rng.uniform(-extent, extent, (count, 2))
+        radii = rng.uniform(min_r, max_r, count)
+        lon, lat = _offsets_to_deg(centers[:, 0], centers[:, 1], lat0)
+        pts = shapely.points(lon + lon0, lat + lat0)
+        geoms = shapely.buffer(pts, radii / _M_PER_DEG, quad_segs=12)
+        return GeoDataFrame(columns, geometry=geoms, crs='EPSG:4326')
+
+    scale = max(radius / 1000.0, 1.0) ** 2
+    green = blobs(int(20 * scale), 15, 120, leisure=['park'] * int(20 * scale))
+    water = blobs(max(int(3 * scale), 1), 40, 300, natural=['water'] * max(int(3 * scale), 1))
+
+    # River: a long meandering line crossing the whole area
+    t = np.linspace(-extent, extent, 400)
+    river_x, river_y = _offsets_to_deg(t, np.sin(t / 700.0) * 400.0, lat0)
+    waterway = GeoDataFrame(
+        {'waterway': ['river']},
+        geometry=[shapely.linestrings(np.column_stack([river_x + lon0, river_y + lat0]))],
+        crs='EPSG:4326',
+    )
+    bridges = streets.iloc[::97].reset_index(drop=True)[['highway', 'geometry']]
+    bridges['bridge'] = 'yes'
+
+    return {
+        'name': name,
+        'radius': radius,
+        'center': _CENTER,
+        'synthetic': True,
+        'layers': {
+            'streets': streets,
+            'building': buildings,
+            'green': green,
+            'water': water,
+            'waterway': waterway,
+            'bridges': bridges,
+        },
+    }
+
+
+def record(query, radius: float, name: str) -> str:
+    """Download the default layers for ``query`` and store them as a fixture."""
+    raw = {}
+    captured = {}
+    features_from_polygon = fetch.ox.features_from_polygon
+    graph_to_gdfs = fetch.ox.graph_to_gdfs
+
+    def capture_features(*args, **kwargs):
+        captured['gdf'] = features_from_polygon(*args, **kwargs)
+        return captured['gdf']
+
+    def capture_graph(*args, **kwargs):
+        captured['gdf'] = graph_to_gdfs(*args, **kwargs)
+        return captured['gdf']
+
+    center = query if isinstance(query, tuple) else fetch.ox.geocode(query)
+    perimeter = fetch.get_perimeter(center, radius=radius)
+    with mock.patch.object(fetch.ox, 'features_from_polygon', capture_features), \
+            mock.patch.object(fetch.ox, 'graph_to_gdfs', capture_graph):
+        for layer, kwargs in DEFAULT_LAYERS.items():
+            if layer == 'perimeter':
+                continue
+            captured.clear()
+            fetch.get_gdf(layer, perimeter, **kwargs)
+            if 'gdf' in captured:
+                raw[layer] = captured['gdf']
+
+    os.makedirs(FIXTURE_DIR, exist_ok=True)
+    path = fixture_path(name)
+    with open(path, 'wb') as f:
+        pickle.dump(
+            {'name': name, 'radius': radius, 'center': center,
+             'synthetic': False, 'layers': raw},
+            f,
+        )
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Record OSM fixtures for the benchmark suite')
+    sub = parser.add_subparsers(dest='command', required=True)
+    rec = sub.add_parser('record', help='Download and store a fixture (needs network)')
+    rec.add_argument('location', help='City name or "lat,lon"')
+    rec.add_argument('--radius', type=float, required=True, help='Radius in meters')
+    rec.add_argument('--name', required=True, help='Fixture name, e.g. 1km')
+    args = parser.parse_args()
+
+    location = args.location
+    if ',' in location:
+        try:
+            location = tuple(map(float, location.split(',')))
+        except ValueError:
+            pass
+    path = record(location, args.radius, args.name)
+    print(f"Recorded fixture: {path}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,35 @@
+"""Shared fixtures: offline OSM data and an isolated cache directory."""
+import os
+import sys
+
+import matplotlib
+import pytest
+
+matplotlib.use("Agg")
+
+BENCHMARKS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks")
+if BENCHMARKS not in sys.path:
+    sys.path.insert(0, BENCHMARKS)
+
+from fixtures import load_fixture, replay  # noqa: E402
+from umap.utils import cache  # noqa: E402
+
+
+@pytest.fixture
+def umap_cache(tmp_path, monkeypatch):
+    """Global cache in a temporary directory."""
+    instance = cache.UmapCache(str(tmp_path / "cache"))
+    monkeypatch.setattr(cache, "_cache_instance", instance)
+    return instance
+
+
+@pytest.fixture(scope="session")
+def osm_1km():
+    return load_fixture("1km")
+
+
+@pytest.fixture
+def offline(osm_1km):
+    """Serve downloads from the 1 km fixture; yields the fixture."""
+    with replay(osm_1km):
+        yield osm_1km
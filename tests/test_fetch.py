@@ -0,0 +1,37 @@
+import asyncio
+import os
+
+from umap.core import fetch
+from umap.core.plot import DEFAULT_LAYERS
+
+
+def test_async_fetch_revalidates_stale_entries(umap_cache, offline, monkeypatch):
+    umap_cache.refresh = True
+    state = {"timestamp": "2024-01-01T00:00:00Z"}
+    monkeypatch.setattr(fetch, "baseline", lambda *args, **kwargs: state)
+    monkeypatch.setattr(fetch, "is_unchanged", lambda *args, **kwargs: (True, state))
+    downloads = []
+    download_layer = fetch._download_layer
+
+    def counting(layer, *args, **kwargs):
+        downloads.append(layer)
+        return download_layer(layer, *args, **kwargs)
+
+    monkeypatch.setattr(fetch, "_download_layer", counting)
+
+    def get():
+        return asyncio.run(fetch.get_gdfs_async(offline["center"], DEFAULT_LAYERS, offline["radius"], None))
+
+    first = get()
+    assert downloads
+    meta_files = list(umap_cache.cache_dir.glob("*.meta.json"))
+    assert len(meta_files) == 1
+
+    # Expire the entry: it is revalidated, not downloaded again
+    for path in umap_cache.cache_dir.glob("*.pkl"):
+        os.utime(path, (0, 0))
+    downloads.clear()
+    second = get()
+    assert downloads == []
+    assert sorted(second) == sorted(first)
+    assert all(len(second[layer]) == len(first[layer]) for layer in first)
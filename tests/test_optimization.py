@@ -0,0 +1,28 @@
+import math
+
+import geopandas as gp
+import pytest
+from shapely.geometry import box
+
+from umap.utils.optimization import dissolve_gdf
+
+M_PER_DEG = 111320.0
+
+
+def _blocks(latitude, spacing, vertical=False):
+    """Two 20 m blocks at ``latitude``, ``spacing`` meters apart."""
+    dy = 20 / M_PER_DEG
+    dx = dy / math.cos(math.radians(latitude))
+    if vertical:
+        offset = (20 + spacing) / M_PER_DEG
+        shapes = [box(0, latitude, dx, latitude + dy), box(0, latitude + offset, dx, latitude + offset + dy)]
+    else:
+        offset = dx * (20 + spacing) / 20
+        shapes = [box(0, latitude, dx, latitude + dy), box(offset, latitude, offset + dx, latitude + dy)]
+    return gp.GeoDataFrame(geometry=shapes, crs="EPSG:4326")
+
+
+@pytest.mark.parametrize("vertical", [False, True])
+def test_dissolve_gap_is_isotropic(vertical):
+    assert len(dissolve_gdf(_blocks(52.0, 8, vertical), gap=10)) == 1
+    assert len(dissolve_gdf(_blocks(52.0, 12, vertical), gap=10)) == 2
@@ -0,0 +1,25 @@
+import numpy as np
+
+from umap.core.artifacts import RenderArtifact
+from umap.core.plot import plot, plot_basemap
+
+
+def test_artifact_render_matches_cold_render(umap_cache, offline):
+    kwargs = dict(radius=offline["radius"], style="minimal", figsize=(4, 4))
+    with plot(offline["center"], **kwargs) as cold:
+        cold_pixels = cold.to_array(dpi=100).copy()
+    with plot(offline["center"], **kwargs) as warm:
+        assert isinstance(warm.geodataframes, RenderArtifact)
+        warm_pixels = warm.to_array(dpi=100)
+        assert np.array_equal(cold_pixels, warm_pixels)
+
+
+def test_basemap_cache_round_trip(umap_cache, offline):
+    kwargs = dict(radius=offline["radius"], style="minimal", figsize=(4, 4), pad=0.5)
+    with plot_basemap(offline["center"], 100, **kwargs) as cold:
+        cold_pixels = cold.to_array(dpi=100).copy()
+    stored = list((umap_cache.cache_dir / "basemaps").iterdir())
+    assert sorted(path.suffix for path in stored) == [".json", ".png"]
+    with plot_basemap(offline["center"], 100, **kwargs) as warm:
+        assert not warm.geodataframes
+        assert np.array_equal(cold_pixels, warm.to_array(dpi=100))
@@ -1,19 +1,56 @@
-"""Umap - A Python library for drawing customized maps from OpenStreetMap data."""
-from .core.plot import plot, multiplot, Plot, Subplot
-from .core.fetch import get_gdfs
-from .utils.drawing import add_frame
+"""Umap - A Python library for drawing customized maps from OpenStreetMap data.
+
+Heavy dependencies (osmnx, geopandas, matplotlib) are only imported when a
+rendering or fetching function is first accessed, so ``umap --help`` and
+other non-render commands start quickly.
+"""
+from importlib import import_module
+
 from .utils.styles import get_style, list_styles, register_style
-from .utils.cache import get_cache, clear_cache, get_cache_info
-from .utils.optimization import auto_optimize_layers, check_data_quality, get_processing_stats
-from .cli import main as cli_main
+from .utils.cache import get_cache, configure_cache, clear_cache, get_cache_info
 
 # Package version
 __version__ = "3.0.0"
 
+# Public name -> (module, attribute), resolved on first access
+_LAZY_ATTRS = {
+    'plot': ('.core.plot', 'plot'),
+    'multiplot': ('.core.plot', 'multiplot'),
+    'plot_basemap': ('.core.plot', 'plot_basemap'),
+    'Plot': ('.core.plot', 'Plot'),
+    'Subplot': ('.core.plot', 'Subplot'),
+    'get_gdfs': ('.core.fetch', 'get_gdfs'),
+    'get_gdfs_async': ('.core.fetch', 'get_gdfs_async'),
+    'iter_gdfs': ('.core.fetch', 'iter_gdfs'),
+    'get_gdfs_many': ('.core.fetch', 'get_gdfs_many'),
+    'configure_scheduler': ('.core.scheduler', 'configure_scheduler'),
+    'add_frame': ('.utils.drawing', 'add_frame'),
+    'auto_optimize_layers': ('.utils.optimization', 'auto_optimize_layers'),
+    'check_data_quality': ('.utils.optimization', 'check_data_quality'),
+    'get_processing_stats': ('.utils.optimization', 'get_processing_stats'),
+    'cli_main': ('.cli', 'main'),
+}
+
 __all__ = [
-    'plot', 'multiplot', 'Plot', 'Subplot', 'get_gdfs', 'add_frame',
+    'plot', 'multiplot', 'plot_basemap', 'Plot', 'Subplot', 'get_gdfs', 'get_gdfs_async',
+    'iter_gdfs', 'get_gdfs_many', 'configure_scheduler', 'add_frame',
     'get_style', 'list_styles', 'register_style',
-    'get_cache', 'clear_cache', 'get_cache_info',
+    'get_cache', 'configure_cache', 'clear_cache', 'get_cache_info',
     'auto_optimize_layers', 'check_data_quality', 'get_processing_stats',
     'cli_main'
 ]
+
+
+def __getattr__(name):
+    try:
+        module_name, attr = _LAZY_ATTRS[name]
+    except KeyError:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}") from None
+    value = getattr(import_module(module_name, __name__), attr)
+    # Cache on the package so later lookups bypass __getattr__
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -3,22 +3,14 @@ import argparse
 import sys
 import os
 from pathlib import Path
-import yaml
 import time
 import logging
 from typing import Dict, List, Tuple, Optional
 
 logger = logging.getLogger(__name__)
 
-from .core.plot import plot
-from .utils.drawing import (
-    add_frame,
-    add_north_arrow,
-    add_scale_bar,
-    add_legend_simple,
-    add_poster_layout,
-    format_center_coords,
-)
+# Rendering modules (osmnx, geopandas, matplotlib) are imported inside
+# create_simple_map so that --help and other non-render commands stay fast.
 from .utils.styles import get_style, list_styles
 
 
@@ -60,6 +52,7 @@ def load_config(config_path: Optional[str] = None) -> Dict:
     
     if os.path.exists(config_path):
         try:
+            import yaml
             with open(config_path, 'r', encoding='utf-8') as f:
                 user_config = yaml.safe_load(f)
                 # Merge with defaults
@@ -73,8 +66,74 @@ def load_config(config_path: Optional[str] = None) -> Dict:
 
 
 
+def create_plotter_file(args, location, location_name, radius, style, use_cache, output_format):
+    """Write merged, travel-ordered pen-plotter paths as SVG or HPGL."""
+    from .core.plot import plot
+
+    extensions = {'svg': ('.svg',), 'hpgl': ('.hpgl', '.plt')}
+    if output_format not in extensions:
+        # Not a plotter format (e.g. the configured default): use the one
+        # the output name asks for, else SVG
+        extension = os.path.splitext(args.output or '')[1].lower()
+        output_format = 'hpgl' if extension in extensions['hpgl'] else 'svg'
+    output_path = args.output or os.path.join(os.getcwd(), f"{location_name}_plot.{output_format}")
+    root, extension = os.path.splitext(output_path)
+    if extension.lower() not in extensions[output_format]:
+        # The writer is picked by extension: never put SVG markup in a .png
+        if extension:
+            print(f"Note: plotter output is {output_format.upper()}, not {extension}; "
+                  f"writing {root}.{output_format}")
+        output_path = f"{root}.{output_format}"
+
+    print(f"Creating plotter file for {location}...")
+    start_time = time.time()
+    try:
+        map_plot = plot(location, radius=radius, style=style, mode="plotter", use_cache=use_cache)
+        if map_plot.failures:
+            print(f"Warning: incomplete map, failed to download: {', '.join(map_plot.failures)}")
+        drawing = map_plot.to_plotter(output_path, style=style)
+    except Exception as e:
+        logger.error("Error creating plotter file: %s", e)
+        print(f"Error creating plotter file: {e}")
+        sys.exit(1)
+
+    stats = drawing.stats
+    print(
+        f"Plotter file saved to: {output_path} ({time.time() - start_time:.1f}s, "
+        f"{stats['paths_out']} paths, pen-up travel cut by "
+        f"{100 * (1 - stats['travel_after'] / max(stats['travel_before'], 1e-12)):.0f}%)"
+    )
+
+
+def configure_cache_from_config(defaults: Dict) -> None:
+    """Apply the ``cache_*`` keys of the config file to the global cache."""
+    keys = ('cache_dir', 'cache_max_age_days', 'cache_refresh')
+    if not any(key in defaults for key in keys):
+        return
+    from .utils.cache import configure_cache
+    configure_cache(
+        cache_dir=defaults.get('cache_dir'),
+        max_age_days=defaults.get('cache_max_age_days', 7),
+        refresh=defaults.get('cache_refresh', False),
+    )
+
+
 def create_simple_map(args):
     """Create a single map with simplified arguments."""
+    from .core.plot import plot, plot_basemap
+    from .utils.drawing import (
+        POSTER_FOOTER,
+        add_frame,
+        add_north_arrow,
+        add_scale_bar,
+        add_legend_simple,
+        add_poster_layout,
+        fit_figure,
+        format_center_coords,
+    )
+    from .utils.encode import RASTER_FORMATS
+    from .utils.profiling import NULL_PROFILER
+
     config = load_config(None)
     defaults = config.get('default', {})
 
@@ -122,19 +181,48 @@ def create_simple_map(args):
     else:
         dpi = defaults.get('dpi', 300)
     use_cache = defaults.get('cache_enabled', True)
+
+    if defaults.get('overpass_endpoints'):
+        from .core.transport import configure_transport
+        configure_transport(endpoints=defaults['overpass_endpoints'])
+
+    configure_cache_from_config(defaults)
     
+    if args.plotter or output_format == 'hpgl':
+        create_plotter_file(args, location, location_name, radius, style, use_cache, output_format)
+        return
+
     print(f"Creating map for {location}...")
     start_time = time.time()
     
+    footer = POSTER_FOOTER if args.poster else 0.0
     try:
-        map_plot = plot(
-            location,
-            radius=radius,
-            style=style,
-            figsize=(12, 12),
-            use_cache=use_cache
-        )
+        if output_format in RASTER_FORMATS:
+            # Raster output: reuse the cached map body, only furniture is drawn
+            map_plot = plot_basemap(
+                location,
+                dpi,
+                radius=radius,
+                style=style,
+                figsize=(12, 12),
+                pad=0.5,
+                footer=footer,
+                use_cache=use_cache,
+                profile=args.profile or bool(args.profile_json),
+            )
+        else:
+            map_plot = plot(
+                location,
+                radius=radius,
+                style=style,
+                figsize=(12, 12),
+                use_cache=use_cache,
+                profile=args.profile or bool(args.profile_json),
+            )
         
+        if map_plot.failures:
+            print(f"Warning: incomplete map, failed to download: {', '.join(map_plot.failures)}")
+
         if map_plot.fig and map_plot.ax:
             chrome_color = '#e5e7eb' if _is_dark_style(style) else '#1f2937'
 
@@ -152,7 +240,9 @@ def create_simple_map(args):
                 add_north_arrow(map_plot.ax, color=chrome_color)
                 add_scale_bar(map_plot.ax, length_km=max(1, int(radius/2000)), color=chrome_color)
                 add_legend_simple(map_plot.ax, style, text_color=chrome_color)
-            
+            # Final canvas size up front: the map is drawn once per save
+            fit_figure(map_plot.ax, pad=0.5, footer=footer)
+
             # Determine output path - default to current working directory
             if args.output:
                 output_path = args.output
@@ -167,23 +257,38 @@ def create_simple_map(args):
             page_color = style.get('sea', {}).get(
                 'fc', style.get('background', {}).get('fc', '#fff')
             )
-            save_kwargs = {}
-            if output_format in ('jpg', 'jpeg'):
-                # Default PIL quality (75) causes visible artifacts on fine lines
-                save_kwargs['pil_kwargs'] = {'quality': 95, 'subsampling': 0}
-            map_plot.fig.savefig(
-                output_path,
-                dpi=dpi,
-                bbox_inches='tight',
-                facecolor=page_color,
-                pad_inches=0.5,
-                format=output_format,
-                **save_kwargs
-            )
+            profiler = map_plot.profile or NULL_PROFILER
+            with profiler.stage("savefig", output_format):
+                if output_format in RASTER_FORMATS:
+                    encode_options = {
+                        'quality': args.quality or defaults.get('quality'),
+                        'compress_level': (
+                            args.png_level if args.png_level is not None else defaults.get('png_level', 6)
+                        ),
+                        'png_filter': args.png_filter or defaults.get('png_filter', 'up'),
+                        'colors': args.colors or defaults.get('colors'),
+                    }
+                    with open(output_path, 'wb') as f:
+                        map_plot.render(output_format, dpi, fp=f, facecolor=page_color, **encode_options)
+                else:
+                    map_plot.fig.savefig(
+                        output_path,
+                        dpi=dpi,
+                        facecolor=page_color,
+                        format=output_format,
+                    )
             
             end_time = time.time()
             print(f"Map completed! Saved to: {output_path} ({end_time - start_time:.1f}s)")
-            
+
+            if map_plot.profile is not None:
+                if args.profile:
+                    print(map_plot.profile.summary())
+                if args.profile_json:
+                    map_plot.profile.to_json(args.profile_json)
+                    print(f"Profile written to: {args.profile_json}")
+            map_plot.close()
+
         else:
             print("Error: Could not create map")
             
@@ -210,6 +315,7 @@ def main():
             '  umap Istanbul --papercraft --radius 1500\n'
             '  umap Istanbul --8k                        (deep zoom raster)\n'
             '  umap Istanbul --format svg                (infinite zoom, vector)\n'
+            '  umap Istanbul --plotter --format hpgl     (pen plotter)\n'
             '  umap "New York" --vintage --radius 10000'
         ),
         formatter_class=argparse.RawDescriptionHelpFormatter
@@ -288,16 +394,82 @@ def main():
     )
     parser.add_argument(
         '--format',
-        choices=['png', 'jpg', 'svg', 'pdf'],
-        help='Output format (default: png)'
+        choices=['png', 'jpg', 'webp', 'avif', 'svg', 'pdf', 'hpgl'],
+        help='Output format (default: png; hpgl implies --plotter)'
+    )
+    parser.add_argument(
+        '--quality',
+        type=int,
+        help='JPG/WebP/AVIF quality 1-100 (default: JPG 95, AVIF 80, WebP lossless)'
+    )
+    parser.add_argument(
+        '--png-level',
+        type=int,
+        choices=range(10),
+        metavar='0-9',
+        help='PNG compression level: 1 is fastest, 9 smallest (default: 6)'
+    )
+    parser.add_argument(
+        '--png-filter',
+        choices=['none', 'sub', 'up'],
+        help='PNG row filter (default: up)'
+    )
+    parser.add_argument(
+        '--colors',
+        type=int,
+        metavar='N',
+        help='Quantize PNG output to N colors (2-256); much smaller files for flat styles'
+    )
+    parser.add_argument(
+        '--plotter',
+        action='store_true',
+        help='Pen-plotter output: merged, de-duplicated, travel-ordered paths (SVG or HPGL)'
     )
     parser.add_argument(
         '--output',
         help='Output file path'
     )
+    parser.add_argument(
+        '--profile',
+        action='store_true',
+        help='Print per-stage timing, feature counts and memory after rendering'
+    )
+    parser.add_argument(
+        '--profile-json',
+        metavar='PATH',
+        help='Write the per-stage profile as JSON to PATH'
+    )
+    parser.add_argument(
+        '--list-styles',
+        action='store_true',
+        help='List available styles and exit'
+    )
+    parser.add_argument(
+        '--cache-info',
+        action='store_true',
+        help='Show cache location and size and exit'
+    )
     
     args = parser.parse_args()
 
+    if args.list_styles:
+        for name in list_styles():
+            print(name)
+        return
+
+    if args.cache_info:
+        from .utils.cache import get_cache_info
+        configure_cache_from_config(load_config(None).get('default', {}))
+        info = get_cache_info()
+        print(f"Cache directory: {info['cache_dir']}")
+        print(f"Files: {info['file_count']}, render artifacts: {info['artifact_count']}, "
+              f"map rasters: {info['basemap_count']} ({info['total_size_mb']:.1f} MB)")
+        if info['leftover_count']:
+            print(f"Locks and temporary files: {info['leftover_count']} "
+                  f"(abandoned ones are removed by umap.clear_cache())")
+        print(f"Max age: {info['max_age_days']:.0f} days")
+        return
+
     # Handle simple location mapping (main use case)
     if not args.location and not args.coords:
         parser.print_help()
@@ -0,0 +1,322 @@
+"""Render-ready layer artifacts for instant re-renders.
+
+Between fetching and drawing, every render repeats the same style
+independent work: layer optimization, smart filtering and flattening
+shapely geometries into matplotlib vertex/code arrays. A render artifact
+stores the result of that work per (location, radius, level of detail) as
+a directory of ``.npy`` arrays plus a ``meta.json``:
+
+* polygons: flattened vertices, matplotlib path codes and per-feature
+  vertex offsets, plus the ring/part offsets needed to rebuild geometries
+* lines: flattened vertices, per-part vertex offsets and per-feature part
+  offsets
+* attributes: per-feature categorical codes (``-1`` for missing), with the
+  categories kept in ``meta.json``
+
+Arrays are memory-mapped on load, so a repeat render (with the same or a
+different style) goes straight to collection creation.
+"""
+import json
+import logging
+import shutil
+import time
+from collections.abc import Mapping
+from pathlib import Path as FilePath
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import shapely
+from geopandas import GeoDataFrame
+from matplotlib.path import Path
+
+from .fetch import PerimeterContext
+from ..utils.cache import get_cache, temp_path
+from ..utils.optimization import auto_optimize_layers
+
+logger = logging.getLogger(__name__)
+
+ARTIFACT_VERSION = 1
+
+
+def _scalar(value) -> Optional[str]:
+    """Normalize an attribute value the way the renderer reads it."""
+    if isinstance(value, (list, tuple, np.ndarray)):
+        # Merged OSM ways carry lists; the renderer only uses the first value
+        value = value[0] if len(value) else None
+    if value is None or (not isinstance(value, str) and pd.isna(value)):
+        return None
+    return str(value)
+
+
+def _encode_attribute(values) -> Tuple[np.ndarray, List[str]]:
+    normalized = [_scalar(value) for value in values]
+    categories = sorted({value for value in normalized if value is not None})
+    lookup = {value: code for code, value in enumerate(categories)}
+    codes = np.array([lookup.get(value, -1) for value in normalized], dtype=np.int32)
+    return codes, categories
+
+
+def _ring_codes(ring_offsets: np.ndarray, n_vertices: int) -> np.ndarray:
+    """Matplotlib path codes for closed rings laid out back to back."""
+    codes = np.full(n_vertices, Path.LINETO, dtype=Path.code_type)
+    if len(ring_offsets) > 1:
+        codes[ring_offsets[:-1]] = Path.MOVETO
+        codes[ring_offsets[1:] - 1] = Path.CLOSEPOLY
+    return codes
+
+
+class LayerArrays:
+    """Flattened, render-ready geometry and attributes of one layer.
+
+    Build one with :meth:`from_gdf`; :meth:`polygon_paths` and
+    :meth:`line_parts` feed matplotlib collections directly and
+    :meth:`to_gdf` rebuilds a GeoDataFrame for code that needs shapely
+    geometries (e.g. extrusion).
+    """
+
+    def __init__(self, arrays: Dict[str, np.ndarray], attributes: Dict[str, Tuple[np.ndarray, List[str]]],
+                 length: int, crs: Optional[str] = None):
+        self.arrays = arrays
+        self.attributes = attributes
+        self.length = length
+        self.crs = crs
+
+    def __len__(self) -> int:
+        return self.length
+
+    @property
+    def empty(self) -> bool:
+        return self.length == 0
+
+    @classmethod
+    def from_gdf(cls, gdf: GeoDataFrame) -> "LayerArrays":
+        geoms = np.asarray(gdf.geometry.values, dtype=object)
+        types = np.asarray(shapely.get_type_id(geoms))
+        arrays: Dict[str, np.ndarray] = {}
+
+        polygonal = np.flatnonzero((types == 3) | (types == 6))
+        if len(polygonal):
+            _, coords, offsets = shapely.to_ragged_array(geoms[polygonal], include_z=False)
+            # Plain polygons come back without the multi-part level
+            rings, parts, multi = offsets if len(offsets) == 3 else (
+                *offsets, np.arange(len(polygonal) + 1)
+            )
+            coords = np.ascontiguousarray(coords, dtype=np.float64)
+            arrays.update(
+                poly_vertices=coords,
+                poly_codes=_ring_codes(rings, len(coords)),
+                # Vertex range of each feature, as PolygonPatch would build it
+                poly_offsets=rings[parts[multi]].astype(np.int64),
+                poly_rings=rings.astype(np.int64),
+                poly_parts=parts.astype(np.int64),
+                poly_multi=multi.astype(np.int64),
+            )
+        arrays["poly_features"] = polygonal.astype(np.int64)
+
+        linear = np.flatnonzero((types == 1) | (types == 5))
+        if len(linear):
+            _, coords, offsets = shapely.to_ragged_array(geoms[linear], include_z=False)
+            offsets, parts = offsets if len(offsets) == 2 else (*offsets, np.arange(len(linear) + 1))
+            arrays.update(
+                line_vertices=np.ascontiguousarray(coords, dtype=np.float64),
+                line_offsets=offsets.astype(np.int64),
+                line_parts=parts.astype(np.int64),
+            )
+        arrays["line_features"] = linear.astype(np.int64)
+
+        geometry_name = gdf.geometry.name
+        attributes = {
+            column: _encode_attribute(gdf[column])
+            for column in gdf.columns if column != geometry_name
+        }
+        crs = gdf.crs.to_string() if gdf.crs is not None else None
+        return cls(arrays, attributes, len(gdf), crs)
+
+    def polygon_paths(self) -> List[Path]:
+        """One matplotlib Path per polygonal feature, in row order."""
+        if "poly_vertices" not in self.arrays:
+            return []
+        vertices = self.arrays["poly_vertices"]
+        codes = self.arrays["poly_codes"]
+        offsets = self.arrays["poly_offsets"]
+        return [
+            Path(vertices[start:end], codes[start:end])
+            for start, end in zip(offsets[:-1].tolist(), offsets[1:].tolist())
+        ]
+
+    def line_parts(self) -> Tuple[List[np.ndarray], np.ndarray]:
+        """Vertex arrays of every line part and the feature row of each part."""
+        if "line_vertices" not in self.arrays:
+            return [], np.zeros(0, dtype=np.int64)
+        vertices = self.arrays["line_vertices"]
+        offsets = self.arrays["line_offsets"].tolist()
+        parts = self.arrays["line_parts"]
+        lines = [vertices[start:end] for start, end in zip(offsets[:-1], offsets[1:])]
+        rows = np.repeat(self.arrays["line_features"], np.diff(parts))
+        return lines, rows
+
+    def attribute(self, name: str) -> Optional[Tuple[np.ndarray, List[str]]]:
+        """Per-feature ``(codes, categories)`` of an attribute, if stored."""
+        return self.attributes.get(name)
+
+    def to_gdf(self) -> GeoDataFrame:
+        """Rebuild the layer as a GeoDataFrame (geometries become multi-part)."""
+        geometry = np.full(self.length, None, dtype=object)
+        if "poly_vertices" in self.arrays:
+            geometry[self.arrays["poly_features"]] = shapely.from_ragged_array(
+                shapely.GeometryType.MULTIPOLYGON,
+                np.asarray(self.arrays["poly_vertices"]),
+                tuple(np.asarray(self.arrays[key]) for key in ("poly_rings", "poly_parts", "poly_multi")),
+            )
+        if "line_vertices" in self.arrays:
+            geometry[self.arrays["line_features"]] = shapely.from_ragged_array(
+                shapely.GeometryType.MULTILINESTRING,
+                np.asarray(self.arrays["line_vertices"]),
+                tuple(np.asarray(self.arrays[key]) for key in ("line_offsets", "line_parts")),
+            )
+        columns = {
+            name: pd.Categorical.from_codes(np.asarray(codes), categories=categories)
+            for name, (codes, categories) in self.attributes.items()
+        }
+        return GeoDataFrame(columns, geometry=list(geometry), crs=self.crs)
+
+    def save(self, directory: FilePath, name: str) -> Dict[str, Any]:
+        """Write the arrays to ``directory`` and return the layer's metadata."""
+        for field, array in self.arrays.items():
+            np.save(directory / f"{name}.{field}.npy", array)
+        attributes = []
+        for i, (column, (codes, categories)) in enumerate(self.attributes.items()):
+            np.save(directory / f"{name}.attr{i}.npy", codes)
+            attributes.append({"name": column, "categories": categories})
+        return {
+            "length": self.length,
+            "crs": self.crs,
+            "fields": sorted(self.arrays),
+            "attributes": attributes,
+        }
+
+    @classmethod
+    def load(cls, directory: FilePath, name: str, meta: Dict[str, Any], mmap: bool = True) -> "LayerArrays":
+        mode = "r" if mmap else None
+        arrays = {
+            field: np.load(directory / f"{name}.{field}.npy", mmap_mode=mode)
+            for field in meta["fields"]
+        }
+        attributes = {
+            attribute["name"]: (
+                np.load(directory / f"{name}.attr{i}.npy", mmap_mode=mode),
+                attribute["categories"],
+            )
+            for i, attribute in enumerate(meta["attributes"])
+        }
+        return cls(arrays, attributes, meta["length"], meta.get("crs"))
+
+
+class RenderArtifact(Mapping):
+    """Layers of a stored artifact, as a read-only ``layer -> GeoDataFrame`` map.
+
+    ``arrays(layer)`` returns the memory-mapped :class:`LayerArrays`;
+    GeoDataFrames are only rebuilt (and then kept) when a layer is indexed,
+    so renders that draw from the arrays never pay for them.
+    """
+
+    complete = True
+
+    def __init__(self, layers: Dict[str, LayerArrays]):
+        # Artifacts are only stored for complete downloads
+        self.failures: Dict[str, str] = {}
+        self._layers = layers
+        self._gdfs: Dict[str, GeoDataFrame] = {}
+        self.perimeter_context = PerimeterContext(self["perimeter"])
+
+    def arrays(self, layer: str) -> LayerArrays:
+        return self._layers[layer]
+
+    def __getitem__(self, layer: str) -> GeoDataFrame:
+        gdf = self._gdfs.get(layer)
+        if gdf is None:
+            gdf = self._gdfs[layer] = self._layers[layer].to_gdf()
+        return gdf
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._layers)
+
+    def __len__(self) -> int:
+        return len(self._layers)
+
+
+def level_of_detail(radius: Optional[float], auto_optimize: bool) -> str:
+    """Detail level layers are fetched and filtered at for ``radius``."""
+    if auto_optimize and radius:
+        return auto_optimize_layers(radius)["detail"]
+    return "full"
+
+
+def artifact_path(query, layers: Dict, radius: Optional[float], dilate=None,
+                  auto_optimize: bool = True) -> FilePath:
+    """Artifact directory for a (location, radius, level of detail) render."""
+    key = {
+        "layers": layers,
+        "dilate": dilate,
+        "lod": level_of_detail(radius, auto_optimize),
+        "version": ARTIFACT_VERSION,
+    }
+    return get_cache().get_artifact_dir(query, radius or 0, key)
+
+
+def save_artifact(path: FilePath, gdfs: Dict[str, GeoDataFrame]) -> None:
+    """Write fetched layers as a render artifact at ``path``.
+
+    The artifact is built in a private directory and renamed into place, so
+    processes sharing the cache never load a half-written one.
+    """
+    tmp = temp_path(path)
+    try:
+        shutil.rmtree(tmp, ignore_errors=True)
+        tmp.mkdir(parents=True)
+        layers = {}
+        for layer, gdf in gdfs.items():
+            layers[layer] = LayerArrays.from_gdf(gdf).save(tmp, layer)
+        meta = {"version": ARTIFACT_VERSION, "created": time.time(), "layers": layers}
+        with open(tmp / "meta.json", "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        # Move a previous artifact aside first: a directory can only be
+        # renamed over an empty one. Readers holding its memory maps keep
+        # their (unlinked) files.
+        old = temp_path(path.with_name(f"{path.name}.old"))
+        try:
+            path.rename(old)
+        except FileNotFoundError:
+            old = None
+        try:
+            tmp.rename(path)
+        except OSError:
+            # Another process published the same artifact meanwhile
+            shutil.rmtree(tmp, ignore_errors=True)
+        if old is not None:
+            shutil.rmtree(old, ignore_errors=True)
+    except Exception as e:
+        logger.warning("Artifact write error: %s", e)
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+def load_artifact(path: FilePath, mmap: bool = True) -> Optional[RenderArtifact]:
+    """Load a render artifact, or return None if missing, stale or unreadable."""
+    meta_path = path / "meta.json"
+    if not get_cache().is_fresh(meta_path):
+        return None
+    try:
+        with open(meta_path, encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("version") != ARTIFACT_VERSION:
+            return None
+        return RenderArtifact({
+            layer: LayerArrays.load(path, layer, layer_meta, mmap=mmap)
+            for layer, layer_meta in meta["layers"].items()
+        })
+    except Exception as e:
+        # Left in place: the error may be transient or a race with
+        # save_artifact's swap, and the next save replaces a broken entry
+        logger.warning("Artifact read error: %s", e)
+        return None
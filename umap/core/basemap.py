@@ -0,0 +1,146 @@
+"""Raster cache of rendered map bodies, for cheap re-titling.
+
+Personalized posters repeat the same city, radius and style with a
+different title, subtitle or map furniture. Instead of drawing every layer
+again, the map body is rendered once per dpi and stored as a lossless
+RGBA ``.png`` plus a ``.json`` of its extent and size. A repeat render
+gets a figure holding just that image under an empty axes with the map's
+limits (:func:`basemap_figure`): titles, frames, scale bars and legends
+drawn on that axes land where they would on the full render, and saving
+only composites them over the cached pixels.
+
+Rasters are only valid for raster output at the dpi they were rendered
+at; vector formats keep drawing every layer.
+"""
+import json
+import logging
+import os
+import time
+from pathlib import Path as FilePath
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+from PIL import Image
+import matplotlib.axes
+import matplotlib.figure
+
+from .artifacts import level_of_detail
+from ..utils.cache import get_cache, temp_path
+from ..utils.drawing import fit_figure, new_figure
+from ..utils.encode import encode_png
+
+logger = logging.getLogger(__name__)
+
+BASEMAP_VERSION = 2
+
+# zlib level of stored rasters: ~20x smaller than raw pixels, and encoding
+# and decoding are a small fraction of drawing the map again
+BASEMAP_COMPRESS_LEVEL = 3
+
+
+def basemap_path(query, style: Dict, layers: Optional[Dict], radius: Optional[float], dpi: float,
+                 dilate=None, figsize=(12, 12), auto_optimize: bool = True) -> FilePath:
+    """Cache path (without suffix) of a map body rendered at ``dpi``."""
+    key = {
+        "style": style,
+        "layers": layers,
+        "dilate": dilate,
+        "lod": level_of_detail(radius, auto_optimize),
+        "dpi": dpi,
+        "figsize": list(figsize),
+        "version": BASEMAP_VERSION,
+    }
+    return get_cache().get_basemap_path(query, radius or 0, key)
+
+
+def render_basemap(fig: matplotlib.figure.Figure, ax: matplotlib.axes.Axes,
+                   dpi: float) -> Tuple[np.ndarray, Dict[str, Any]]:
+    """Rasterize a drawn map, without margins or furniture.
+
+    The figure is shrunk to the map itself and drawn once at ``dpi`` on its
+    (Agg based) canvas.
+
+    Returns:
+        The ``(height, width, 4)`` RGBA pixels and their metadata.
+    """
+    fit_figure(ax, pad=0.0)
+    fig.set_dpi(dpi)
+    fig.canvas.draw()
+    rgba = np.array(fig.canvas.buffer_rgba())
+    meta = {
+        "version": BASEMAP_VERSION,
+        "created": time.time(),
+        "dpi": dpi,
+        "size_inches": [float(v) for v in fig.get_size_inches()],
+        "xlim": [float(v) for v in ax.get_xlim()],
+        "ylim": [float(v) for v in ax.get_ylim()],
+        "shape": list(rgba.shape),
+    }
+    return rgba, meta
+
+
+def save_basemap(path: FilePath, rgba: np.ndarray, meta: Dict[str, Any]) -> None:
+    """Write a rendered map body at ``path``.
+
+    Both files are written privately and renamed into place, the ``.json``
+    last, so processes sharing the cache never load a half-written one.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    image_tmp, meta_tmp = temp_path(path.with_suffix(".png")), temp_path(path.with_suffix(".json"))
+    try:
+        with open(image_tmp, "wb") as f:
+            encode_png(rgba, f, compress_level=BASEMAP_COMPRESS_LEVEL, dpi=meta["dpi"])
+        with open(meta_tmp, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(image_tmp, path.with_suffix(".png"))
+        os.replace(meta_tmp, path.with_suffix(".json"))
+    except Exception as e:
+        logger.warning("Basemap write error: %s", e)
+        for tmp in (image_tmp, meta_tmp):
+            tmp.unlink(missing_ok=True)
+
+
+def load_basemap(path: FilePath) -> Optional[Tuple[np.ndarray, Dict[str, Any]]]:
+    """Load a map body, or return None if missing, stale or unreadable."""
+    meta_path = path.with_suffix(".json")
+    if not get_cache().is_fresh(meta_path):
+        return None
+    try:
+        with open(meta_path, encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("version") != BASEMAP_VERSION:
+            return None
+        with Image.open(path.with_suffix(".png")) as image:
+            rgba = np.asarray(image.convert("RGBA"))
+        if list(rgba.shape) != meta["shape"]:
+            return None
+        return rgba, meta
+    except Exception as e:
+        logger.warning("Basemap read error: %s", e)
+        return None
+
+
+def basemap_figure(rgba: np.ndarray, meta: Dict[str, Any], pad: float = 0.0,
+                   footer: float = 0.0) -> Tuple[matplotlib.figure.Figure, matplotlib.axes.Axes]:
+    """Figure showing a map body, with an empty axes over it for furniture.
+
+    The layout is that of :func:`~umap.utils.drawing.fit_figure`; the image
+    is placed pixel for pixel, so save the figure at ``meta["dpi"]``.
+    """
+    fig = new_figure(figsize=meta["size_inches"], dpi=meta["dpi"])
+    ax = fig.add_axes([0, 0, 1, 1])
+    ax.set_xlim(*meta["xlim"])
+    ax.set_ylim(*meta["ylim"])
+    ax.set_aspect("equal")
+    ax.axis("off")
+    fit_figure(ax, pad=pad, footer=footer)
+    x0, y0 = ax.get_position().p0
+    # Below the axes, whose artists are the overlay
+    fig.figimage(
+        rgba,
+        xo=round(x0 * fig.bbox.width),
+        yo=round(y0 * fig.bbox.height),
+        origin="upper",
+        zorder=-1,
+    )
+    return fig, ax
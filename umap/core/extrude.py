@@ -3,17 +3,22 @@
 Buildings are extruded along a fixed screen-space direction using their
 OSM ``building:levels`` (or ``height``) tags, producing an isometric
 "paper model" look with shaded walls, lit roofs and soft drop shadows.
+Only what can be seen is drawn: back-facing walls are culled, and
+optionally whole buildings hidden behind nearer ones.
 """
 import logging
 import math
 import numpy as np
 import matplotlib.colors as mcolors
 from matplotlib.path import Path
-from matplotlib.patches import PathPatch, Polygon as MplPolygon
-from matplotlib.collections import PatchCollection
-from shapely.geometry import Polygon, MultiPolygon
+from matplotlib.collections import PathCollection
+from shapely.geometry import Polygon
+from shapely.geometry.polygon import orient
+import shapely
 import shapely.affinity
 
+from ..utils.optimization import union_clusters
+
 logger = logging.getLogger(__name__)
 
 _MAX_LEVELS = 40
@@ -53,19 +58,74 @@ def _blend(color, other, t: float):
     return tuple((1 - t) * c1 + t * c2)
 
 
-def _roof_patch(poly: Polygon) -> PathPatch:
-    """Build a PathPatch for a polygon, preserving interior holes."""
-    rings = [np.asarray(poly.exterior.coords)[:, :2]]
-    rings += [np.asarray(ring.coords)[:, :2] for ring in poly.interiors]
+def _ring_codes(rings) -> np.ndarray:
     codes = []
     for ring in rings:
         codes += [Path.MOVETO] + [Path.LINETO] * (len(ring) - 2) + [Path.CLOSEPOLY]
-    return PathPatch(Path(np.concatenate(rings), codes))
+    return np.array(codes, dtype=Path.code_type)
+
+
+def _polygon_path(poly: Polygon, offset=(0.0, 0.0)) -> Path:
+    """Build a Path for a polygon moved by ``offset``, preserving holes."""
+    rings = [np.asarray(poly.exterior.coords)[:, :2]]
+    rings += [np.asarray(ring.coords)[:, :2] for ring in poly.interiors]
+    return Path(np.concatenate(rings) + offset, _ring_codes(rings))
+
+
+_QUAD_CODES = np.array(
+    [Path.MOVETO, Path.LINETO, Path.LINETO, Path.LINETO, Path.CLOSEPOLY], dtype=Path.code_type
+)
+
+
+def _occluded(items, d) -> np.ndarray:
+    """Flag buildings whose extruded silhouette is covered by nearer ones.
+
+    ``items`` are in painting order (far to near), so a building can only
+    be hidden by the ones after it. Its silhouette is over-approximated by
+    the convex hull of footprint and roof; the covering silhouettes are
+    under-approximated (exact for convex footprints, footprint plus roof
+    otherwise), so a visible building is never dropped.
+    """
+    hulls, occluders = [], []
+    for _, poly, h in items:
+        exterior = np.asarray(poly.exterior.coords)[:, :2]
+        hull = shapely.multipoints(np.vstack([exterior, exterior + d * h])).convex_hull
+        hulls.append(hull)
+        if poly.area >= poly.convex_hull.area * (1 - 1e-9):
+            occluders.append(hull)
+        else:
+            occluders.append(poly.union(shapely.affinity.translate(poly, *(d * h))))
+    hulls = np.array(hulls, dtype=object)
+    occluders = np.array(occluders, dtype=object)
+    areas = shapely.area(occluders)
+
+    tree = shapely.STRtree(occluders)
+    building, other = tree.query(hulls, predicate="intersects")
+    nearer = other > building
+    building, other = building[nearer], other[nearer]
+
+    hidden = np.zeros(len(items), dtype=bool)
+    bounds = np.flatnonzero(np.diff(building)) + 1
+    for group in np.split(np.arange(len(building)), bounds):
+        if not len(group):
+            continue
+        i, covering = building[group[0]], other[group]
+        # Not enough area to cover it, no need to union
+        if areas[covering].sum() < hulls[i].area:
+            continue
+        hidden[i] = shapely.union_all(occluders[covering]).covers(hulls[i])
+    return hidden
 
 
 def plot_extruded_buildings(gdf, ax, config, span, clip_patch=None, zorder=5):
     """Render buildings as pseudo-3D extrusions on a matplotlib axis.
 
+    Walls facing away from the viewer (along the extrusion direction) are
+    always hidden behind the roof and front walls and are not drawn. With
+    ``occlusion_culling`` set in ``config``, buildings hidden behind nearer
+    ones are skipped too (their shadows are kept). Overlapping drop
+    shadows are merged into one shape unless ``merge_shadows`` is False.
+
     Args:
         gdf: GeoDataFrame with building footprints (WGS84).
         ax: Target matplotlib axis.
@@ -95,79 +155,90 @@ def plot_extruded_buildings(gdf, ax, config, span, clip_patch=None, zorder=5):
 
     simplify_tol = span * 5e-5
 
-    levels_col = gdf["building:levels"] if "building:levels" in gdf.columns else None
-    height_col = gdf["height"] if "height" in gdf.columns else None
-
-    items = []
-    for i, geom in enumerate(gdf.geometry.values):
-        if geom is None or geom.is_empty:
-            continue
-        levels = _parse_levels(
-            levels_col.iloc[i] if levels_col is not None else None,
-            height_col.iloc[i] if height_col is not None else None,
-            default_levels,
-        )
-        polys = list(geom.geoms) if isinstance(geom, MultiPolygon) else [geom]
-        for poly in polys:
-            if not isinstance(poly, Polygon):
-                continue
-            poly = poly.simplify(simplify_tol, preserve_topology=True)
-            if poly.is_empty or not isinstance(poly, Polygon) or poly.exterior is None:
-                continue
-            centroid = poly.centroid
-            projection = centroid.x * d[0] + centroid.y * d[1]
-            items.append((projection, poly, levels * unit))
-
-    if not items:
+    levels_col = gdf["building:levels"].to_numpy() if "building:levels" in gdf.columns else None
+    height_col = gdf["height"].to_numpy() if "height" in gdf.columns else None
+
+    # Footprint polygons (multipolygons split up) with the row they came from
+    parts, rows = shapely.get_parts(np.asarray(gdf.geometry.values), return_index=True)
+    polygonal = shapely.get_type_id(parts) == 3
+    parts = shapely.simplify(parts[polygonal], simplify_tol, preserve_topology=True)
+    rows = rows[polygonal]
+    valid = (shapely.get_type_id(parts) == 3) & ~shapely.is_empty(parts)
+    parts, rows = parts[valid], rows[valid]
+    if not len(parts):
         return
 
     # Cap the number of extruded buildings to keep render time sane in
     # dense cities; the largest footprints (landmarks) are kept.
     max_buildings = int(config.get("max_buildings", 8000))
-    if len(items) > max_buildings:
-        items.sort(key=lambda item: -item[1].area)
-        items = items[:max_buildings]
+    if len(parts) > max_buildings:
+        largest = np.argsort(-shapely.area(parts), kind="stable")[:max_buildings]
+        parts, rows = parts[largest], rows[largest]
 
     # Paint far-to-near along the extrusion axis so closer buildings
     # correctly overlap the ones behind them.
-    items.sort(key=lambda item: -item[0])
+    centroids = shapely.centroid(parts)
+    projection = shapely.get_x(centroids) * d[0] + shapely.get_y(centroids) * d[1]
+    items = []
+    for i in np.argsort(-projection, kind="stable").tolist():
+        row = rows[i]
+        levels = _parse_levels(
+            levels_col[row] if levels_col is not None else None,
+            height_col[row] if height_col is not None else None,
+            default_levels,
+        )
+        # Counter-clockwise exterior: edge normals (dy, -dx) point outward
+        items.append((projection[i], orient(parts[i]), levels * unit))
 
-    wall_light = _blend(wall_fc, "#ffffff", 0.35)
-    wall_dark = _blend(wall_fc, "#000000", 0.18)
-    roof_rgb = mcolors.to_rgb(roof_fc)
+    hidden = _occluded(items, d) if config.get("occlusion_culling", False) else np.zeros(len(items), bool)
 
-    shadow_patches = []
-    patches, facecolors, edgecolors, linewidths = [], [], [], []
+    wall_light = mcolors.to_rgba(_blend(wall_fc, "#ffffff", 0.35))
+    wall_dark = mcolors.to_rgba(_blend(wall_fc, "#000000", 0.18))
+    roof_rgba = mcolors.to_rgba(roof_fc)
+    roof_ec_rgba = mcolors.to_rgba(roof_ec)
+    none = (0.0, 0.0, 0.0, 0.0)
 
-    for _, poly, h in items:
+    shadows = []
+    paths, facecolors, edgecolors, linewidths = [], [], [], []
+
+    for (_, poly, h), is_hidden in zip(items, hidden):
         off = d * h
         exterior = np.asarray(poly.exterior.coords)[:, :2]
+        shadows.append(exterior - d * (h * 0.4))
+        if is_hidden:
+            continue
 
-        shadow_patches.append(MplPolygon(exterior - d * (h * 0.4), closed=True))
-
-        # Walls: one quad per exterior edge, two-tone shaded by orientation.
-        for p1, p2 in zip(exterior[:-1], exterior[1:]):
-            edge = p2 - p1
-            normal = np.array([edge[1], -edge[0]])
-            norm = np.linalg.norm(normal)
-            if norm == 0:
-                continue
-            facing_light = float(np.dot(normal / norm, light)) > 0
-            patches.append(
-                MplPolygon(np.array([p1, p2, p2 + off, p1 + off]), closed=True)
-            )
-            facecolors.append(wall_light if facing_light else wall_dark)
-            edgecolors.append("none")
-            linewidths.append(0.0)
-
-        roof = shapely.affinity.translate(poly, xoff=off[0], yoff=off[1])
-        patches.append(_roof_patch(roof))
-        facecolors.append(roof_rgb)
-        edgecolors.append(roof_ec)
+        # Walls: one quad per front-facing exterior edge, two-tone shaded
+        # by orientation. Back-facing walls lie under the roof.
+        p1, p2 = exterior[:-1], exterior[1:]
+        edge = p2 - p1
+        normal = np.column_stack([edge[:, 1], -edge[:, 0]])
+        front = normal @ d < 0
+        if front.any():
+            quads = np.stack([p1, p2, p2 + off, p1 + off, p1], axis=1)[front]
+            lit = (normal[front] @ light) > 0
+            for quad, facing_light in zip(quads, lit.tolist()):
+                paths.append(Path(quad, _QUAD_CODES))
+                facecolors.append(wall_light if facing_light else wall_dark)
+            edgecolors += [none] * len(quads)
+            linewidths += [0.0] * len(quads)
+
+        paths.append(_polygon_path(poly, off))
+        facecolors.append(roof_rgba)
+        edgecolors.append(roof_ec_rgba)
         linewidths.append(roof_lw)
 
-    shadow_collection = PatchCollection(
-        shadow_patches,
+    if config.get("merge_shadows", True):
+        # One shape: overlapping shadows no longer stack up darker
+        merged = union_clusters(shapely.polygons(shadows))
+        shadow_paths = [
+            _polygon_path(orient(poly)) for poly in shapely.get_parts(merged)
+            if isinstance(poly, Polygon) and not poly.is_empty
+        ]
+    else:
+        shadow_paths = [Path(ring, closed=True) for ring in shadows]
+    shadow_collection = PathCollection(
+        shadow_paths,
         facecolors=shadow_fc,
         edgecolors="none",
         alpha=shadow_alpha,
@@ -175,8 +246,8 @@ def plot_extruded_buildings(gdf, ax, config, span, clip_patch=None, zorder=5):
     )
     ax.add_collection(shadow_collection)
 
-    building_collection = PatchCollection(
-        patches,
+    building_collection = PathCollection(
+        paths,
         facecolors=facecolors,
         edgecolors=edgecolors,
         linewidths=linewidths,
@@ -188,4 +259,7 @@ def plot_extruded_buildings(gdf, ax, config, span, clip_patch=None, zorder=5):
         shadow_collection.set_clip_path(clip_patch)
         building_collection.set_clip_path(clip_patch)
 
-    logger.info("Extruded %d building polygons", len(items))
+    logger.info(
+        "Extruded %d building polygons (%d hidden, %d wall/roof paths)",
+        len(items), int(hidden.sum()), len(paths),
+    )
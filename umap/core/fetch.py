@@ -1,10 +1,15 @@
 """OpenStreetMap data fetching functionality."""
 import re
+import asyncio
+import json
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
 import numpy as np
 import osmnx as ox
+import pandas as pd
+import shapely
 from copy import deepcopy
-from concurrent.futures import ThreadPoolExecutor
 from shapely.geometry import (
     box,
     Point,
@@ -16,9 +21,19 @@ from shapely.geometry import (
 from geopandas import GeoDataFrame
 from shapely.affinity import rotate, scale
 from shapely.ops import unary_union
-from shapely.strtree import STRtree
+from .refresh import baseline, is_unchanged, tag_selectors, utc_now
+from .scheduler import get_scheduler, request_key
+from .transport import FetchError, InsufficientResponseError, get_transport
 from ..utils.cache import get_cache
-from ..utils.optimization import optimize_layer_config, smart_filter_gdf
+from ..utils.optimization import (
+    DISSOLVE_LAYERS,
+    dissolve_gdf,
+    optimize_layer_config,
+    project_columns,
+    required_columns,
+    smart_filter_gdf,
+)
+from ..utils.profiling import NULL_PROFILER, count_vertices
 
 logger = logging.getLogger(__name__)
 
@@ -110,6 +125,187 @@ def get_perimeter(
 
     return perimeter
 
+# Fixed tag sets of the built-in feature layers
+LAYER_TAGS = {
+    # Coastline geometries
+    "coastline": {"natural": "coastline"},
+    # Linear waterways (rivers, streams, canals, etc.)
+    "waterway": {
+        "waterway": [
+            "river",
+            "stream",
+            "canal",
+            "drain",
+            "ditch",
+        ]
+    },
+    # Water bodies including seas, bays, harbours, etc.
+    "water": {
+        "natural": ["water", "bay", "strait", "wetland"],
+        "water": True,
+        "waterway": ["riverbank", "dock"],
+        "landuse": ["reservoir", "basin"],
+        "place": ["sea", "ocean"],
+        "harbour": True,
+    },
+    # Bridge features
+    "bridges": {
+        "bridge": True,
+        "man_made": "bridge",
+    },
+}
+
+def _download_layer(layer, bbox, tags=None, osmid=None, custom_filter=None):
+    """Download the raw features for a layer inside a bounding box.
+
+    Errors propagate to the caller; see :meth:`OverpassTransport.call`.
+    """
+    if layer in ["streets", "railway"]:
+        graph = ox.graph_from_polygon(
+            bbox,
+            retain_all=True,
+            custom_filter=custom_filter,
+            truncate_by_edge=True,
+        )
+        return _dedupe_edges(ox.graph_to_gdfs(graph, nodes=False))
+    elif layer in LAYER_TAGS:
+        return ox.features_from_polygon(bbox, tags=LAYER_TAGS[layer])
+    elif osmid is None:
+        # Fetch geometries from OSM
+        return ox.features_from_polygon(
+            bbox, tags={tags: True} if isinstance(tags, str) else tags
+        )
+    else:
+        return ox.geocode_to_gdf(osmid, by_osmid=True)
+
+def _dedupe_edges(edges):
+    """Collapse the reversed duplicates of a directed graph's two-way edges.
+
+    ``graph_to_gdfs`` returns a two-way street as both u→v and v→u with the
+    same (reversed) geometry. Edges are keyed on their normalized geometry
+    and highway class, so each segment is drawn, cached and styled once.
+    """
+    if edges.empty:
+        return edges
+    geoms = np.asarray(edges.geometry.values, dtype=object)
+    keys = {"geometry": shapely.to_wkb(shapely.normalize(geoms))}
+    if "highway" in edges.columns:
+        keys["highway"] = edges["highway"].astype(str).values
+    # Missing geometries all share one key; never treat them as duplicates
+    duplicated = pd.DataFrame(keys).duplicated().to_numpy() & ~shapely.is_missing(geoms)
+    return edges[~duplicated] if duplicated.any() else edges
+
+def _layer_query(layer, kwargs):
+    """Overpass element type and tag filters matching what a layer downloads.
+
+    Returns None for layers that cannot be revalidated (fetched by osmid).
+    """
+    if layer in ["streets", "railway"]:
+        custom_filter = kwargs.get("custom_filter")
+        if isinstance(custom_filter, str):
+            return "way", (custom_filter,)
+        if custom_filter:
+            return "way", tuple(custom_filter)
+        # osmnx's default network is a subset of all highways
+        return "way", ('["highway"]',)
+    if layer in LAYER_TAGS:
+        return "nwr", tag_selectors(LAYER_TAGS[layer])
+    if kwargs.get("osmid") is None and kwargs.get("tags"):
+        tags = kwargs["tags"]
+        return "nwr", tag_selectors({tags: True} if isinstance(tags, str) else tags)
+    return None
+
+class PerimeterContext:
+    """Perimeter geometry derived once and shared by every layer of a fetch.
+
+    Holds the unioned WGS84 shape, its Web Mercator projection, and lazily
+    computed tolerance-buffered variants with their bounding boxes.
+    ``prepared`` hands out per-thread prepared copies, since GEOS prepared
+    geometries build their indexes lazily and are not safe to share.
+    """
+
+    def __init__(self, perimeter: GeoDataFrame):
+        self.gdf = perimeter
+        self.projected = _transform_to_web_mercator(perimeter)
+        self.geometry = unary_union(perimeter.geometry).buffer(0)
+        self._buffered = {0: self.geometry}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    @classmethod
+    def of(cls, perimeter):
+        """Return ``perimeter`` if it already is a context, else build one."""
+        return perimeter if isinstance(perimeter, cls) else cls(perimeter)
+
+    def with_tolerance(self, tolerance=0):
+        """Perimeter buffered by ``tolerance`` meters (computed once per value)."""
+        tolerance = tolerance or 0
+        with self._lock:
+            shape = self._buffered.get(tolerance)
+        if shape is None:
+            buffered = _transform_to_wgs84(self.projected.buffer(tolerance))
+            shape = unary_union(buffered.geometry).buffer(0)
+            with self._lock:
+                shape = self._buffered.setdefault(tolerance, shape)
+        return shape
+
+    def bbox(self, tolerance=0):
+        """Bounding box of the tolerance-buffered perimeter."""
+        return box(*self.with_tolerance(tolerance).bounds)
+
+    def prepared(self, tolerance=0):
+        """Prepared copy of the buffered perimeter owned by the calling thread."""
+        cache = getattr(self._local, "prepared", None)
+        if cache is None:
+            cache = self._local.prepared = {}
+        tolerance = tolerance or 0
+        shape = cache.get(tolerance)
+        if shape is None:
+            shape = shapely.from_wkb(shapely.to_wkb(self.with_tolerance(tolerance)))
+            shapely.prepare(shape)
+            cache[tolerance] = shape
+        return shape
+
+    def __getstate__(self):
+        return {"gdf": self.gdf, "projected": self.projected, "geometry": self.geometry}
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._buffered = {0: self.geometry}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+def clip_gdf(gdf, perimeter):
+    """Clip a GeoDataFrame to a perimeter geometry.
+
+    The perimeter is prepared once and features are split with vectorized
+    predicates: those strictly inside are kept untouched, disjoint ones are
+    dropped, and only features crossing the boundary are intersected.
+    Feature order is preserved.
+    """
+    if gdf.empty:
+        return gdf
+
+    shapely.prepare(perimeter)
+    geoms = np.asarray(gdf.geometry.array)
+    inside = shapely.contains_properly(perimeter, geoms)
+    crossing = ~inside & shapely.intersects(perimeter, geoms)
+    keep = inside | crossing
+
+    if inside.all():
+        return gdf
+
+    clipped = geoms[keep]
+    crossing_kept = crossing[keep]
+    if crossing_kept.any():
+        clipped = clipped.copy()
+        clipped[crossing_kept] = shapely.intersection(clipped[crossing_kept], perimeter)
+
+    # Shallow copy: only the geometry column is replaced
+    gdf = gdf[keep].copy(deep=False)
+    gdf.geometry = clipped
+    return gdf[~shapely.is_empty(clipped)]
+
 def get_gdf(
     layer,
     perimeter,
@@ -118,130 +314,120 @@ def get_gdf(
     osmid=None,
     custom_filter=None,
     union=False,
+    columns=None,
+    profiler=None,
     **kwargs
 ):
-    """Get a GeoDataFrame for a specific layer."""
+    """Get a GeoDataFrame for a specific layer.
+
+    ``perimeter`` may be a GeoDataFrame or a :class:`PerimeterContext`;
+    pass the latter to reuse the derived geometry across layers. Attribute
+    columns are reduced to what the renderer needs plus ``columns``.
+
+    Raises:
+        FetchError: If the download failed after all retries and endpoints.
+    """
+    profiler = profiler or NULL_PROFILER
     try:
-        # Project and apply tolerance to perimeter
-        perimeter_projected = _transform_to_web_mercator(perimeter)
-        perimeter_with_tolerance = perimeter_projected.buffer(perimeter_tolerance)
-        perimeter_with_tolerance = _transform_to_wgs84(perimeter_with_tolerance)
-        perimeter_with_tolerance = unary_union(perimeter_with_tolerance.geometry).buffer(0)
-        
-        # Get bounding box
-        bbox = box(*perimeter_with_tolerance.bounds)
-        
-        # Fetch data based on layer type
-        if layer in ["streets", "railway"]:
-            try:
-                graph = ox.graph_from_polygon(
-                    bbox,
-                    retain_all=True,
-                    custom_filter=custom_filter,
-                    truncate_by_edge=True,
-                )
-                gdf = ox.graph_to_gdfs(graph, nodes=False)
-            except (ConnectionError, TimeoutError) as e:
-                logger.warning("Network error fetching %s data: %s", layer, e)
-                gdf = GeoDataFrame(geometry=[])
-            except Exception as e:
-                logger.warning("Error fetching %s data: %s", layer, e)
-                gdf = GeoDataFrame(geometry=[])
-        elif layer == "coastline":
-            try:
-                # Fetch coastline geometries from OSM
-                gdf = ox.features_from_polygon(
-                    bbox, tags={"natural": "coastline"}
-                )
-            except Exception as e:
-                logger.warning("Error fetching coastline data: %s", e)
-                gdf = GeoDataFrame(geometry=[])
-        elif layer == "waterway":
-            try:
-                # Fetch linear waterways (rivers, streams, canals, etc.)
-                gdf = ox.features_from_polygon(
-                    bbox,
-                    tags={
-                        "waterway": [
-                            "river",
-                            "stream",
-                            "canal",
-                            "drain",
-                            "ditch",
-                        ]
-                    },
-                )
-            except Exception as e:
-                logger.warning("Error fetching waterway data: %s", e)
-                gdf = GeoDataFrame(geometry=[])
-        elif layer == "water":
-            try:
-                # Fetch water bodies including seas, bays, harbours, etc.
-                gdf = ox.features_from_polygon(
-                    bbox,
-                    tags={
-                        "natural": ["water", "bay", "strait", "wetland"],
-                        "water": True,
-                        "waterway": ["riverbank", "dock"],
-                        "landuse": ["reservoir", "basin"],
-                        "place": ["sea", "ocean"],
-                        "harbour": True,
-                    },
-                )
-            except Exception as e:
-                logger.warning("Error fetching water data: %s", e)
-                gdf = GeoDataFrame(geometry=[])
-        elif layer == "bridges":
-            try:
-                # Fetch bridge features
-                gdf = ox.features_from_polygon(
-                    bbox,
-                    tags={
-                        "bridge": True,
-                        "man_made": "bridge",
-                    },
-                )
-            except Exception as e:
-                logger.warning("Error fetching bridges data: %s", e)
-                gdf = GeoDataFrame(geometry=[])
-        else:
-            try:
-                if osmid is None:
-                    # Fetch geometries from OSM
-                    gdf = ox.features_from_polygon(
-                        bbox, tags={tags: True} if isinstance(tags, str) else tags
-                    )
-                else:
-                    gdf = ox.geocode_to_gdf(osmid, by_osmid=True)
-            except Exception as e:
-                logger.warning("Error fetching %s data: %s", layer, e)
-                gdf = GeoDataFrame(geometry=[])
+        # Tolerance-buffered perimeter and its bounding box, shared across layers
+        context = PerimeterContext.of(perimeter)
+        perimeter_with_tolerance = context.prepared(perimeter_tolerance)
+        bbox = context.bbox(perimeter_tolerance)
     except Exception as e:
         logger.warning("Error processing perimeter for %s: %s", layer, e)
-        gdf = GeoDataFrame(geometry=[])
+        return GeoDataFrame(geometry=[])
 
-    # Fix invalid geometries before spatial operations
-    if not gdf.empty:
-        invalid_mask = ~gdf.geometry.is_valid
-        if invalid_mask.any():
-            gdf.loc[invalid_mask, 'geometry'] = gdf.loc[invalid_mask].geometry.buffer(0)
+    with profiler.stage("overpass", layer) as record:
+        try:
+            gdf = get_transport().call(
+                _download_layer, layer, bbox,
+                tags=tags, osmid=osmid, custom_filter=custom_filter,
+                description=f"Fetching {layer}",
+            )
+        except InsufficientResponseError:
+            # The transport only lets osmnx's "no matching features" through
+            # (timeouts and undecodable responses raise FetchError): a
+            # valid, empty layer
+            gdf = GeoDataFrame(geometry=[])
+        record['features'] = len(gdf)
 
-    # Intersect with perimeter using a spatial index
-    if not gdf.empty:
-        tree = STRtree(gdf.geometry.values)
-        intersecting_idx = tree.query(perimeter_with_tolerance)
-        gdf = gdf.iloc[intersecting_idx]
+    # Drop the sparse OSM tag columns nothing downstream reads
+    gdf = project_columns(gdf, required_columns(layer, {'columns': columns or []}))
 
+    with profiler.stage("clip", layer) as record:
+        # Fix invalid geometries before spatial operations
         if not gdf.empty:
-            gdf = gdf.copy()
-            gdf.geometry = gdf.geometry.intersection(perimeter_with_tolerance)
-            gdf = gdf[~gdf.geometry.is_empty]
+            geoms = np.asarray(gdf.geometry.array)
+            invalid_mask = ~shapely.is_valid(geoms)
+            if invalid_mask.any():
+                geoms = geoms.copy()
+                geoms[invalid_mask] = shapely.buffer(geoms[invalid_mask], 0)
+                gdf = gdf.copy(deep=False)
+                gdf.geometry = geoms
+
+        gdf = clip_gdf(gdf, perimeter_with_tolerance)
+
+        if profiler.enabled:
+            record['features'] = len(gdf)
+            record['vertices'] = count_vertices(gdf)
+
+    return gdf
+
+class FetchResult(dict):
+    """Mapping of layer name to GeoDataFrame, with partial-failure details.
+
+    ``perimeter_context`` is the :class:`PerimeterContext` the layers were
+    clipped with. ``failures`` maps each layer that could not be downloaded to the error
+    message; those layers are present as empty GeoDataFrames. Results with
+    failures are never written to the cache.
+    """
+
+    def __init__(self, *args, failures=None, perimeter_context=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.failures = dict(failures or {})
+        self.perimeter_context = perimeter_context
+
+    @property
+    def complete(self) -> bool:
+        return not self.failures
+
+def _perimeter_kwargs(layers_dict):
+    """Extract get_perimeter keyword arguments from the layer configuration."""
+    perimeter_kwargs = {}
+    if "perimeter" in layers_dict:
+        perimeter_kwargs = deepcopy(layers_dict["perimeter"])
+        perimeter_kwargs.pop("dilate", None)  # Remove dilate if exists, otherwise return None
+    return perimeter_kwargs
+
+def _filter_layer(layer, kwargs, gdf, radius, auto_optimize, profiler):
+    """Apply smart filtering to a fetched layer if optimization is enabled.
 
+    At coarse detail, single-style polygon layers are also dissolved into
+    fewer shapes, unless the layer configuration sets ``dissolve: False``
+    (plot does for layers a style extrudes).
+    """
+    if auto_optimize and radius and not gdf.empty:
+        optimization_config = kwargs.get('_optimization', {})
+        with profiler.stage("filter", layer) as record:
+            gdf = smart_filter_gdf(gdf, layer, radius, optimization_config)
+            record['features'] = len(gdf)
+        dissolve = optimization_config.get('dissolve_polygons', False) and layer in DISSOLVE_LAYERS
+        if kwargs.get('dissolve', dissolve):
+            with profiler.stage("dissolve", layer) as record:
+                gdf = dissolve_gdf(gdf, optimization_config.get('dissolve_gap', 0.0))
+                record['features'] = len(gdf)
     return gdf
 
-def get_gdfs(query, layers_dict, radius, dilate, rotation=0, use_cache=True, auto_optimize=True) -> dict:
-    """Fetch GeoDataFrames given query and a dictionary of layers."""
+def get_gdfs(query, layers_dict, radius, dilate, rotation=0, use_cache=True, auto_optimize=True,
+             profiler=None) -> dict:
+    """Fetch GeoDataFrames given query and a dictionary of layers.
+
+    Downloads run on the process-wide fetch scheduler, so concurrent calls
+    share one concurrency/rate budget and identical requests are coalesced.
+    Processes sharing a cache directory fetch a missing entry only once.
+    """
     cache = get_cache()
+    profiler = profiler or NULL_PROFILER
     
     # Apply optimization if enabled and radius is provided
     if auto_optimize and radius:
@@ -249,51 +435,557 @@ def get_gdfs(query, layers_dict, radius, dilate, rotation=0, use_cache=True, aut
     
     # Check cache first if enabled
     if use_cache:
-        cached_data = cache.get_cached_data(query, radius or 0, layers_dict)
+        with profiler.stage("cache_read") as record:
+            cached_data = cache.get_cached_data(query, radius or 0, layers_dict)
+            if cached_data is not None:
+                record['features'] = sum(
+                    len(gdf) for layer, gdf in cached_data.items() if layer != "perimeter"
+                )
         if cached_data is not None:
             return cached_data
-    
-    perimeter_kwargs = {}
-    if "perimeter" in layers_dict:
-        perimeter_kwargs = deepcopy(layers_dict["perimeter"])
-        perimeter_kwargs.pop("dilate", None)  # Remove dilate if exists, otherwise return None
+
+        # Single-flight across processes sharing the cache: the first one
+        # to miss fills the entry, the others wait and then read it
+        lease = cache.lease(query, radius or 0, layers_dict)
+        with profiler.stage("cache_wait"):
+            lease.acquire()
+        try:
+            cached_data = cache.get_cached_data(query, radius or 0, layers_dict)
+            if cached_data is not None:
+                return cached_data
+            if cache.refresh:
+                stale = cache.get_stale_entry(query, radius or 0, layers_dict)
+                if stale is not None:
+                    with profiler.stage("refresh"):
+                        return _refresh_gdfs(query, layers_dict, radius, auto_optimize, *stale, profiler)
+            return _download_gdfs(query, layers_dict, radius, dilate, rotation, use_cache, auto_optimize, profiler)
+        finally:
+            lease.release()
+
+    return _download_gdfs(query, layers_dict, radius, dilate, rotation, use_cache, auto_optimize, profiler)
+
+def _download_gdfs(query, layers_dict, radius, dilate, rotation, use_cache, auto_optimize, profiler):
+    """Download, filter and (if complete) cache the layers of :func:`get_gdfs`."""
+    cache = get_cache()
+    scheduler = get_scheduler()
+    started = utc_now()
+    perimeter_kwargs = _perimeter_kwargs(layers_dict)
 
     # Get perimeter
-    perimeter = get_perimeter(
-        query,
-        radius=radius,
-        rotation=rotation,
-        dilate=dilate,
-        **perimeter_kwargs,
-    )
+    with profiler.stage("geocode"):
+        perimeter = scheduler.run(
+            request_key("perimeter", query, radius, rotation, dilate, perimeter_kwargs),
+            get_perimeter,
+            query,
+            radius=radius,
+            rotation=rotation,
+            dilate=dilate,
+            **perimeter_kwargs,
+        )
+
+    # Derive the perimeter geometry once and share it with every layer
+    context = PerimeterContext(perimeter)
 
     # Get other layers as GeoDataFrames
-    gdfs = {"perimeter": perimeter}
+    gdfs = FetchResult({"perimeter": perimeter}, perimeter_context=context)
     futures = []
-    # Limit thread count to avoid overloading the OSM API
-    layer_count = sum(1 for k in layers_dict if k != "perimeter")
-    max_workers = min(layer_count, 6)
-    with ThreadPoolExecutor(max_workers=max_workers) as executor:
-        for layer, kwargs in layers_dict.items():
-            if layer != "perimeter":
-                futures.append((layer, kwargs, executor.submit(get_gdf, layer, perimeter, **kwargs)))
-
-        for layer, kwargs, future in futures:
+    for layer, kwargs in layers_dict.items():
+        if layer != "perimeter":
+            key = request_key("layer", layer, perimeter, kwargs)
+            futures.append((layer, kwargs, scheduler.submit(
+                key, get_gdf, layer, context, profiler=profiler, **kwargs
+            )))
+
+    for layer, kwargs, future in futures:
+        try:
+            gdf = future.result()
+        except Exception as e:
+            logger.warning("Error fetching %s: %s", layer, e)
+            gdfs.failures[layer] = str(e)
+            gdf = GeoDataFrame(geometry=[])
+
+        gdfs[layer] = _filter_layer(layer, kwargs, gdf, radius, auto_optimize, profiler)
+
+    # Cache the results if enabled; incomplete results would be served as
+    # if the failed layers were genuinely empty, so they are never cached
+    if use_cache and gdfs.complete:
+        meta = None
+        if cache.refresh:
+            with profiler.stage("osm_state"):
+                meta = {"layers": _record_states(layers_dict, context, started)}
+        with profiler.stage("cache_write"):
+            cache.cache_data(query, radius or 0, layers_dict, gdfs, meta=meta)
+    elif gdfs.failures:
+        logger.warning("Not caching incomplete result, failed layers: %s", ", ".join(gdfs.failures))
+
+    return gdfs
+
+def _record_states(layers_dict, context, started, layers=None):
+    """Record the OSM state of freshly downloaded layers for later revalidation."""
+    scheduler = get_scheduler()
+    futures = {}
+    for layer, kwargs in layers_dict.items():
+        if layer == "perimeter" or (layers is not None and layer not in layers):
+            continue
+        layer_query = _layer_query(layer, kwargs)
+        if layer_query is None:
+            continue
+        element, selectors = layer_query
+        bbox = context.bbox(kwargs.get("perimeter_tolerance", 0))
+        futures[layer] = scheduler.submit(
+            request_key("state", layer, bbox.wkt, selectors, started),
+            baseline, selectors, bbox, started, element,
+        )
+    states = {}
+    for layer, future in futures.items():
+        try:
+            states[layer] = future.result()
+        except Exception as e:
+            logger.warning("Could not record OSM state of %s: %s", layer, e)
+    return states
+
+def _refresh_gdfs(query, layers_dict, radius, auto_optimize, cached, meta, profiler, context=None,
+                  cache_key=None):
+    """Revalidate an expired cache entry, downloading only the changed layers.
+
+    Unchanged layers are kept as cached. If Overpass cannot be reached the
+    expired entry is returned as is and checked again on the next call.
+    ``context`` is needed for entries without a perimeter, and
+    ``cache_key`` when the entry is not stored under ``layers_dict``.
+    """
+    cache = get_cache()
+    scheduler = get_scheduler()
+    context = (
+        context or getattr(cached, "perimeter_context", None) or PerimeterContext(cached["perimeter"])
+    )
+    states = meta.get("layers", {})
+    started = utc_now()
+
+    checks = {}
+    changed = []
+    for layer, kwargs in layers_dict.items():
+        if layer == "perimeter":
+            continue
+        layer_query = _layer_query(layer, kwargs)
+        if layer_query is None or layer not in states or layer not in cached:
+            changed.append(layer)
+            continue
+        element, selectors = layer_query
+        bbox = context.bbox(kwargs.get("perimeter_tolerance", 0))
+        checks[layer] = scheduler.submit(
+            request_key("check", layer, bbox.wkt, selectors, states[layer]),
+            is_unchanged, selectors, bbox, states[layer], element,
+        )
+
+    new_states = {}
+    for layer, future in checks.items():
+        try:
+            unchanged, state = future.result()
+        except Exception as e:
+            logger.warning("Could not revalidate cached %s, serving expired data: %s", layer, e)
+            return cached
+        if unchanged:
+            new_states[layer] = state
+        else:
+            changed.append(layer)
+
+    gdfs = FetchResult(dict(cached), perimeter_context=context)
+    futures = {
+        layer: scheduler.submit(
+            request_key("layer", layer, context.gdf, layers_dict[layer]),
+            get_gdf, layer, context, profiler=profiler, **layers_dict[layer]
+        )
+        for layer in changed
+    }
+    refreshed = set()
+    for layer, future in futures.items():
+        try:
+            gdf = future.result()
+        except Exception as e:
+            # Keep the previous version; its state is not renewed so the
+            # layer is checked again next time
+            logger.warning("Error refreshing %s, keeping cached data: %s", layer, e)
+            continue
+        gdfs[layer] = _filter_layer(layer, layers_dict[layer], gdf, radius, auto_optimize, profiler)
+        refreshed.add(layer)
+
+    logger.info(
+        "Revalidated cache entry: %d layer(s) unchanged, %d re-downloaded",
+        len(new_states), len(refreshed),
+    )
+    new_states.update(_record_states(layers_dict, context, started, layers=refreshed))
+    cache.cache_data(query, radius or 0, cache_key or layers_dict, gdfs, meta={"layers": new_states})
+    return gdfs
+
+# get_gdf arguments that change what is downloaded (the rest only affects drawing)
+_FETCH_KWARGS = ("perimeter_tolerance", "tags", "osmid", "custom_filter", "columns")
+
+def _fetch_kwargs(kwargs):
+    return {k: kwargs[k] for k in _FETCH_KWARGS if k in kwargs}
+
+def _group_overlapping(indices, contexts, signatures):
+    """Group requests with the same layer settings whose areas overlap."""
+    parent = {i: i for i in indices}
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for a, i in enumerate(indices):
+        for j in indices[a + 1:]:
+            if signatures[i] == signatures[j] and contexts[i].bbox().intersects(contexts[j].bbox()):
+                parent[find(j)] = find(i)
+    groups = {}
+    for i in indices:
+        groups.setdefault(find(i), []).append(i)
+    return list(groups.values())
+
+def get_gdfs_many(requests, use_cache=True, auto_optimize=True, profiler=None, max_workers=None):
+    """Fetch layers for several areas at once, sharing downloads between them.
+
+    Each request is a dict of :func:`get_gdfs` arguments (``query``,
+    ``layers_dict``, ``radius`` and optionally ``dilate``, ``rotation`` and
+    ``auto_optimize``, which overrides the argument of the same name).
+    All perimeters are resolved up front. Requests whose areas overlap and
+    that fetch the same layers are downloaded once per layer over their
+    union, then clipped and filtered per request in parallel. Other groups
+    are fetched concurrently through the scheduler.
+
+    Returns:
+        One :class:`FetchResult` per request, in order. Results are
+        cached under the same keys as :func:`get_gdfs`.
+    """
+    cache = get_cache()
+    profiler = profiler or NULL_PROFILER
+
+    optimize = [request.get("auto_optimize", auto_optimize) for request in requests]
+    layer_sets = [
+        optimize_layer_config(request["layers_dict"], request["radius"])
+        if optimize[i] and request.get("radius") else request["layers_dict"]
+        for i, request in enumerate(requests)
+    ]
+    results = [None] * len(requests)
+    if use_cache:
+        with profiler.stage("cache_read"):
+            for i, request in enumerate(requests):
+                results[i] = cache.get_cached_data(request["query"], request.get("radius") or 0, layer_sets[i])
+    pending = [i for i, result in enumerate(results) if result is None]
+
+    # Take the fill lease of every missing entry that is free; entries
+    # another process is already filling are read once it is done
+    leases, busy = {}, []
+    if use_cache:
+        for i in pending:
+            lease = cache.lease(requests[i]["query"], requests[i].get("radius") or 0, layer_sets[i])
+            if lease.acquire(blocking=False):
+                leases[i] = lease
+            else:
+                busy.append(i)
+        pending = list(leases)
+    try:
+        if pending:
+            _fetch_many(requests, pending, layer_sets, optimize, results, use_cache, profiler, max_workers)
+    finally:
+        for lease in leases.values():
+            lease.release()
+
+    for i in busy:
+        request = requests[i]
+        results[i] = get_gdfs(
+            request["query"], request["layers_dict"], request.get("radius"),
+            request.get("dilate"), request.get("rotation", 0), use_cache, optimize[i], profiler,
+        )
+    return results
+
+def _fetch_many(requests, pending, layer_sets, optimize, results, use_cache, profiler, max_workers):
+    """Download the ``pending`` requests of :func:`get_gdfs_many` into ``results``."""
+    cache = get_cache()
+    scheduler = get_scheduler()
+    started = utc_now()
+
+    with profiler.stage("geocode"):
+        perimeter_futures = {}
+        for i in pending:
+            request = requests[i]
+            radius, dilate, rotation = request.get("radius"), request.get("dilate"), request.get("rotation", 0)
+            perimeter_kwargs = _perimeter_kwargs(layer_sets[i])
+            perimeter_futures[i] = scheduler.submit(
+                request_key("perimeter", request["query"], radius, rotation, dilate, perimeter_kwargs),
+                get_perimeter, request["query"], radius=radius, rotation=rotation, dilate=dilate,
+                **perimeter_kwargs,
+            )
+        contexts = {i: PerimeterContext(future.result()) for i, future in perimeter_futures.items()}
+
+    signatures = {
+        i: json.dumps(
+            {layer: _fetch_kwargs(kwargs) for layer, kwargs in layer_sets[i].items() if layer != "perimeter"},
+            sort_keys=True, default=str,
+        )
+        for i in pending
+    }
+    groups = _group_overlapping(pending, contexts, signatures)
+
+    # One download per layer and group, over the union of the group's areas
+    downloads = []
+    for group in groups:
+        if len(group) == 1:
+            context = contexts[group[0]]
+        else:
+            union = GeoDataFrame(
+                geometry=[unary_union([contexts[i].geometry for i in group])], crs="EPSG:4326"
+            )
+            context = PerimeterContext(union)
+            logger.info("Sharing downloads between %d overlapping areas", len(group))
+        futures = {}
+        for layer, kwargs in layer_sets[group[0]].items():
+            if layer == "perimeter":
+                continue
+            fetch_kwargs = _fetch_kwargs(kwargs)
+            futures[layer] = scheduler.submit(
+                request_key("layer", layer, context.gdf, fetch_kwargs),
+                get_gdf, layer, context, profiler=profiler, **fetch_kwargs
+            )
+        downloads.append((group, futures))
+
+    def finish(i, futures, shared):
+        """Clip shared downloads to request ``i`` and apply its filtering."""
+        context = contexts[i]
+        gdfs = FetchResult({"perimeter": context.gdf}, perimeter_context=context)
+        for layer, future in futures.items():
+            kwargs = layer_sets[i][layer]
             try:
                 gdf = future.result()
             except Exception as e:
                 logger.warning("Error fetching %s: %s", layer, e)
+                gdfs.failures[layer] = str(e)
                 gdf = GeoDataFrame(geometry=[])
+            if shared and not gdf.empty:
+                with profiler.stage("clip", layer):
+                    gdf = clip_gdf(gdf, context.prepared(kwargs.get("perimeter_tolerance", 0)))
+            gdfs[layer] = _filter_layer(layer, kwargs, gdf, requests[i].get("radius"), optimize[i], profiler)
+        if use_cache and gdfs.complete:
+            meta = None
+            if cache.refresh:
+                with profiler.stage("osm_state"):
+                    meta = {"layers": _record_states(layer_sets[i], context, started)}
+            cache.cache_data(
+                requests[i]["query"], requests[i].get("radius") or 0, layer_sets[i], gdfs, meta=meta
+            )
+        return i, gdfs
+
+    # Clipping and filtering are shapely/numpy work that releases the GIL
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="umap-clip") as executor:
+        jobs = [
+            executor.submit(finish, i, futures, len(group) > 1)
+            for group, futures in downloads for i in group
+        ]
+        for job in jobs:
+            i, gdfs = job.result()
+            results[i] = gdfs
 
-            # Apply smart filtering if optimization is enabled
-            if auto_optimize and radius and not gdf.empty:
-                optimization_config = kwargs.get('_optimization', {})
-                gdf = smart_filter_gdf(gdf, layer, radius, optimization_config)
+def iter_gdfs(query, layers_dict, radius, dilate, rotation=0, order=None, use_cache=True,
+              auto_optimize=True, profiler=None, failures=None):
+    """Fetch layers one at a time, yielding ``(layer, gdf)`` pairs.
 
-            gdfs[layer] = gdf
+    The first pair is always ``("perimeter", perimeter)``; the remaining
+    layers follow in ``order`` (default: configuration order). Each layer
+    is fetched, filtered and handed over before the next one is requested,
+    so only one layer needs to be alive at a time. Layers are cached under
+    their own keys; a complete ``get_gdfs`` cache entry is used if present.
+    Failed layers are yielded empty and recorded in ``failures``.
+    """
+    cache = get_cache()
+    scheduler = get_scheduler()
+    profiler = profiler or NULL_PROFILER
+    failures = failures if failures is not None else {}
+
+    if auto_optimize and radius:
+        layers_dict = optimize_layer_config(layers_dict, radius)
+    names = [layer for layer in (order or layers_dict) if layer != "perimeter" and layer in layers_dict]
+
+    if use_cache:
+        cached_data = cache.get_cached_data(query, radius or 0, layers_dict)
+        if cached_data is not None:
+            yield "perimeter", cached_data["perimeter"]
+            for layer in names:
+                yield layer, cached_data[layer]
+            return
 
-    # Cache the results if enabled
+    perimeter_kwargs = _perimeter_kwargs(layers_dict)
+    perimeter_key = {"perimeter": layers_dict.get("perimeter", {}), "_dilate": dilate, "_rotation": rotation}
+    perimeter = None
     if use_cache:
-        cache.cache_data(query, radius or 0, layers_dict, gdfs)
+        cached = cache.get_cached_data(query, radius or 0, perimeter_key)
+        perimeter = cached["perimeter"] if cached is not None else None
+    if perimeter is None:
+        with profiler.stage("geocode"):
+            perimeter = scheduler.run(
+                request_key("perimeter", query, radius, rotation, dilate, perimeter_kwargs),
+                get_perimeter,
+                query,
+                radius=radius,
+                rotation=rotation,
+                dilate=dilate,
+                **perimeter_kwargs,
+            )
+        if use_cache:
+            cache.cache_data(query, radius or 0, perimeter_key, {"perimeter": perimeter})
+    yield "perimeter", perimeter
+
+    context = PerimeterContext(perimeter)
+    for layer in names:
+        kwargs = layers_dict[layer]
+        layer_key = {**perimeter_key, layer: kwargs}
+        cached = cache.get_cached_data(query, radius or 0, layer_key) if use_cache else None
+        lease = None
+        if cached is None and use_cache:
+            lease = cache.lease(query, radius or 0, layer_key)
+            lease.acquire()
+            cached = cache.get_cached_data(query, radius or 0, layer_key)
+            if cached is None and cache.refresh:
+                stale = cache.get_stale_entry(query, radius or 0, layer_key)
+                if stale is not None:
+                    with profiler.stage("refresh", layer):
+                        cached = _refresh_gdfs(
+                            query, {layer: kwargs}, radius, auto_optimize, *stale, profiler,
+                            context=context, cache_key=layer_key,
+                        )
+        try:
+            if cached is not None:
+                gdf = cached[layer]
+            else:
+                started = utc_now()
+                try:
+                    gdf = scheduler.run(
+                        request_key("layer", layer, perimeter, kwargs),
+                        get_gdf, layer, context, profiler=profiler, **kwargs
+                    )
+                except Exception as e:
+                    logger.warning("Error fetching %s: %s", layer, e)
+                    failures[layer] = str(e)
+                    gdf = GeoDataFrame(geometry=[])
+                gdf = _filter_layer(layer, kwargs, gdf, radius, auto_optimize, profiler)
+                if use_cache and layer not in failures:
+                    meta = None
+                    if cache.refresh:
+                        with profiler.stage("osm_state"):
+                            meta = {"layers": _record_states({layer: kwargs}, context, started)}
+                    cache.cache_data(query, radius or 0, layer_key, {layer: gdf}, meta=meta)
+        finally:
+            # Release before handing the layer over; the consumer may be slow
+            if lease is not None:
+                lease.release()
+        yield layer, gdf
+        # Drop our reference so the consumer controls the layer's lifetime
+        del gdf, cached
+
+async def get_gdfs_async(query, layers_dict, radius, dilate, rotation=0, use_cache=True,
+                         auto_optimize=True, profiler=None) -> dict:
+    """Asyncio version of :func:`get_gdfs`.
+
+    Blocking work (cache I/O, downloads, filtering) runs off the event loop.
+    Downloads go through the same process-wide scheduler as ``get_gdfs``, so
+    identical requests from concurrent tasks or threads are fetched once.
+    """
+    loop = asyncio.get_running_loop()
+    cache = get_cache()
+    profiler = profiler or NULL_PROFILER
+
+    if auto_optimize and radius:
+        layers_dict = optimize_layer_config(layers_dict, radius)
+
+    if use_cache:
+        cached_data = await loop.run_in_executor(
+            None, cache.get_cached_data, query, radius or 0, layers_dict
+        )
+        if cached_data is not None:
+            return cached_data
+
+        # Poll rather than block a worker thread, so cancellation can't
+        # leave the lease held
+        lease = cache.lease(query, radius or 0, layers_dict)
+        while not lease.acquire(blocking=False):
+            await asyncio.sleep(lease.poll_seconds)
+        try:
+            cached_data = await loop.run_in_executor(
+                None, cache.get_cached_data, query, radius or 0, layers_dict
+            )
+            if cached_data is not None:
+                return cached_data
+            if cache.refresh:
+                stale = await loop.run_in_executor(
+                    None, cache.get_stale_entry, query, radius or 0, layers_dict
+                )
+                if stale is not None:
+                    with profiler.stage("refresh"):
+                        return await loop.run_in_executor(
+                            None, _refresh_gdfs, query, layers_dict, radius, auto_optimize, *stale, profiler
+                        )
+            return await _download_gdfs_async(
+                query, layers_dict, radius, dilate, rotation, use_cache, auto_optimize, profiler
+            )
+        finally:
+            lease.release()
+
+    return await _download_gdfs_async(
+        query, layers_dict, radius, dilate, rotation, use_cache, auto_optimize, profiler
+    )
+
+async def _download_gdfs_async(query, layers_dict, radius, dilate, rotation, use_cache, auto_optimize,
+                               profiler):
+    """Download, filter and (if complete) cache the layers of :func:`get_gdfs_async`."""
+    loop = asyncio.get_running_loop()
+    cache = get_cache()
+    scheduler = get_scheduler()
+    started = utc_now()
+
+    perimeter_kwargs = _perimeter_kwargs(layers_dict)
+    with profiler.stage("geocode"):
+        perimeter = await scheduler.run_async(
+            request_key("perimeter", query, radius, rotation, dilate, perimeter_kwargs),
+            get_perimeter,
+            query,
+            radius=radius,
+            rotation=rotation,
+            dilate=dilate,
+            **perimeter_kwargs,
+        )
+
+    context = PerimeterContext(perimeter)
+    layers = [(layer, kwargs) for layer, kwargs in layers_dict.items() if layer != "perimeter"]
+    results = await asyncio.gather(
+        *(
+            scheduler.run_async(
+                request_key("layer", layer, perimeter, kwargs),
+                get_gdf, layer, context, profiler=profiler, **kwargs
+            )
+            for layer, kwargs in layers
+        ),
+        return_exceptions=True,
+    )
+
+    gdfs = FetchResult({"perimeter": perimeter}, perimeter_context=context)
+    for (layer, kwargs), gdf in zip(layers, results):
+        if isinstance(gdf, BaseException):
+            logger.warning("Error fetching %s: %s", layer, gdf)
+            gdfs.failures[layer] = str(gdf)
+            gdf = GeoDataFrame(geometry=[])
+        gdfs[layer] = await loop.run_in_executor(
+            None, _filter_layer, layer, kwargs, gdf, radius, auto_optimize, profiler
+        )
+
+    if use_cache and gdfs.complete:
+        meta = None
+        if cache.refresh:
+            with profiler.stage("osm_state"):
+                states = await loop.run_in_executor(None, _record_states, layers_dict, context, started)
+            meta = {"layers": states}
+        await loop.run_in_executor(
+            None, cache.cache_data, query, radius or 0, layers_dict, gdfs, meta
+        )
+    elif gdfs.failures:
+        logger.warning("Not caching incomplete result, failed layers: %s", ", ".join(gdfs.failures))
 
     return gdfs
@@ -1,17 +1,19 @@
 """Core plotting functionality."""
+import io
 import logging
 import numpy as np
-import matplotlib.pyplot as plt
+from copy import deepcopy
 from dataclasses import dataclass
 from typing import Dict, Optional, Union, Tuple, List, Any
 import matplotlib.figure
 import matplotlib.axes
 import geopandas as gp
-import shapely.ops
 import shapely.affinity
-from matplotlib.patches import PathPatch
+from matplotlib.patches import PathPatch, Rectangle
 from matplotlib.path import Path
+from matplotlib.transforms import TransformedPatchPath
 from matplotlib.collections import PatchCollection, LineCollection
+from matplotlib.backends.backend_agg import FigureCanvasAgg
 from shapely.geometry import (
     Point,
     LineString,
@@ -22,17 +24,55 @@ from shapely.geometry import (
     box,
 )
 from shapely.geometry.base import BaseGeometry
-from .fetch import get_gdfs
+from .artifacts import LayerArrays, artifact_path, load_artifact, save_artifact
+from .basemap import basemap_figure, basemap_path, load_basemap, render_basemap, save_basemap
+from .fetch import FetchResult, PerimeterContext, get_gdfs, get_gdfs_many, iter_gdfs
 from .extrude import plot_extruded_buildings
+from .plotter import PlotterDrawing, plotter_drawing
+from .strokes import merge_strokes
+from ..utils.drawing import new_figure
+from ..utils.encode import RASTER_FORMATS, save_image
+from ..utils.optimization import optimize_layer_config
 from ..utils.styles import get_style
+from ..utils.profiling import NULL_PROFILER, Profiler, count_vertices
 
 logger = logging.getLogger(__name__)
 
-try:
-    import vsketch
-except ImportError:
-    # vsketch is optional for pen plotter mode
-    pass
+# What collections are clipped to: a patch, or a path shared between them
+Clip = Union[PathPatch, Rectangle, TransformedPatchPath]
+
+# Highest dpi maps are saved at (the CLI's --8k); clip paths are
+# simplified to half a pixel at this resolution
+CLIP_DPI = 800
+
+# Layers fetched by plot() when none are given
+DEFAULT_LAYERS: Dict[str, dict] = {
+    'perimeter': {},
+    'water': {},
+    'waterway': {},
+    'green': {
+        'tags': {
+            'leisure': ['park', 'garden', 'pitch', 'playground'],
+            'landuse': [
+                'grass', 'forest', 'meadow', 'recreation_ground',
+                'village_green', 'cemetery', 'orchard', 'vineyard'
+            ],
+            'natural': ['wood', 'scrub', 'heath', 'grassland'],
+        }
+    },
+    'streets': {
+        'width': {
+            'motorway': 4.5,
+            'trunk': 4,
+            'primary': 3.2,
+            'secondary': 2.4,
+            'tertiary': 1.8,
+            'residential': 1.4
+        }
+    },
+    'bridges': {},
+    'building': {'tags': {'building': True}}
+}
 
 @dataclass
 class Plot:
@@ -41,6 +81,89 @@ class Plot:
     fig: Optional[matplotlib.figure.Figure]
     ax: Optional[matplotlib.axes.Axes]
     background: Optional[BaseGeometry]
+    profile: Optional[Profiler] = None
+
+    @property
+    def failures(self) -> Dict[str, str]:
+        """Layers that failed to download (drawn as empty), with the error."""
+        return getattr(self.geodataframes, "failures", {})
+
+    def render(self, format: str = "png", dpi: Optional[float] = None, fp=None, **kwargs) -> Optional[bytes]:
+        """Encode the map in memory instead of saving it to a path.
+
+        Returns the encoded bytes or, when ``fp`` is given, writes them to
+        that file-like object (e.g. an HTTP response stream) and returns
+        None. Raster formats (png, jpg, webp, avif) are drawn once with
+        :meth:`to_array` and encoded by :func:`~umap.utils.encode.save_image`,
+        which takes the extra keyword arguments (``quality``,
+        ``compress_level``, ``png_filter``, ``colors``, ``workers``) besides
+        ``facecolor``. Other formats go through ``savefig`` with them.
+        """
+        if self.fig is None:
+            raise ValueError("Plotter-mode plots have no figure, use to_plotter()")
+        out = io.BytesIO() if fp is None else fp
+        if format.lower() in RASTER_FORMATS:
+            facecolor = kwargs.pop("facecolor", None)
+            previous = self.fig.get_facecolor()
+            if facecolor is not None:
+                self.fig.set_facecolor(facecolor)
+            try:
+                pixels = self.to_array(dpi)
+            finally:
+                self.fig.set_facecolor(previous)
+            save_image(pixels, out, format, dpi=dpi if dpi is not None else self.fig.dpi, **kwargs)
+        else:
+            self.fig.savefig(out, format=format, dpi=dpi, **kwargs)
+        return out.getvalue() if fp is None else None
+
+    def to_array(self, dpi: Optional[float] = None) -> np.ndarray:
+        """Draw the map and return its RGBA pixels, without copying.
+
+        The ``(height, width, 4)`` uint8 array is a view of the Agg
+        canvas buffer: it is only valid until the figure is drawn again,
+        so copy it to keep it. The figure's own dpi is left unchanged.
+        """
+        if self.fig is None:
+            raise ValueError("Plotter-mode plots have no figure, use to_plotter()")
+        previous = self.fig.dpi
+        if dpi is not None:
+            self.fig.set_dpi(dpi)
+        try:
+            canvas = self.fig.canvas
+            if not isinstance(canvas, FigureCanvasAgg):
+                canvas = FigureCanvasAgg(self.fig)
+            canvas.draw()
+            return np.asarray(canvas.buffer_rgba())
+        finally:
+            self.fig.set_dpi(previous)
+
+    def close(self) -> None:
+        """Release the figure and everything drawn on it.
+
+        Also called when the plot is used as a context manager
+        (``with umap.plot(...) as result:``).
+        """
+        if self.fig is not None:
+            self.fig.clear()
+        self.fig = self.ax = None
+
+    def __enter__(self) -> "Plot":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def to_plotter(self, path: Optional[str] = None, style: Optional[Dict] = None, **kwargs) -> PlotterDrawing:
+        """Build a pen-plotter drawing of the map, writing it to ``path`` if given.
+
+        Extra keyword arguments go to :func:`~umap.core.plotter.plotter_drawing`.
+        """
+        if isinstance(style, str):
+            style = get_style(style)
+        drawing = plotter_drawing(self.geodataframes, style, **kwargs)
+        if path is not None:
+            drawing.save(path)
+        return drawing
 
 class Subplot:
     """Class for organizing multiple map views."""
@@ -111,6 +234,7 @@ def _add_glow(ax, geoms_or_patches, kind, kwargs, clip_patch=None, lw=1.0):
                 alpha=alpha,
                 zorder=base_zorder - 0.5,
                 capstyle='round',
+                joinstyle='round',
             )
         else:
             collection = PatchCollection(
@@ -126,6 +250,119 @@ def _add_glow(ax, geoms_or_patches, kind, kwargs, clip_patch=None, lw=1.0):
             collection.set_clip_path(clip_patch)
 
 
+def _add_polygon_collections(ax, polygon_patches, palette=None, clip_patch=None, **kwargs) -> None:
+    """Add fill (and outline) collections for a layer's polygon patches."""
+    fc = kwargs.get('fc')
+    if palette and not fc:
+        polygon_colors = [np.random.choice(palette) for _ in polygon_patches]
+    else:
+        polygon_colors = [fc if fc else '#fff'] * len(polygon_patches)
+
+    # Extra kwargs excluding known polygon-specific and glow/casing keys
+    _reserved = [
+        'lw', 'ec', 'fc', 'hatch', 'hatch_c', 'palette', 'fill',
+        'glow', 'glow_color', 'glow_scale', 'glow_alpha', 'glow_passes',
+        'casing_ec', 'casing_alpha', 'casing_scale', 'columns', 'merge_lines',
+    ]
+    extra_kw = {k: v for k, v in kwargs.items() if k not in _reserved}
+    if kwargs.get('glow'):
+        _add_glow(
+            ax, polygon_patches, 'patches', kwargs,
+            clip_patch=clip_patch, lw=max(kwargs.get('lw', 0.3), 0.3),
+        )
+    hatch_c = kwargs.get('hatch_c', kwargs.get('ec', '#2F3737'))
+    # Fill collection with hatch support
+    main_collection = PatchCollection(
+        polygon_patches,
+        facecolors=polygon_colors,
+        edgecolors=hatch_c,
+        linewidths=0,
+        hatch=kwargs.get('hatch', None),
+        **extra_kw,
+    )
+    ax.add_collection(main_collection)
+    if clip_patch is not None:
+        main_collection.set_clip_path(clip_patch)
+    # Outline collection reuses same patches (no duplicate creation)
+    outline_lw = kwargs.get('lw', 0)
+    if outline_lw > 0:
+        outline_collection = PatchCollection(
+            polygon_patches,
+            facecolors='none',
+            edgecolors=kwargs.get('ec', '#2F3737'),
+            linewidths=outline_lw,
+            **{k: v for k, v in extra_kw.items() if k not in ['ls', 'dashes']},
+        )
+        ax.add_collection(outline_collection)
+        if clip_patch is not None:
+            outline_collection.set_clip_path(clip_patch)
+
+def _line_width(layer: str, highway, width, kwargs) -> float:
+    """Stroke width of a line feature from the layer's width mapping."""
+    if isinstance(width, dict) and layer == 'streets':
+        if isinstance(highway, list) and highway:
+            highway = highway[0]
+        if isinstance(highway, str) and highway in width:
+            return float(width[highway])
+        return float(kwargs.get('lw', 0.6))
+    elif isinstance(width, (int, float)):
+        return float(width)
+    return float(kwargs.get('lw', 0.6))
+
+def _add_line_collections(ax, groups: Dict[float, List[np.ndarray]], clip_patch=None, **kwargs) -> None:
+    """Add glow, casing and stroke collections for lines grouped by width.
+
+    Segments of the same width are merged into long strokes first (unless
+    the style sets ``merge_lines: False``), so every pass draws far fewer
+    paths and round joins replace the caps at each intersection.
+    """
+    avg_lw = (
+        sum(lw * len(geoms) for lw, geoms in groups.items())
+        / max(sum(len(geoms) for geoms in groups.values()), 1)
+    )
+    if kwargs.get('merge_lines', True):
+        groups = {lw_value: merge_strokes(geoms) for lw_value, geoms in groups.items()}
+
+    # Neon glow halo behind all line strokes
+    if kwargs.get('glow'):
+        all_geoms = [g for geoms in groups.values() for g in geoms]
+        _add_glow(ax, all_geoms, 'lines', kwargs, clip_patch=clip_patch, lw=avg_lw)
+
+    # Draw casing first if requested
+    if 'casing_ec' in kwargs and 'casing_scale' in kwargs:
+        for lw_value, geoms in groups.items():
+            casing = LineCollection(
+                geoms,
+                colors=kwargs.get('casing_ec'),
+                linewidths=lw_value * float(kwargs.get('casing_scale', 2.0)),
+                alpha=float(kwargs.get('casing_alpha', 1.0)),
+                zorder=max(kwargs.get('zorder', 3) - 0.1, 0),
+                capstyle='round',
+                joinstyle='round',
+            )
+            ax.add_collection(casing)
+            if clip_patch is not None:
+                casing.set_clip_path(clip_patch)
+
+    # Main stroke: round caps/joins for smooth intersections
+    for lw_value, geoms in groups.items():
+        line_collection = LineCollection(
+            geoms,
+            colors=kwargs.get('ec', '#2F3737'),
+            linewidths=lw_value,
+            alpha=kwargs.get('alpha', 1),
+            zorder=kwargs.get('zorder'),
+            capstyle='round',
+            joinstyle='round',
+        )
+        if 'ls' in kwargs:
+            line_collection.set_linestyle(kwargs['ls'])
+        if 'dashes' in kwargs:
+            line_collection.set_dashes(kwargs['dashes'])
+        ax.add_collection(line_collection)
+        if clip_patch is not None:
+            line_collection.set_clip_path(clip_patch)
+
 def plot_gdf(
     layer: str,
     gdf: gp.GeoDataFrame,
@@ -134,131 +371,31 @@ def plot_gdf(
     vsk=None,
     palette: Optional[List[str]] = None,
     width: Optional[Union[dict, float]] = None,
-    clip_patch: Optional[PathPatch] = None,
+    clip_patch: Optional[Clip] = None,
     **kwargs,
 ) -> None:
     """Plot a GeoDataFrame layer."""
     if mode == "matplotlib" and ax is not None:
-        polygon_patches = []
-        polygon_colors = []
-
         # Build polygon patches in a single pass
-        for shape in gdf.geometry:
-            if isinstance(shape, (Polygon, MultiPolygon)):
-                fc = kwargs.get('fc')
-                if palette and not fc:
-                    fc = np.random.choice(palette)
-                polygon_colors.append(fc if fc else '#fff')
-                polygon_patches.append(PolygonPatch(shape))
-
+        polygon_patches = [
+            PolygonPatch(shape) for shape in gdf.geometry
+            if isinstance(shape, (Polygon, MultiPolygon))
+        ]
         if polygon_patches:
-            # Extra kwargs excluding known polygon-specific and glow/casing keys
-            _reserved = [
-                'lw', 'ec', 'fc', 'hatch', 'hatch_c', 'palette', 'fill',
-                'glow', 'glow_color', 'glow_scale', 'glow_alpha', 'glow_passes',
-                'casing_ec', 'casing_alpha', 'casing_scale',
-            ]
-            extra_kw = {k: v for k, v in kwargs.items() if k not in _reserved}
-            if kwargs.get('glow'):
-                _add_glow(
-                    ax, polygon_patches, 'patches', kwargs,
-                    clip_patch=clip_patch, lw=max(kwargs.get('lw', 0.3), 0.3),
-                )
-            hatch_c = kwargs.get('hatch_c', kwargs.get('ec', '#2F3737'))
-            # Fill collection with hatch support
-            main_collection = PatchCollection(
-                polygon_patches,
-                facecolors=polygon_colors,
-                edgecolors=hatch_c,
-                linewidths=0,
-                hatch=kwargs.get('hatch', None),
-                **extra_kw,
-            )
-            ax.add_collection(main_collection)
-            if clip_patch is not None:
-                main_collection.set_clip_path(clip_patch)
-            # Outline collection reuses same patches (no duplicate creation)
-            outline_lw = kwargs.get('lw', 0)
-            if outline_lw > 0:
-                outline_collection = PatchCollection(
-                    polygon_patches,
-                    facecolors='none',
-                    edgecolors=kwargs.get('ec', '#2F3737'),
-                    linewidths=outline_lw,
-                    **{k: v for k, v in extra_kw.items() if k not in ['ls', 'dashes']},
-                )
-                ax.add_collection(outline_collection)
-                if clip_patch is not None:
-                    outline_collection.set_clip_path(clip_patch)
+            _add_polygon_collections(ax, polygon_patches, palette, clip_patch, **kwargs)
 
         # Lines with optional width mapping and casing (mainly for streets)
         if any(isinstance(geom, (LineString, MultiLineString)) for geom in gdf.geometry):
             groups: Dict[float, List[np.ndarray]] = {}
-
-            def get_width_for_row(row) -> float:
-                if isinstance(width, dict) and layer == 'streets':
-                    highway = getattr(row, 'highway', None)
-                    if isinstance(highway, list) and highway:
-                        highway = highway[0]
-                    if isinstance(highway, str) and highway in width:
-                        return float(width[highway])
-                    return float(kwargs.get('lw', 0.6))
-                elif isinstance(width, (int, float)):
-                    return float(width)
-                return float(kwargs.get('lw', 0.6))
-
             for row in gdf.itertuples(index=False):
                 geom = row.geometry
-                current_width = get_width_for_row(row)
+                current_width = _line_width(layer, getattr(row, 'highway', None), width, kwargs)
                 if isinstance(geom, LineString):
                     groups.setdefault(current_width, []).append(np.column_stack(geom.xy))
                 elif isinstance(geom, MultiLineString):
                     for line in geom.geoms:
                         groups.setdefault(current_width, []).append(np.column_stack(line.xy))
-
-            # Neon glow halo behind all line strokes
-            if kwargs.get('glow'):
-                all_geoms = [g for geoms in groups.values() for g in geoms]
-                avg_lw = (
-                    sum(lw * len(geoms) for lw, geoms in groups.items())
-                    / max(sum(len(geoms) for geoms in groups.values()), 1)
-                )
-                _add_glow(ax, all_geoms, 'lines', kwargs, clip_patch=clip_patch, lw=avg_lw)
-
-            # Draw casing first if requested
-            if 'casing_ec' in kwargs and 'casing_scale' in kwargs:
-                for lw_value, geoms in groups.items():
-                    casing = LineCollection(
-                        geoms,
-                        colors=kwargs.get('casing_ec'),
-                        linewidths=lw_value * float(kwargs.get('casing_scale', 2.0)),
-                        alpha=float(kwargs.get('casing_alpha', 1.0)),
-                        zorder=max(kwargs.get('zorder', 3) - 0.1, 0),
-                        capstyle='round',
-                        joinstyle='round',
-                    )
-                    ax.add_collection(casing)
-                    if clip_patch is not None:
-                        casing.set_clip_path(clip_patch)
-
-            # Main stroke: round caps/joins for smooth intersections
-            for lw_value, geoms in groups.items():
-                line_collection = LineCollection(
-                    geoms,
-                    colors=kwargs.get('ec', '#2F3737'),
-                    linewidths=lw_value,
-                    alpha=kwargs.get('alpha', 1),
-                    zorder=kwargs.get('zorder'),
-                    capstyle='round',
-                    joinstyle='round',
-                )
-                if 'ls' in kwargs:
-                    line_collection.set_linestyle(kwargs['ls'])
-                if 'dashes' in kwargs:
-                    line_collection.set_dashes(kwargs['dashes'])
-                ax.add_collection(line_collection)
-                if clip_patch is not None:
-                    line_collection.set_clip_path(clip_patch)
+            _add_line_collections(ax, groups, clip_patch, **kwargs)
     elif mode == "plotter" and vsk:
         if kwargs.get("draw", True):
             vsk.stroke(kwargs.get("stroke", 1))
@@ -272,15 +409,77 @@ def plot_gdf(
     else:
         raise ValueError(f"Unknown mode {mode}")
 
+def plot_arrays(
+    layer: str,
+    arrays: LayerArrays,
+    ax: matplotlib.axes.Axes,
+    palette: Optional[List[str]] = None,
+    width: Optional[Union[dict, float]] = None,
+    clip_patch: Optional[Clip] = None,
+    **kwargs,
+) -> None:
+    """Plot a layer from render-ready arrays; same output as :func:`plot_gdf`."""
+    polygon_patches = [PathPatch(path) for path in arrays.polygon_paths()]
+    if polygon_patches:
+        _add_polygon_collections(ax, polygon_patches, palette, clip_patch, **kwargs)
+
+    lines, rows = arrays.line_parts()
+    if lines:
+        # One width per highway category instead of one lookup per feature
+        highway = arrays.attribute('highway') if layer == 'streets' else None
+        if highway is not None:
+            codes, categories = highway
+            category_widths = np.array(
+                [_line_width(layer, value, width, kwargs) for value in categories]
+                + [_line_width(layer, None, width, kwargs)]
+            )
+            # Missing values (code -1) index the trailing default width
+            line_widths = category_widths[np.asarray(codes)[rows]]
+        else:
+            line_widths = np.full(len(lines), _line_width(layer, None, width, kwargs))
+        groups: Dict[float, List[np.ndarray]] = {}
+        for line, lw_value in zip(lines, line_widths.tolist()):
+            groups.setdefault(lw_value, []).append(line)
+        _add_line_collections(ax, groups, clip_patch, **kwargs)
+
+def _perimeter_context(gdfs: Dict[str, gp.GeoDataFrame]) -> PerimeterContext:
+    """Reuse the context the layers were fetched with, or derive one."""
+    context = getattr(gdfs, "perimeter_context", None)
+    return context if context is not None else PerimeterContext(gdfs["perimeter"])
+
+def _perimeter_clip(ax: matplotlib.axes.Axes, geometry: BaseGeometry, span: float) -> Clip:
+    """Clip for the layers drawn over the perimeter, shared by all of them.
+
+    Agg rasterizes a clip path into a canvas-sized mask whenever the path
+    object differs from the one of the previous draw, and each artist
+    wraps a patch in its own transformed path; giving every collection the
+    same :class:`TransformedPatchPath` rasterizes the mask once per
+    render. The path is simplified to half a pixel at :data:`CLIP_DPI`.
+    Axis-aligned rectangles become a plain clip box, which costs nothing.
+    """
+    xmin, ymin, xmax, ymax = geometry.bounds
+    if (
+        geometry.geom_type == "Polygon"
+        and not geometry.interiors
+        and geometry.area >= (xmax - xmin) * (ymax - ymin) * (1 - 1e-9)
+    ):
+        return Rectangle((xmin, ymin), xmax - xmin, ymax - ymin, transform=ax.transData)
+    inches = max(ax.figure.get_size_inches())
+    tolerance = span / (inches * CLIP_DPI) / 2
+    patch = PolygonPatch(geometry.simplify(tolerance), transform=ax.transData)
+    return TransformedPatchPath(patch)
+
 def create_background(
     gdfs: Dict[str, gp.GeoDataFrame],
-    style: Dict[str, dict]
+    style: Dict[str, dict],
+    perimeter: Optional[PerimeterContext] = None,
 ) -> Tuple[BaseGeometry, float, float, float, float, float, float]:
     """Create background layer and get bounds."""
+    perimeter = perimeter or _perimeter_context(gdfs)
     background_style = style.get("background", {})
     background_pad = background_style.get("pad", 1.1)
     background = shapely.affinity.scale(
-        box(*shapely.ops.unary_union(gdfs["perimeter"].geometry).bounds),
+        box(*perimeter.geometry.bounds),
         background_pad,
         background_pad,
     )
@@ -294,6 +493,95 @@ def create_background(
     
     return background, xmin, ymin, xmax, ymax, dx, dy
 
+def _draw_order(layers: Dict[str, dict], style: Dict[str, dict]) -> List[str]:
+    """Layer names sorted by their style z-order (bottom first)."""
+    return sorted(
+        (layer for layer in layers if layer != "perimeter"),
+        key=lambda layer: style.get(layer, {}).get("zorder", 0),
+    )
+
+def _draw_layer(
+    ax: matplotlib.axes.Axes,
+    layer: str,
+    gdf: Union[gp.GeoDataFrame, LayerArrays],
+    layers: Dict[str, dict],
+    style: Dict[str, dict],
+    span: float,
+    clip_patch: Optional[Clip] = None,
+    profiler=NULL_PROFILER,
+) -> None:
+    """Draw one fetched layer with its style, as flat or extruded shapes.
+
+    ``gdf`` may also be the :class:`LayerArrays` of a render artifact.
+    """
+    if layer == "green" and "green" not in style:
+        # Don't paint default-colored parks on styles that predate the layer
+        return
+    if layer not in layers and layer not in style:
+        return
+    layer_style = style.get(layer, {})
+    with profiler.stage("draw", layer) as record:
+        if profiler.enabled:
+            record['features'] = len(gdf)
+            if isinstance(gdf, gp.GeoDataFrame):
+                record['vertices'] = count_vertices(gdf)
+        if isinstance(gdf, LayerArrays):
+            if "extrude" in layer_style:
+                # Extrusion works on shapely footprints
+                gdf = gdf.to_gdf()
+            else:
+                plot_arrays(
+                    layer,
+                    gdf,
+                    ax,
+                    width=layers.get(layer, {}).get("width"),
+                    clip_patch=clip_patch,
+                    **layer_style,
+                )
+                return
+        if "extrude" in layer_style:
+            plot_extruded_buildings(
+                gdf,
+                ax,
+                layer_style["extrude"],
+                span=span,
+                clip_patch=clip_patch,
+                zorder=layer_style.get("zorder", 5),
+            )
+        else:
+            plot_gdf(
+                layer,
+                gdf,
+                ax,
+                width=layers.get(layer, {}).get("width"),
+                clip_patch=clip_patch,
+                **layer_style,
+            )
+
+def _resolve_style(style: Optional[Union[str, Dict]]) -> Dict[str, dict]:
+    """Style dict from a name, a dict or None (minimal)."""
+    if style is None:
+        return get_style('minimal')
+    if isinstance(style, str):
+        return get_style(style)
+    return style
+
+def _resolve_layers(layers: Optional[Dict], style: Dict[str, dict]) -> Dict[str, dict]:
+    """Layer configuration to fetch, including columns the style asks for."""
+    # Default layers if none provided
+    layers = dict(layers or deepcopy(DEFAULT_LAYERS))
+
+    # Styles may ask for extra attribute columns (kept through fetch/cache)
+    for layer, layer_style in style.items():
+        if layer in layers and layer_style.get('columns'):
+            extra = [c for c in layer_style['columns'] if c not in layers[layer].get('columns', [])]
+            if extra:
+                layers[layer] = {**layers[layer], 'columns': layers[layer].get('columns', []) + extra}
+        # Extrusion needs the individual footprints and their height tags
+        if layer in layers and 'extrude' in layer_style and 'dissolve' not in layers[layer]:
+            layers[layer] = {**layers[layer], 'dissolve': False}
+    return layers
+
 def plot(
     query: Union[str, Tuple[float, float], gp.GeoDataFrame],
     layers: Optional[Dict] = None,
@@ -308,60 +596,89 @@ def plot(
     auto_optimize: bool = True,
     fig: Optional[matplotlib.figure.Figure] = None,
     ax: Optional[matplotlib.axes.Axes] = None,
+    profile: Union[bool, Profiler] = False,
+    streaming: bool = False,
+    gdfs: Optional[Dict[str, gp.GeoDataFrame]] = None,
     **kwargs
 ) -> Plot:
-    """Draw a map from OpenStreetMap data."""
-    # Default minimalist style if no style provided
-    if style is None:
-        style = get_style('minimal')
-    elif isinstance(style, str):
-        style = get_style(style)
-    
-    # Default layers if none provided
-    layers = layers or {
-        'perimeter': {},
-        'water': {},
-        'waterway': {},
-        'green': {
-            'tags': {
-                'leisure': ['park', 'garden', 'pitch', 'playground'],
-                'landuse': [
-                    'grass', 'forest', 'meadow', 'recreation_ground',
-                    'village_green', 'cemetery', 'orchard', 'vineyard'
-                ],
-                'natural': ['wood', 'scrub', 'heath', 'grassland'],
-            }
-        },
-        'streets': {
-            'width': {
-                'motorway': 4.5,
-                'trunk': 4,
-                'primary': 3.2,
-                'secondary': 2.4,
-                'tertiary': 1.8,
-                'residential': 1.4
-            }
-        },
-        'bridges': {},
-        'building': {'tags': {'building': True}}
-    }
-    
-    # Initialize matplotlib figure and axis
+    """Draw a map from OpenStreetMap data.
+
+    Pass ``profile=True`` (or a :class:`~umap.utils.profiling.Profiler`) to
+    record per-stage timings, available as ``Plot.profile``.
+
+    With ``use_cache=True`` the filtered layers are also stored as a
+    render artifact (flattened, memory-mapped arrays, see
+    :mod:`umap.core.artifacts`), so repeat renders of the same place,
+    radius and detail level draw straight from the arrays whatever the
+    style. ``Plot.geodataframes`` is then rebuilt lazily on access.
+
+    With ``streaming=True`` layers are fetched, filtered and drawn one at a
+    time in z-order and released after drawing, so peak memory is bounded
+    by the largest layer instead of the sum of all layers. The returned
+    ``Plot.geodataframes`` then only holds the perimeter.
+
+    ``gdfs`` draws pre-fetched layers (as returned by ``get_gdfs`` for the
+    same ``layers``, ``radius`` and ``auto_optimize``) instead of fetching.
+    """
+    if profile is True:
+        profile = Profiler()
+    profiler = profile or NULL_PROFILER
+    style = _resolve_style(style)
+    layers = _resolve_layers(layers, style)
+    # Fetching optimizes its own copy of ``layers`` (keeping cache keys
+    # stable); layers are drawn with the same detail-level street widths
+    # whichever path they come from
+    draw_layers = optimize_layer_config(layers, radius) if auto_optimize and radius else layers
+
     # Fetch geodataframes
-    gdfs = get_gdfs(query, layers, radius, dilate, use_cache=use_cache, auto_optimize=auto_optimize)
+    artifact = None
+    if gdfs is None and use_cache and mode == "matplotlib":
+        artifact_dir = artifact_path(query, layers, radius, dilate, auto_optimize)
+        with profiler.stage("artifact_read"):
+            artifact = load_artifact(artifact_dir)
+    if gdfs is not None or artifact is not None:
+        if gdfs is not None:
+            layer_stream = ((layer, gdf) for layer, gdf in gdfs.items() if layer != "perimeter")
+        else:
+            gdfs = artifact
+            layer_stream = ((layer, artifact.arrays(layer)) for layer in artifact if layer != "perimeter")
+    elif streaming and mode == "matplotlib":
+        failures = {}
+        stream = iter_gdfs(
+            query, layers, radius, dilate, order=_draw_order(layers, style),
+            use_cache=use_cache, auto_optimize=auto_optimize,
+            profiler=profiler, failures=failures,
+        )
+        _, perimeter_gdf = next(stream)
+        gdfs = FetchResult(
+            {"perimeter": perimeter_gdf},
+            failures=failures,
+            perimeter_context=PerimeterContext(perimeter_gdf),
+        )
+        layer_stream = stream
+    else:
+        gdfs = get_gdfs(
+            query, layers, radius, dilate,
+            use_cache=use_cache, auto_optimize=auto_optimize, profiler=profiler,
+        )
+        layer_stream = ((layer, gdf) for layer, gdf in gdfs.items() if layer != "perimeter")
+        if use_cache and mode == "matplotlib" and getattr(gdfs, "complete", True):
+            with profiler.stage("artifact_write"):
+                save_artifact(artifact_dir, gdfs)
 
     if mode == "matplotlib":
         if ax is None:
-            fig = fig or plt.figure(figsize=figsize, dpi=300)
+            fig = fig or new_figure(figsize=figsize, dpi=300)
             ax = fig.add_subplot(111, aspect="equal")
         else:
             fig = fig or ax.figure
     else:
         # For plotter mode, we don't need matplotlib objects
-        return Plot(gdfs, None, None, None)
+        return Plot(gdfs, None, None, None, profile or None)
     
     # Create background
-    background, xmin, ymin, xmax, ymax, dx, dy = create_background(gdfs, style)
+    perimeter = _perimeter_context(gdfs)
+    background, xmin, ymin, xmax, ymax, dx, dy = create_background(gdfs, style, perimeter)
     
     # Draw layers with proper sea/land ordering
     if mode == "matplotlib":
@@ -381,69 +698,131 @@ def plot(
 
         # --- Step 2: Draw land (perimeter filled with land color) ---
         land_style = style.get("land", {})
-        perimeter_union = shapely.ops.unary_union(gdfs["perimeter"].geometry)
-        land_clip_patch = None
+        perimeter_union = perimeter.geometry
+        clip_patch = None
         if not perimeter_union.is_empty:
             if land_style:
-                land_fc = land_style.get("fc", "#ffffff")
-                land_zorder = land_style.get("zorder", -1)
-                land_clip_patch = PolygonPatch(
-                    perimeter_union,
-                    fc=land_fc,
-                    ec="none",
-                    zorder=land_zorder,
-                )
-                ax.add_patch(land_clip_patch)
-            else:
-                # Create invisible clip patch even without land style
-                land_clip_patch = PolygonPatch(
-                    perimeter_union, fc="none", ec="none", zorder=-1,
+                ax.add_patch(
+                    PolygonPatch(
+                        perimeter_union,
+                        fc=land_style.get("fc", "#ffffff"),
+                        ec="none",
+                        zorder=land_style.get("zorder", -1),
+                    )
                 )
-                ax.add_patch(land_clip_patch)
+            clip_patch = _perimeter_clip(ax, perimeter_union, max(dx, dy))
 
         # --- Step 3: Draw data layers clipped to the land perimeter ---
-        for layer, gdf in gdfs.items():
-            if layer == "perimeter":
-                continue
-            if layer == "green" and "green" not in style:
-                # Don't paint default-colored parks on styles that predate the layer
-                continue
-            if layer in layers or layer in style:
-                layer_style = style.get(layer, {})
-                if "extrude" in layer_style:
-                    plot_extruded_buildings(
-                        gdf,
-                        ax,
-                        layer_style["extrude"],
-                        span=max(dx, dy),
-                        clip_patch=land_clip_patch,
-                        zorder=layer_style.get("zorder", 5),
-                    )
-                    continue
-                plot_gdf(
-                    layer,
-                    gdf,
-                    ax,
-                    width=layers.get(layer, {}).get("width"),
-                    clip_patch=land_clip_patch,
-                    **layer_style,
-                )
+        for layer, gdf in layer_stream:
+            _draw_layer(
+                ax, layer, gdf, draw_layers, style,
+                span=max(dx, dy), clip_patch=clip_patch, profiler=profiler,
+            )
+            # In streaming mode this drops the last reference to the layer
+            del gdf
         
         # --- Step 4: Set tight bounds and finalize ---
         ax.set_xlim(xmin, xmax)
         ax.set_ylim(ymin, ymax)
         ax.axis("off")
         ax.set_aspect("equal")
-        plt.subplots_adjust(left=0, bottom=0, right=1, top=1, wspace=0, hspace=0)
+        fig.subplots_adjust(left=0, bottom=0, right=1, top=1, wspace=0, hspace=0)
     
-    return Plot(gdfs, fig, ax, background)
+    return Plot(gdfs, fig, ax, background, profile or None)
+
+def plot_basemap(
+    query: Union[str, Tuple[float, float], gp.GeoDataFrame],
+    dpi: float,
+    layers: Optional[Dict] = None,
+    style: Optional[Union[str, Dict]] = None,
+    radius: Optional[float] = None,
+    dilate: Optional[float] = None,
+    figsize: Tuple[int, int] = (12, 12),
+    pad: float = 0.0,
+    footer: float = 0.0,
+    use_cache: bool = True,
+    auto_optimize: bool = True,
+    profile: Union[bool, Profiler] = False,
+    **kwargs
+) -> Plot:
+    """Draw a map for raster output, reusing a cached raster of its body.
+
+    The map body is cached per place, radius, style and ``dpi`` (see
+    :mod:`umap.core.basemap`); on a miss it is drawn with :func:`plot`
+    (extra keyword arguments go there) and rasterized once. The returned
+    ``Plot.fig`` holds the map as an image, laid out with ``pad`` and
+    ``footer`` as by :func:`~umap.utils.drawing.fit_figure`: add titles
+    and furniture to ``Plot.ax`` and save with ``savefig(dpi=dpi)``. On a
+    cache hit ``Plot.geodataframes`` is empty.
+    """
+    if profile is True:
+        profile = Profiler()
+    profiler = profile or NULL_PROFILER
+    style = _resolve_style(style)
+    path = basemap_path(
+        query, style, layers, radius, dpi,
+        dilate=dilate, figsize=figsize, auto_optimize=auto_optimize,
+    )
+    cached = None
+    if use_cache:
+        with profiler.stage("basemap_read"):
+            cached = load_basemap(path)
+    if cached is None:
+        map_plot = plot(
+            query, layers=layers, style=style, radius=radius, dilate=dilate,
+            figsize=figsize, use_cache=use_cache, auto_optimize=auto_optimize,
+            profile=profile, **kwargs
+        )
+        with profiler.stage("basemap_render"):
+            rgba, meta = render_basemap(map_plot.fig, map_plot.ax, dpi)
+        map_plot.close()
+        gdfs = map_plot.geodataframes
+        if use_cache and not map_plot.failures:
+            with profiler.stage("basemap_write"):
+                save_basemap(path, rgba, meta)
+    else:
+        rgba, meta = cached
+        gdfs = FetchResult({})
+    fig, ax = basemap_figure(rgba, meta, pad=pad, footer=footer)
+    return Plot(gdfs, fig, ax, None, profile or None)
 
 def multiplot(*subplots, figsize=(12, 12), **kwargs):
-    """Draw multiple maps on the same canvas."""
-    fig = plt.figure(figsize=figsize, dpi=300)
-    ax = plt.subplot(111, aspect="equal")
+    """Draw multiple maps on the same canvas.
+
+    All subplot areas are resolved before anything is drawn, and layers are
+    fetched together with :func:`~umap.core.fetch.get_gdfs_many`: adjacent
+    or nested subplots with the same layer settings share one download per
+    layer, clipped and filtered per subplot in parallel.
+
+    Drawing stays sequential: every subplot adds its collections to the
+    same axes, which is not thread-safe, and collections of equal z-order
+    are painted in the order they were added.
+    """
+    fig = new_figure(figsize=figsize, dpi=300)
+    ax = fig.add_subplot(111, aspect="equal")
     
     mode = "plotter" if kwargs.get("plotter") else "matplotlib"
+
+    options = []
+    for subplot in subplots:
+        subplot_kwargs = {**subplot.kwargs, **kwargs}
+        subplot_kwargs["style"] = _resolve_style(subplot_kwargs.get("style"))
+        subplot_kwargs["layers"] = _resolve_layers(subplot_kwargs.get("layers"), subplot_kwargs["style"])
+        options.append(subplot_kwargs)
+
+    results = get_gdfs_many(
+        [
+            {
+                "query": subplot.query,
+                "layers_dict": subplot_kwargs["layers"],
+                "radius": subplot_kwargs.get("radius"),
+                "dilate": subplot_kwargs.get("dilate"),
+                "auto_optimize": subplot_kwargs.get("auto_optimize", True),
+            }
+            for subplot, subplot_kwargs in zip(subplots, options)
+        ],
+        use_cache=kwargs.get("use_cache", True),
+    )
     
     plots = [
         plot(
@@ -451,9 +830,10 @@ def multiplot(*subplots, figsize=(12, 12), **kwargs):
             fig=fig,
             ax=ax,
             mode=mode,
-            **{**subplot.kwargs, **kwargs}
+            gdfs=gdfs,
+            **subplot_kwargs
         )
-        for subplot in subplots
+        for subplot, subplot_kwargs, gdfs in zip(subplots, options, results)
     ]
     
     if mode == "matplotlib":
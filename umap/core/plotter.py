@@ -0,0 +1,405 @@
+"""Pen-plotter export.
+
+Turns fetched layers into a :class:`PlotterDrawing`: per-pen lists of
+polylines that are de-duplicated (OSM streets are often stored once per
+direction, and neighbouring buildings share walls), merged into long
+strokes and ordered to minimize pen-up travel with a greedy nearest
+neighbour tour refined by 2-opt. Drawings are written directly as SVG
+(one Inkscape layer per pen) or HPGL.
+
+Style keys read per layer (the same ones the vsketch mode used):
+``draw`` (False skips the layer) and ``stroke`` (pen number).
+"""
+import logging
+import math
+import os
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Dict, IO, List, Optional, Sequence, Tuple
+
+import numpy as np
+import shapely
+
+if TYPE_CHECKING:
+    import geopandas as gp
+
+logger = logging.getLogger(__name__)
+
+# Paper sizes in millimetres (portrait)
+PAPER_SIZES: Dict[str, Tuple[float, float]] = {
+    'a4': (210.0, 297.0),
+    'a3': (297.0, 420.0),
+    'a2': (420.0, 594.0),
+    'letter': (215.9, 279.4),
+}
+
+# HPGL plotter units per millimetre
+HPGL_UNITS_PER_MM = 40
+
+
+def layer_paths(gdf) -> List[np.ndarray]:
+    """Polylines of a layer: line parts and polygon rings as (N, 2) arrays."""
+    if gdf is None or gdf.empty:
+        return []
+    parts = shapely.get_parts(np.asarray(gdf.geometry.values, dtype=object))
+    types = shapely.get_type_id(parts)
+    lines = parts[types == 1]
+    rings = shapely.get_rings(parts[types == 3])
+    geoms = np.concatenate([lines, rings])
+    if len(geoms) == 0:
+        return []
+    coords, index = shapely.get_coordinates(geoms, return_index=True)
+    splits = np.flatnonzero(np.diff(index)) + 1
+    return [path for path in np.split(coords, splits) if len(path) > 1]
+
+
+def dedupe_segments(paths: Sequence[np.ndarray], tolerance: float) -> List[np.ndarray]:
+    """Drop repeated segments and re-chain what is left into long polylines.
+
+    Vertices are snapped to a ``tolerance`` grid, so segments drawn twice
+    (in either direction) or overlapping within the tolerance are kept
+    once. Chaining uses GEOS line merging, which joins segments at every
+    vertex shared by exactly two of them.
+    """
+    if not paths:
+        return []
+    starts = np.concatenate([path[:-1] for path in paths])
+    ends = np.concatenate([path[1:] for path in paths])
+    a = np.round(starts / tolerance).astype(np.int64)
+    b = np.round(ends / tolerance).astype(np.int64)
+    # Direction-independent key: lexicographically smaller endpoint first
+    swap = (a[:, 0] > b[:, 0]) | ((a[:, 0] == b[:, 0]) & (a[:, 1] > b[:, 1]))
+    keys = np.where(swap[:, None], np.hstack([b, a]), np.hstack([a, b]))
+    keep = np.any(keys[:, :2] != keys[:, 2:], axis=1)
+    _, first = np.unique(keys[keep], axis=0, return_index=True)
+    index = np.flatnonzero(keep)[np.sort(first)]
+    # Snap kept endpoints so shared vertices match exactly when merging
+    segments = np.stack([a[index], b[index]], axis=1) * tolerance
+    return _merge(shapely.linestrings(segments))
+
+
+def merge_paths(paths: Sequence[np.ndarray]) -> List[np.ndarray]:
+    """Join polylines that meet end to end into longer ones."""
+    if not paths:
+        return []
+    lengths = [len(path) for path in paths]
+    indices = np.repeat(np.arange(len(paths)), lengths)
+    return _merge(shapely.linestrings(np.concatenate(paths), indices=indices))
+
+
+def _merge(lines: np.ndarray) -> List[np.ndarray]:
+    merged = shapely.line_merge(shapely.multilinestrings(lines))
+    parts = shapely.get_parts(merged)
+    coords, index = shapely.get_coordinates(parts, return_index=True)
+    return np.split(coords, np.flatnonzero(np.diff(index)) + 1)
+
+
+def travel_length(paths: Sequence[np.ndarray], home: Tuple[float, float] = (0.0, 0.0)) -> float:
+    """Total pen-up distance to draw ``paths`` in order, starting at ``home``."""
+    if not paths:
+        return 0.0
+    starts = np.array([path[0] for path in paths])
+    ends = np.array([home] + [path[-1] for path in paths[:-1]])
+    return float(np.hypot(*(starts - ends).T).sum())
+
+
+class _EndpointGrid:
+    """Uniform grid over path endpoints for nearest-unvisited queries."""
+
+    def __init__(self, points: np.ndarray, cells: int):
+        self.points = points
+        self.xs, self.ys = points[:, 0].tolist(), points[:, 1].tolist()
+        self.origin = points.min(axis=0).tolist()
+        extent = np.maximum(points.max(axis=0) - points.min(axis=0), 1e-12)
+        self.size = float(max(extent) / max(cells, 1))
+        self.buckets: Dict[Tuple[int, int], List[int]] = {}
+        for i, (x, y) in enumerate(zip(self.xs, self.ys)):
+            self.buckets.setdefault(self._cell(x, y), []).append(i)
+
+    def _cell(self, x: float, y: float) -> Tuple[int, int]:
+        return int((x - self.origin[0]) // self.size), int((y - self.origin[1]) // self.size)
+
+    @staticmethod
+    def _ring(cx: int, cy: int, ring: int) -> List[Tuple[int, int]]:
+        if ring == 0:
+            return [(cx, cy)]
+        cells = [(cx + d, cy + e) for d in range(-ring, ring + 1) for e in (-ring, ring)]
+        cells += [(cx + e, cy + d) for d in range(-ring + 1, ring) for e in (-ring, ring)]
+        return cells
+
+    def nearest(self, x: float, y: float, alive: List[bool], max_rings: int = 4) -> int:
+        """Index of the nearest point with ``alive[index // 2]`` set."""
+        cx, cy = self._cell(x, y)
+        xs, ys = self.xs, self.ys
+        best, best_dist = -1, math.inf
+        for ring in range(max_rings + 1):
+            for cell in self._ring(cx, cy, ring):
+                bucket = self.buckets.get(cell)
+                if not bucket:
+                    continue
+                # Drop finished paths so later scans stay short
+                bucket[:] = [i for i in bucket if alive[i >> 1]]
+                for i in bucket:
+                    d = (xs[i] - x) ** 2 + (ys[i] - y) ** 2
+                    if d < best_dist:
+                        best, best_dist = i, d
+            # Anything in a farther ring is at least ``ring * size`` away
+            if best >= 0 and math.sqrt(best_dist) <= ring * self.size:
+                return best
+        if best >= 0:
+            return best
+        # Sparse leftovers: fall back to a vectorized scan of what remains
+        candidates = np.flatnonzero(np.repeat(np.array(alive, dtype=bool), 2))
+        d = ((self.points[candidates] - (x, y)) ** 2).sum(axis=1)
+        return int(candidates[np.argmin(d)])
+
+
+def _greedy_order(paths: List[np.ndarray], home: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Nearest-neighbour tour; returns path order and per-path reversal flags."""
+    n = len(paths)
+    endpoints = np.empty((2 * n, 2))
+    endpoints[0::2] = [path[0] for path in paths]
+    endpoints[1::2] = [path[-1] for path in paths]
+    grid = _EndpointGrid(endpoints, int(math.sqrt(n)) + 1)
+    alive = [True] * n
+    order, reverse = [], []
+    x, y = float(home[0]), float(home[1])
+    for _ in range(n):
+        i = grid.nearest(x, y, alive)
+        path = i >> 1
+        order.append(path)
+        reverse.append(i & 1)
+        alive[path] = False
+        # Leave from the other end of the path
+        x, y = grid.xs[i ^ 1], grid.ys[i ^ 1]
+    return np.array(order, dtype=np.int64), np.array(reverse, dtype=bool)
+
+
+def _two_opt(starts: np.ndarray, ends: np.ndarray, home: np.ndarray,
+             window: int = 64, passes: int = 8, chunk: int = 8192) -> Tuple[np.ndarray, np.ndarray]:
+    """Windowed 2-opt over an open tour of oriented paths.
+
+    Reversing the run ``i..j`` also flips every path in it. Each pass
+    scores every run of up to ``window`` paths at once, then applies the
+    best non-overlapping improving reversals. ``starts`` and ``ends`` hold
+    the oriented endpoints in drawing order; returns the permutation and
+    flip flags to apply to the input order.
+    """
+    n = len(starts)
+    permutation = np.arange(n)
+    flipped = np.zeros(n, dtype=bool)
+    # Complex coordinates: one gather and one abs() per distance
+    starts = starts[:, 0] + 1j * starts[:, 1]
+    ends = ends[:, 0] + 1j * ends[:, 1]
+    home = complex(home[0], home[1])
+    offsets = np.arange(window)
+    for _ in range(passes):
+        previous = np.concatenate([[home], ends[:-1]])
+        travel = np.abs(starts - previous).sum()
+        moves = []
+        for lo in range(0, n, chunk):
+            i = np.arange(lo, min(lo + chunk, n))
+            j = i[:, None] + offsets[None, :]
+            valid = j < n
+            j = np.minimum(j, n - 1)
+            # Link to the path after the run, absent at the end of the tour
+            has_next = valid & (j + 1 < n)
+            following = starts[np.minimum(j + 1, n - 1)]
+            run_ends = ends[j]
+            gain = (
+                np.abs(starts[i] - previous[i])[:, None]
+                - np.abs(run_ends - previous[i][:, None])
+                + np.where(has_next, np.abs(following - run_ends) - np.abs(following - starts[i][:, None]), 0.0)
+            )
+            gain[~valid] = -np.inf
+            best = np.argmax(gain, axis=1)
+            best_gain = gain[np.arange(len(i)), best]
+            improving = best_gain > 1e-12
+            moves.append((best_gain[improving], i[improving], i[improving] + best[improving]))
+        gains, firsts, lasts = (np.concatenate(parts) for parts in zip(*moves))
+        # Stop once a pass can no longer shorten travel noticeably (or at
+        # all: travel may already be zero)
+        if not len(gains) or gains.sum() <= 1e-3 * travel:
+            break
+        # Apply the largest gains first; a move is only valid if the links
+        # around its run were not changed by another move in this pass
+        touched = bytearray(n + 1)
+        selected_first, selected_last = [], []
+        ranked = np.argsort(-gains)
+        for first, last in zip(firsts[ranked].tolist(), lasts[ranked].tolist()):
+            lo, hi = max(first - 1, 0), last + 2
+            if any(touched[lo:hi]):
+                continue
+            touched[lo:hi] = b"\x01" * (hi - lo)
+            selected_first.append(first)
+            selected_last.append(last)
+        # Reverse all selected runs at once: position p in run i..j takes
+        # the path from i + j - p, flipped
+        first = np.array(selected_first, dtype=np.int64)
+        last = np.array(selected_last, dtype=np.int64)
+        lengths = last - first + 1
+        run_start = np.repeat(np.cumsum(lengths) - lengths, lengths)
+        position = np.repeat(first, lengths) + np.arange(lengths.sum()) - run_start
+        source = np.arange(n)
+        source[position] = np.repeat(first + last, lengths) - position
+        flip = np.zeros(n, dtype=bool)
+        flip[position] = True
+        starts, ends = (
+            np.where(flip, ends[source], starts[source]),
+            np.where(flip, starts[source], ends[source]),
+        )
+        permutation = permutation[source]
+        flipped = flipped[source] ^ flip
+    return permutation, flipped
+
+
+def order_paths(paths: Sequence[np.ndarray], home: Tuple[float, float] = (0.0, 0.0),
+                two_opt: bool = True, window: int = 64, passes: int = 8) -> List[np.ndarray]:
+    """Order (and orient) paths to minimize pen-up travel from ``home``."""
+    paths = list(paths)
+    if len(paths) < 2:
+        return paths
+    home = np.asarray(home, dtype=float)
+    order, reverse = _greedy_order(paths, home)
+    oriented = [paths[i][::-1] if r else paths[i] for i, r in zip(order.tolist(), reverse.tolist())]
+    if not two_opt:
+        return oriented
+    starts = np.array([path[0] for path in oriented])
+    ends = np.array([path[-1] for path in oriented])
+    permutation, flipped = _two_opt(starts, ends, home, window, passes)
+    return [
+        oriented[i][::-1] if f else oriented[i]
+        for i, f in zip(permutation.tolist(), flipped.tolist())
+    ]
+
+
+@dataclass
+class PlotterDrawing:
+    """Ordered polylines per pen, in map coordinates."""
+    layers: Dict[str, List[np.ndarray]]
+    pens: Dict[str, int]
+    bounds: Tuple[float, float, float, float]
+    stats: Dict[str, float] = field(default_factory=dict)
+
+    def _page_transform(self, size: Tuple[float, float], margin: float, flip_y: bool):
+        xmin, ymin, xmax, ymax = self.bounds
+        width, height = size
+        scale = min((width - 2 * margin) / max(xmax - xmin, 1e-12),
+                    (height - 2 * margin) / max(ymax - ymin, 1e-12))
+        # Center the map on the page
+        x0 = (width - (xmax - xmin) * scale) / 2
+        y0 = (height - (ymax - ymin) * scale) / 2
+
+        def transform(coords: np.ndarray) -> np.ndarray:
+            x = x0 + (coords[:, 0] - xmin) * scale
+            y = (ymax - coords[:, 1]) if flip_y else (coords[:, 1] - ymin)
+            return np.column_stack([x, y0 + y * scale])
+        return transform
+
+    def to_svg(self, fp: IO[str], size: Tuple[float, float] = PAPER_SIZES['a3'],
+               margin: float = 15.0, stroke_width: float = 0.3) -> None:
+        """Write an SVG in millimetres, one Inkscape layer per pen."""
+        width, height = size
+        transform = self._page_transform(size, margin, flip_y=True)
+        fp.write(
+            '<?xml version="1.0" encoding="UTF-8"?>\n'
+            f'<svg xmlns="http://www.w3.org/2000/svg" '
+            f'xmlns:inkscape="http://www.inkscape.org/namespaces/inkscape" '
+            f'width="{width}mm" height="{height}mm" viewBox="0 0 {width} {height}">\n'
+        )
+        for pen, names in self._by_pen():
+            label = f"{pen} - {' '.join(names)}"
+            fp.write(
+                f'<g inkscape:groupmode="layer" inkscape:label="{label}" fill="none" '
+                f'stroke="black" stroke-width="{stroke_width}" stroke-linecap="round" '
+                f'stroke-linejoin="round">\n'
+            )
+            for name in names:
+                for path in self.layers[name]:
+                    points = transform(path)
+                    d = " L".join(f"{x:.3f} {y:.3f}" for x, y in points.tolist())
+                    fp.write(f'<path d="M{d}"/>\n')
+            fp.write('</g>\n')
+        fp.write('</svg>\n')
+
+    def to_hpgl(self, fp: IO[str], size: Tuple[float, float] = PAPER_SIZES['a3'],
+                margin: float = 15.0) -> None:
+        """Write HPGL with one pen select per pen and absolute plotter units."""
+        transform = self._page_transform(size, margin, flip_y=False)
+        fp.write("IN;\n")
+        for pen, names in self._by_pen():
+            fp.write(f"SP{pen};\n")
+            for name in names:
+                for path in self.layers[name]:
+                    units = np.rint(transform(path) * HPGL_UNITS_PER_MM).astype(np.int64)
+                    x, y = units[0].tolist()
+                    rest = ",".join(f"{x},{y}" for x, y in units[1:].tolist())
+                    fp.write(f"PU{x},{y};PD{rest};\n")
+        fp.write("PU;SP0;\n")
+
+    def save(self, path: str, **kwargs) -> None:
+        """Write to ``path``; ``.hpgl``/``.plt`` give HPGL, anything else SVG."""
+        writer = self.to_hpgl if os.path.splitext(path)[1].lower() in ('.hpgl', '.plt') else self.to_svg
+        with open(path, 'w', encoding='ascii') as f:
+            writer(f, **kwargs)
+
+    def _by_pen(self) -> List[Tuple[int, List[str]]]:
+        pens: Dict[int, List[str]] = {}
+        for name in self.layers:
+            pens.setdefault(self.pens.get(name, 1), []).append(name)
+        return sorted(pens.items())
+
+
+def plotter_drawing(
+    gdfs: Dict[str, 'gp.GeoDataFrame'],
+    style: Optional[Dict[str, dict]] = None,
+    dedupe: bool = True,
+    optimize: bool = True,
+    tolerance: Optional[float] = None,
+) -> PlotterDrawing:
+    """Build a pen-plotter drawing from fetched layers.
+
+    Args:
+        gdfs: Layers as returned by ``get_gdfs`` (the perimeter outline is
+              drawn too).
+        style: Optional style; ``draw: False`` skips a layer and ``stroke``
+               picks its pen (default 1).
+        dedupe: Remove repeated segments and merge strokes.
+        optimize: Order paths for minimal pen-up travel.
+        tolerance: Snapping distance for de-duplication in map units.
+                   Defaults to a millionth of the map extent.
+    """
+    style = style or {}
+    xmin, ymin, xmax, ymax = gdfs['perimeter'].total_bounds
+    span = max(xmax - xmin, ymax - ymin)
+    tolerance = tolerance or span * 1e-6
+    home = (xmin, ymin)
+
+    layers: Dict[str, List[np.ndarray]] = {}
+    pens: Dict[str, int] = {}
+    stats = {'paths_in': 0, 'paths_out': 0, 'travel_before': 0.0, 'travel_after': 0.0}
+    for name, gdf in gdfs.items():
+        layer_style = style.get(name, {})
+        if not layer_style.get('draw', True):
+            continue
+        paths = layer_paths(gdf)
+        if not paths:
+            continue
+        stats['paths_in'] += len(paths)
+        stats['travel_before'] += travel_length(paths, home)
+        if dedupe:
+            paths = dedupe_segments(paths, tolerance)
+        if optimize:
+            paths = order_paths(paths, home)
+        stats['paths_out'] += len(paths)
+        stats['travel_after'] += travel_length(paths, home)
+        if optimize:
+            # Start the next layer's tour where this one ends
+            home = tuple(paths[-1][-1])
+        layers[name] = paths
+        pens[name] = int(layer_style.get('stroke', 1))
+
+    logger.info(
+        "Plotter drawing: %d -> %d paths, pen-up travel %.4g -> %.4g",
+        stats['paths_in'], stats['paths_out'], stats['travel_before'], stats['travel_after'],
+    )
+    return PlotterDrawing(layers, pens, (xmin, ymin, xmax, ymax), stats)
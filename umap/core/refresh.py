@@ -0,0 +1,107 @@
+"""Cheap revalidation of cached layers against Overpass.
+
+A cached layer records the Overpass data timestamp and the number of OSM
+elements its query matched when it was fetched. When the cache entry goes
+stale, :func:`layer_state` asks Overpass, with a count-only query, how many
+elements match now and how many of them (or of their nodes) changed since
+that timestamp. Layers with no changes and the same count are kept as they
+are; only the others need to be downloaded again.
+"""
+import logging
+from datetime import datetime, timezone
+from typing import Dict, Optional, Tuple
+
+from .transport import get_transport
+
+logger = logging.getLogger(__name__)
+
+_QUERY = """[out:json][timeout:{timeout}];
+({selectors})->.all;
+.all out count;
+(.all; >;)->.full;
+nwr.full(newer:"{since}");
+out count;
+"""
+
+
+def utc_now() -> str:
+    """Current time as an Overpass date string."""
+    return datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def _bbox_filter(bbox) -> str:
+    west, south, east, north = bbox.bounds
+    return f"({south:.7f},{west:.7f},{north:.7f},{east:.7f})"
+
+
+def tag_selectors(tags: Dict) -> Tuple[str, ...]:
+    """Overpass QL filters matching the features osmnx fetches for ``tags``.
+
+    Like ``features_from_polygon``, a feature matches if any key matches:
+    ``True`` means any value, a string one value and a list any of them.
+    """
+    selectors = []
+    for key, value in tags.items():
+        key = key.replace('"', '\\"')
+        if value is True:
+            selectors.append(f'["{key}"]')
+        elif isinstance(value, str):
+            selectors.append(f'["{key}"="{value}"]')
+        elif isinstance(value, (list, tuple)):
+            pattern = "|".join(str(v).replace('"', '\\"') for v in value)
+            selectors.append(f'["{key}"~"^({pattern})$"]')
+    return tuple(selectors)
+
+
+def layer_state(selectors: Tuple[str, ...], bbox, since: Optional[str] = None,
+                element: str = "nwr", timeout: int = 60) -> Dict:
+    """Count the elements a layer query matches in ``bbox``.
+
+    Args:
+        selectors: Tag filters, as returned by :func:`tag_selectors`.
+        bbox: Shapely geometry whose bounds limit the query.
+        since: Also count elements (or their nodes) changed after this date.
+        element: Overpass element type to query (``way`` for street graphs).
+
+    Returns:
+        ``{"timestamp", "count", "changed"}``, with the timestamp of the
+        Overpass database state that was queried.
+
+    Raises:
+        FetchError: If the query failed on every endpoint.
+    """
+    area = _bbox_filter(bbox)
+    query = _QUERY.format(
+        timeout=timeout,
+        selectors="".join(f"{element}{selector}{area};" for selector in selectors),
+        since=since or utc_now(),
+    )
+    result = get_transport().overpass(query, description="Checking layer for changes")
+    counts = [
+        int(item.get("tags", {}).get("total", 0))
+        for item in result.get("elements", []) if item.get("type") == "count"
+    ]
+    timestamp = result.get("osm3s", {}).get("timestamp_osm_base") or utc_now()
+    return {
+        "timestamp": timestamp,
+        "count": counts[0] if counts else 0,
+        "changed": counts[1] if len(counts) > 1 else 0,
+    }
+
+
+def baseline(selectors: Tuple[str, ...], bbox, started: str, element: str = "nwr") -> Dict:
+    """Record the state of a freshly downloaded layer.
+
+    The timestamp is the earlier of the Overpass database state and
+    ``started`` (when the download began), so edits made while it ran are
+    picked up by the next check.
+    """
+    state = layer_state(selectors, bbox, element=element)
+    return {"timestamp": min(state["timestamp"], started), "count": state["count"]}
+
+
+def is_unchanged(selectors: Tuple[str, ...], bbox, recorded: Dict, element: str = "nwr") -> Tuple[bool, Dict]:
+    """Check a cached layer; returns ``(unchanged, new recorded state)``."""
+    state = layer_state(selectors, bbox, since=recorded["timestamp"], element=element)
+    unchanged = state["changed"] == 0 and state["count"] == recorded["count"]
+    return unchanged, {"timestamp": state["timestamp"], "count": state["count"]}
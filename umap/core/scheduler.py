@@ -0,0 +1,145 @@
+"""Process-wide scheduling of OpenStreetMap downloads.
+
+All layer fetches in a process go through one :class:`FetchScheduler`, so
+concurrent ``plot`` calls (from threads or from asyncio tasks) share a
+single concurrency and request-rate budget against the Overpass endpoint,
+and identical in-flight requests (same layer, perimeter and tags) are
+downloaded once and handed to every caller.
+
+The rate limit is charged per HTTP request by the transport
+(:mod:`umap.core.transport`), not per job: osmnx splits large areas into
+many Overpass sub-queries.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class RateLimiter:
+    """Thread-safe token bucket: ``rate`` requests per second, ``burst`` at once."""
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = float(rate)
+        self.burst = max(int(burst), 1)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Take one token and return how many seconds to wait before using it."""
+        if self.rate <= 0:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+    def acquire(self) -> None:
+        """Block until a token is available."""
+        wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+
+class FetchScheduler:
+    """Runs download jobs with request coalescing and a shared budget.
+
+    Args:
+        max_concurrency: Maximum number of downloads running at once.
+        rate: Maximum HTTP requests per second across all downloads
+              (0 disables the limit).
+        burst: Requests that may be sent back-to-back before ``rate`` applies.
+    """
+
+    def __init__(self, max_concurrency: int = 6, rate: float = 2.0, burst: Optional[int] = None):
+        self.max_concurrency = max(int(max_concurrency), 1)
+        self.limiter = RateLimiter(rate, burst if burst is not None else self.max_concurrency)
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_concurrency, thread_name_prefix="umap-fetch"
+        )
+        self._inflight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self.coalesced = 0
+
+    def submit(self, key: str, fn: Callable, *args, **kwargs) -> Future:
+        """Schedule ``fn`` unless a job with the same key is already running.
+
+        Callers that join an in-flight job receive the same result object, so
+        results must be treated as read-only.
+        """
+        with self._lock:
+            future = self._inflight.get(key)
+            if future is not None:
+                self.coalesced += 1
+                logger.debug("Joining in-flight request %s", key)
+                return future
+            future = self._executor.submit(fn, *args, **kwargs)
+            self._inflight[key] = future
+        future.add_done_callback(lambda done: self._forget(key, done))
+        return future
+
+    def _forget(self, key: str, future: Future) -> None:
+        with self._lock:
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+
+    def run(self, key: str, fn: Callable, *args, **kwargs) -> Any:
+        """Run a job through the scheduler and wait for its result."""
+        return self.submit(key, fn, *args, **kwargs).result()
+
+    async def run_async(self, key: str, fn: Callable, *args, **kwargs) -> Any:
+        """Awaitable version of :meth:`run`."""
+        return await asyncio.wrap_future(self.submit(key, fn, *args, **kwargs))
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._executor.shutdown(wait=wait)
+
+
+def request_key(kind: str, *parts: Any) -> str:
+    """Build a stable coalescing key from a job kind and its parameters."""
+    hasher = hashlib.md5(kind.encode())
+    for part in parts:
+        if hasattr(part, "geometry") and hasattr(part, "crs"):
+            # GeoDataFrame: key on its geometry and CRS, not object identity
+            hasher.update(str(part.crs).encode())
+            for geom in part.geometry:
+                hasher.update(geom.wkb)
+        else:
+            hasher.update(json.dumps(part, sort_keys=True, default=str).encode())
+    return f"{kind}:{hasher.hexdigest()}"
+
+
+# Global scheduler instance
+_scheduler_instance = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler() -> FetchScheduler:
+    """Get global scheduler instance."""
+    global _scheduler_instance
+    with _scheduler_lock:
+        if _scheduler_instance is None:
+            _scheduler_instance = FetchScheduler()
+        return _scheduler_instance
+
+
+def configure_scheduler(max_concurrency: int = 6, rate: float = 2.0, burst: Optional[int] = None) -> FetchScheduler:
+    """Replace the global scheduler with one using the given budget."""
+    global _scheduler_instance
+    with _scheduler_lock:
+        previous = _scheduler_instance
+        _scheduler_instance = FetchScheduler(max_concurrency, rate, burst)
+    if previous is not None:
+        previous.shutdown(wait=False)
+    return _scheduler_instance
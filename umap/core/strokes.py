@@ -0,0 +1,114 @@
+"""Merge line segments into long strokes before drawing.
+
+OSM ways and graph edges are split at every intersection, so a city's
+streets reach matplotlib as hundreds of thousands of short polylines: one
+path each in Agg, SVG and PDF output, each with its own round caps piled up
+at every node. :func:`merge_strokes` joins segments that meet end to end:
+always through nodes where exactly two segments meet (like
+``shapely.line_merge``), and through intersections by pairing the
+segments that continue most straight, so a street crossing a grid is
+drawn as one path.
+"""
+import math
+from typing import List, Sequence
+
+import numpy as np
+
+
+def _pair_by_angle(members: np.ndarray, directions: np.ndarray, partner: np.ndarray,
+                   min_cos: float) -> None:
+    """Pair the half-edges of nodes of one degree, straightest pairs first.
+
+    ``members`` is ``(nodes, degree)`` half-edge indices and ``directions``
+    their unit vectors pointing away from the node. Two half-edges continue
+    each other when their directions are nearly opposite.
+    """
+    m, degree = members.shape
+    vectors = directions[members]
+    # cos of the deflection between entering along one and leaving along the other
+    cos = -np.einsum("nik,njk->nij", vectors, vectors)
+    cos[:, np.arange(degree), np.arange(degree)] = -np.inf
+    cos[~(cos >= min_cos)] = -np.inf
+    rows = np.arange(m)
+    for _ in range(degree // 2):
+        best = cos.reshape(m, -1).argmax(axis=1)
+        i, j = np.divmod(best, degree)
+        ok = np.isfinite(cos[rows, i, j])
+        if not ok.any():
+            break
+        a, b = members[rows[ok], i[ok]], members[rows[ok], j[ok]]
+        partner[a], partner[b] = b, a
+        # Both half-edges are taken now
+        for used in (i[ok], j[ok]):
+            cos[rows[ok], used, :] = -np.inf
+            cos[rows[ok], :, used] = -np.inf
+
+
+def merge_strokes(lines: Sequence[np.ndarray], max_deflection: float = 30.0) -> List[np.ndarray]:
+    """Join polylines that meet end to end into longer strokes.
+
+    Args:
+        lines: ``(n, 2)`` vertex arrays.
+        max_deflection: Largest change of direction, in degrees, at which
+                        two segments are joined through an intersection.
+
+    Returns:
+        The merged polylines; every input vertex is drawn exactly once
+        (junction vertices are shared between joined segments).
+    """
+    lines = [line for line in lines if len(line)]
+    if len(lines) < 2:
+        return list(lines)
+
+    n = len(lines)
+    ends = np.empty((2 * n, 2))
+    inner = np.empty((2 * n, 2))
+    for i, line in enumerate(lines):
+        ends[2 * i], ends[2 * i + 1] = line[0], line[-1]
+        # Neighbouring vertex, giving the direction away from the node
+        inner[2 * i], inner[2 * i + 1] = line[min(1, len(line) - 1)], line[max(len(line) - 2, 0)]
+    directions = inner - ends
+    norms = np.hypot(directions[:, 0], directions[:, 1])
+    with np.errstate(invalid="ignore", divide="ignore"):
+        directions /= norms[:, None]
+    directions[norms == 0] = 0.0
+
+    # Half-edges (line ends) meeting at exactly the same point share a node
+    _, node = np.unique(ends[:, 0] + 1j * ends[:, 1], return_inverse=True)
+    order = np.argsort(node, kind="stable")
+    counts = np.bincount(node)
+    first = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    partner = np.full(2 * n, -1)
+    min_cos = math.cos(math.radians(max_deflection))
+    for degree in np.unique(counts):
+        if degree < 2:
+            continue
+        nodes = np.flatnonzero(counts == degree)
+        members = order[first[nodes][:, None] + np.arange(degree)]
+        if degree == 2:
+            partner[members[:, 0]], partner[members[:, 1]] = members[:, 1], members[:, 0]
+        else:
+            _pair_by_angle(members, directions, partner, min_cos)
+
+    # Walk the chains, starting from unpaired ends, then the remaining cycles
+    visited = np.zeros(n, dtype=bool)
+    partner = partner.tolist()
+    starts = [h for h in range(2 * n) if partner[h] < 0] + list(range(0, 2 * n, 2))
+    merged = []
+    for h in starts:
+        line = h >> 1
+        if visited[line]:
+            continue
+        parts = []
+        while not visited[line]:
+            visited[line] = True
+            forward = not (h & 1)
+            part = lines[line] if forward else lines[line][::-1]
+            parts.append(part if not parts else part[1:])
+            # Leave through the other end of this segment
+            h = partner[h ^ 1]
+            if h < 0:
+                break
+            line = h >> 1
+        merged.append(parts[0] if len(parts) == 1 else np.concatenate(parts))
+    return merged
@@ -0,0 +1,281 @@
+"""HTTP transport for Overpass downloads.
+
+osmnx issues a fresh ``requests.post`` for every query and swallows nothing
+useful on failure. :class:`OverpassTransport` routes those calls through a
+pooled, thread-local ``requests.Session``, retries transient failures with
+jittered exponential backoff and fails over across a list of Overpass
+endpoints (a local instance can be listed first). When every attempt fails
+it raises :class:`FetchError` so callers can report the layer as failed
+instead of silently treating it as empty.
+
+Endpoints come from ``configure_transport(endpoints=...)``, the
+``UMAP_OVERPASS_ENDPOINTS`` environment variable (comma separated) or the
+``overpass_endpoints`` key of the CLI config file.
+"""
+import importlib
+import logging
+import os
+import random
+import threading
+import time
+from typing import Callable, List, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+import osmnx as ox
+
+from .scheduler import get_scheduler
+
+try:
+    from osmnx._errors import InsufficientResponseError, ResponseStatusCodeError
+except ImportError:  # pragma: no cover - very old osmnx
+    class InsufficientResponseError(ValueError):
+        pass
+
+    class ResponseStatusCodeError(ValueError):
+        pass
+
+logger = logging.getLogger(__name__)
+
+
+class OverpassRemarkError(RuntimeError):
+    """An Overpass response reporting a runtime error (timeout, out of memory).
+
+    Overpass answers such queries with status 200 and whatever elements it
+    had collected, so the response must not be taken for the full result.
+    """
+
+DEFAULT_ENDPOINTS = [
+    "https://overpass-api.de/api",
+    "https://overpass.private.coffee/api",
+    "https://maps.mail.ru/osm/tools/overpass/api",
+]
+
+# Failures worth retrying, possibly on another endpoint
+TRANSIENT_ERRORS = (
+    requests.exceptions.RequestException,
+    ResponseStatusCodeError,
+    OverpassRemarkError,
+    ConnectionError,
+    TimeoutError,
+)
+
+# Start of osmnx's InsufficientResponseError messages for a query that
+# matched nothing; it raises the same error for undecodable responses
+EMPTY_RESULT_MESSAGES = ("No matching features", "No data elements")
+
+
+def is_empty_result(error: Exception) -> bool:
+    """Whether an osmnx error means the area genuinely has no matching features."""
+    return isinstance(error, InsufficientResponseError) and str(error).startswith(EMPTY_RESULT_MESSAGES)
+
+
+def check_remark(response: requests.Response) -> None:
+    """Raise :class:`OverpassRemarkError` if an Overpass response reports a runtime error."""
+    # Cheap byte search first: parsing is left to the caller
+    if not response.ok or b'"remark"' not in response.content:
+        return
+    try:
+        remark = response.json().get("remark", "")
+    except (ValueError, AttributeError):
+        return
+    if "runtime error" in remark:
+        raise OverpassRemarkError(remark)
+
+
+class FetchError(RuntimeError):
+    """Raised when a layer could not be downloaded after all retries."""
+
+    def __init__(self, description: str, errors: List[str]):
+        self.description = description
+        self.errors = errors
+        last = errors[-1] if errors else "unknown error"
+        super().__init__(f"{description} failed after {len(errors)} attempt(s): {last}")
+
+
+class _RequestsShim:
+    """Stands in for the ``requests`` module inside osmnx.
+
+    ``get``/``post`` wait for the scheduler's rate limit and go through the
+    transport's pooled session, with the configured Overpass base URL
+    swapped for the endpoint chosen for the current attempt. Everything
+    else is delegated to ``requests``.
+    """
+
+    def __init__(self, transport: "OverpassTransport"):
+        self._transport = transport
+
+    def __getattr__(self, name):
+        return getattr(requests, name)
+
+    def get(self, url, **kwargs):
+        get_scheduler().limiter.acquire()
+        return self._transport.session.get(self._transport.rewrite_url(url), **kwargs)
+
+    def post(self, url, **kwargs):
+        get_scheduler().limiter.acquire()
+        response = self._transport.session.post(self._transport.rewrite_url(url), **kwargs)
+        check_remark(response)
+        return response
+
+
+class OverpassTransport:
+    """Pooled HTTP sessions, bounded retries and endpoint failover.
+
+    Args:
+        endpoints: Overpass API base URLs (without ``/interpreter``), in
+                   order of preference.
+        max_retries: Retries after the first attempt before giving up.
+        backoff: Base backoff in seconds; doubles per retry, fully jittered.
+        max_backoff: Upper bound for a single backoff sleep.
+        pool_size: Connections kept alive per endpoint and thread.
+    """
+
+    def __init__(
+        self,
+        endpoints: Optional[List[str]] = None,
+        max_retries: int = 3,
+        backoff: float = 1.0,
+        max_backoff: float = 30.0,
+        pool_size: int = 8,
+    ):
+        if endpoints is None:
+            env = os.environ.get("UMAP_OVERPASS_ENDPOINTS")
+            endpoints = [e.strip() for e in env.split(",") if e.strip()] if env else DEFAULT_ENDPOINTS
+        if not endpoints:
+            raise ValueError("At least one Overpass endpoint is required")
+        self.endpoints = [e.rstrip("/") for e in endpoints]
+        self.max_retries = max(int(max_retries), 0)
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.pool_size = pool_size
+        self._preferred = 0
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    @property
+    def session(self) -> requests.Session:
+        """Keep-alive session for the calling thread."""
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=len(self.endpoints), pool_maxsize=self.pool_size)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            self._local.session = session
+        return session
+
+    def rewrite_url(self, url: str) -> str:
+        """Point an osmnx Overpass URL at the endpoint of the current attempt."""
+        endpoint = getattr(self._local, "endpoint", None)
+        base = ox.settings.overpass_url.rstrip("/")
+        if endpoint and url.startswith(base):
+            return endpoint + url[len(base):]
+        return url
+
+    def _endpoint_order(self) -> List[str]:
+        with self._lock:
+            start = self._preferred
+        return self.endpoints[start:] + self.endpoints[:start]
+
+    def _mark_failed(self, endpoint: str) -> None:
+        with self._lock:
+            if self.endpoints[self._preferred] == endpoint and len(self.endpoints) > 1:
+                self._preferred = (self._preferred + 1) % len(self.endpoints)
+                logger.warning(
+                    "Overpass endpoint %s failing, switching to %s",
+                    endpoint, self.endpoints[self._preferred],
+                )
+
+    def _sleep(self, attempt: int) -> None:
+        delay = random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+        time.sleep(delay)
+
+    def call(self, fn: Callable, *args, description: str = "request", **kwargs):
+        """Run an osmnx download function with retries and failover.
+
+        ``InsufficientResponseError`` is re-raised as is when it means "no
+        matching features" (see :func:`is_empty_result`); osmnx raises it for
+        undecodable responses too, which are retried like other transient
+        errors. Other non-transient errors are not retried.
+
+        Raises:
+            FetchError: If every attempt failed.
+        """
+        errors = []
+        order = self._endpoint_order()
+        for attempt in range(self.max_retries + 1):
+            endpoint = order[attempt % len(order)]
+            self._local.endpoint = endpoint
+            try:
+                return fn(*args, **kwargs)
+            except (InsufficientResponseError, *TRANSIENT_ERRORS) as e:
+                if is_empty_result(e):
+                    raise
+                errors.append(f"{endpoint}: {e}")
+                logger.warning("%s failed on %s (attempt %d): %s", description, endpoint, attempt + 1, e)
+                self._mark_failed(endpoint)
+                if attempt < self.max_retries:
+                    self._sleep(attempt)
+            except Exception as e:
+                errors.append(f"{endpoint}: {e}")
+                break
+            finally:
+                self._local.endpoint = None
+        raise FetchError(description, errors)
+
+    def overpass(self, query: str, description: str = "Overpass query") -> dict:
+        """Run a raw Overpass QL query with retries and failover.
+
+        Returns:
+            The parsed JSON response.
+
+        Raises:
+            FetchError: If every attempt failed.
+        """
+        return self.call(self._post_query, query, description=description)
+
+    def _post_query(self, query: str) -> dict:
+        endpoint = self._local.endpoint or self.endpoints[0]
+        get_scheduler().limiter.acquire()
+        response = self.session.post(
+            f"{endpoint}/interpreter", data={"data": query}, timeout=ox.settings.requests_timeout
+        )
+        response.raise_for_status()
+        check_remark(response)
+        return response.json()
+
+    def install(self) -> None:
+        """Route osmnx's HTTP calls through this transport."""
+        shim = _RequestsShim(self)
+        for module_name in ("osmnx._overpass", "osmnx._nominatim"):
+            try:
+                module = importlib.import_module(module_name)
+            except ImportError:
+                continue
+            if hasattr(module, "requests"):
+                module.requests = shim
+
+
+# Global transport instance
+_transport_instance = None
+_transport_lock = threading.Lock()
+
+
+def get_transport() -> OverpassTransport:
+    """Get global transport instance, installing it into osmnx on first use."""
+    global _transport_instance
+    with _transport_lock:
+        if _transport_instance is None:
+            _transport_instance = OverpassTransport()
+            _transport_instance.install()
+        return _transport_instance
+
+
+def configure_transport(endpoints: Optional[List[str]] = None, **kwargs) -> OverpassTransport:
+    """Replace the global transport, e.g. to add a local Overpass endpoint."""
+    global _transport_instance
+    with _transport_lock:
+        _transport_instance = OverpassTransport(endpoints, **kwargs)
+        _transport_instance.install()
+        return _transport_instance
@@ -1,36 +1,188 @@
 """Caching system for Umap data.
 
 Cache keys now encode layer configuration using JSON with sorted keys.
-Cache entries generated with previous versions will no longer be recognized."""
+Cache entries generated with previous versions will no longer be recognized.
+
+The cache directory can be shared by several processes or hosts (e.g. on
+NFS): entries are written to a temporary file and renamed into place, so
+readers never see a partial file, and :class:`CacheLease` lets one process
+fill a missing entry while the others wait for it instead of downloading
+the same data. The directory defaults to ``~/.umap_cache`` and can be set
+with ``UMAP_CACHE_DIR``, the ``cache_dir`` config key or
+:func:`configure_cache`."""
 import os
 import pickle
 import hashlib
+import random
+import socket
+import threading
 import time
 import json
 import logging
+import shutil
 from pathlib import Path
-from typing import Dict, Optional, Any
-import geopandas as gp
+from typing import TYPE_CHECKING, Any, BinaryIO, Callable, Dict, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    import geopandas as gp
 
 logger = logging.getLogger(__name__)
 
+# Temporary files (and artifact directories) not modified for this long
+# were left behind by a writer that crashed
+TEMP_MAX_AGE_SECONDS = 3600
+
+
+def temp_path(path: Path) -> Path:
+    """Hidden sibling of ``path`` unique to this host, process and thread."""
+    path = Path(path)
+    owner = f"{socket.gethostname()}.{os.getpid()}.{threading.get_ident()}"
+    return path.with_name(f".{path.name}.{owner}.tmp")
+
+
+def _write_atomic(path: Path, write: Callable[[BinaryIO], Any]) -> None:
+    """Write a file through ``write(f)`` into a temporary file and rename it
+    over ``path``."""
+    tmp = temp_path(path)
+    try:
+        with open(tmp, 'wb') as f:
+            write(f)
+        os.replace(tmp, path)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+
+
+class CacheLease:
+    """Cross-process lease on filling one cache entry.
+
+    The lease is a lock file created with ``O_CREAT | O_EXCL``, which is
+    atomic on local filesystems and NFSv3+. While held, a background thread
+    refreshes its mtime; a lock that has not been refreshed for
+    ``lease_seconds`` belongs to a crashed holder and is broken by the next
+    waiter. Waiters poll until the lock is released and then re-read the
+    cache.
+
+    Args:
+        path: Lock file path.
+        lease_seconds: Age after which an unrefreshed lock is considered
+                       abandoned.
+        poll_seconds: Delay between attempts while waiting.
+        timeout: Give up waiting after this many seconds (None waits as
+                 long as the holder is alive). The caller then proceeds
+                 without the lease, which at worst duplicates a download.
+    """
+
+    def __init__(self, path: Path, lease_seconds: float = 120, poll_seconds: float = 0.25,
+                 timeout: Optional[float] = None):
+        self.path = Path(path)
+        self.lease_seconds = lease_seconds
+        self.poll_seconds = poll_seconds
+        self.timeout = timeout
+        self.acquired = False
+        self._token = f"{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}:{random.random()}"
+        self._stop = threading.Event()
+        self._heartbeat = None
+
+    def acquire(self, blocking: bool = True) -> bool:
+        """Take the lease; returns False if not acquired (busy or timed out)."""
+        deadline = None if self.timeout is None else time.monotonic() + self.timeout
+        while True:
+            try:
+                fd = os.open(self.path, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o644)
+            except FileExistsError:
+                if self._break_expired():
+                    continue
+                if not blocking:
+                    return False
+                if deadline is not None and time.monotonic() > deadline:
+                    logger.warning("Timed out waiting for cache lease %s", self.path.name)
+                    return False
+                time.sleep(self.poll_seconds * random.uniform(0.5, 1.5))
+                continue
+            with os.fdopen(fd, 'w') as f:
+                f.write(self._token)
+            self.acquired = True
+            self._stop.clear()
+            self._heartbeat = threading.Thread(
+                target=self._refresh, name="umap-cache-lease", daemon=True
+            )
+            self._heartbeat.start()
+            return True
+
+    def release(self) -> None:
+        """Give the lease back; safe to call when not held."""
+        if not self.acquired:
+            return
+        self.acquired = False
+        self._stop.set()
+        try:
+            # Only remove our own lock; it may have been broken and re-taken
+            if self.path.read_text() == self._token:
+                self.path.unlink()
+        except OSError:
+            pass
+
+    def _refresh(self) -> None:
+        while not self._stop.wait(self.lease_seconds / 3):
+            try:
+                now = time.time()
+                os.utime(self.path, (now, now))
+            except OSError:
+                return
+
+    def _break_expired(self) -> bool:
+        """Remove the lock if its holder stopped refreshing it."""
+        try:
+            age = time.time() - self.path.stat().st_mtime
+        except FileNotFoundError:
+            return True
+        if age < self.lease_seconds:
+            return False
+        logger.warning("Breaking abandoned cache lease %s (%.0fs old)", self.path.name, age)
+        stale = temp_path(self.path)
+        try:
+            # Rename first so only one waiter breaks a given lock
+            os.replace(self.path, stale)
+            stale.unlink()
+        except FileNotFoundError:
+            pass
+        return True
+
+    def __enter__(self) -> "CacheLease":
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.release()
+
 
 class UmapCache:
     """Cache system for storing and retrieving map data."""
     
-    def __init__(self, cache_dir: Optional[str] = None, max_age_days: int = 7):
+    def __init__(self, cache_dir: Optional[str] = None, max_age_days: float = 7, refresh: bool = False,
+                 lease_seconds: float = 120):
         """Initialize cache system.
         
         Args:
-            cache_dir: Directory to store cache files. Defaults to ~/.umap_cache
+            cache_dir: Directory to store cache files. Defaults to
+                       ``UMAP_CACHE_DIR`` or ~/.umap_cache
             max_age_days: Maximum age of cached data in days
+            refresh: Revalidate stale entries against Overpass and download
+                     only the layers that changed, instead of everything.
+                     Makes a short ``max_age_days`` (e.g. 1) cheap.
+            lease_seconds: Age after which the fill lease of a crashed
+                           process is broken (see :class:`CacheLease`)
         """
         if cache_dir is None:
-            cache_dir = os.path.expanduser("~/.umap_cache")
+            cache_dir = os.environ.get("UMAP_CACHE_DIR") or "~/.umap_cache"
+        cache_dir = os.path.expanduser(cache_dir)
         
         self.cache_dir = Path(cache_dir)
         self.cache_dir.mkdir(parents=True, exist_ok=True)
         self.max_age_seconds = max_age_days * 24 * 3600
+        self.refresh = refresh
+        self.lease_seconds = lease_seconds
     
     def _get_cache_key(self, location: Any, radius: float, layers: Dict) -> str:
         """Generate cache key from parameters."""
@@ -48,6 +200,19 @@ class UmapCache:
         """Get cache file path for given key."""
         return self.cache_dir / f"{cache_key}.pkl"
     
+    def _get_meta_path(self, cache_key: str) -> Path:
+        """Get path of the per-layer OSM state recorded for a cache entry."""
+        return self.cache_dir / f"{cache_key}.meta.json"
+
+    def lease(self, location: Any, radius: float, layers: Dict, timeout: Optional[float] = None) -> CacheLease:
+        """Lease for filling the entry of given parameters.
+
+        Use as ``with cache.lease(...):`` around "read again, fetch on miss,
+        write", so concurrent processes missing the same key fetch it once.
+        """
+        cache_key = self._get_cache_key(location, radius, layers)
+        return CacheLease(self.cache_dir / f"{cache_key}.lock", self.lease_seconds, timeout=timeout)
+
     def _is_cache_valid(self, cache_path: Path) -> bool:
         """Check if cache file is still valid (not too old)."""
         if not cache_path.exists():
@@ -55,8 +220,38 @@ class UmapCache:
         
         file_age = time.time() - cache_path.stat().st_mtime
         return file_age < self.max_age_seconds
+
+    def _leftovers(self) -> List[Tuple[Path, float]]:
+        """Lease lock files and temporary files of atomic writes, each with
+        the age after which it is considered abandoned."""
+        found = [(path, self.lease_seconds) for path in self.cache_dir.glob("*.lock")]
+        for pattern in (".*.tmp", "artifacts/.*.tmp", "basemaps/.*.tmp"):
+            found += [(path, TEMP_MAX_AGE_SECONDS) for path in self.cache_dir.glob(pattern)]
+        return found
+
+    def is_fresh(self, path: Path) -> bool:
+        """Check if a file in the cache exists and is younger than max age."""
+        return self._is_cache_valid(Path(path))
+
+    def get_artifact_dir(self, location: Any, radius: float, layers: Dict) -> Path:
+        """Get the directory of a render artifact for given parameters.
+
+        Render artifacts (see ``umap.core.artifacts``) live next to the
+        pickled layers, one directory of ``.npy`` arrays per key.
+        """
+        cache_key = self._get_cache_key(location, radius, layers)
+        return self.cache_dir / "artifacts" / cache_key
+
+    def get_basemap_path(self, location: Any, radius: float, key: Dict) -> Path:
+        """Get the path, without suffix, of a cached map raster.
+
+        Map rasters (see ``umap.core.basemap``) are a ``.png`` of pixels and
+        a ``.json`` of metadata under ``basemaps/``.
+        """
+        cache_key = self._get_cache_key(location, radius, key)
+        return self.cache_dir / "basemaps" / cache_key
     
-    def get_cached_data(self, location: Any, radius: float, layers: Dict) -> Optional[Dict[str, gp.GeoDataFrame]]:
+    def get_cached_data(self, location: Any, radius: float, layers: Dict) -> Optional[Dict[str, 'gp.GeoDataFrame']]:
         """Retrieve cached data if available and valid.
         
         Args:
@@ -86,7 +281,30 @@ class UmapCache:
                 pass
             return None
     
-    def cache_data(self, location: Any, radius: float, layers: Dict, data: Dict[str, gp.GeoDataFrame]) -> None:
+    def get_stale_entry(self, location: Any, radius: float, layers: Dict) -> Optional[Tuple[Dict[str, 'gp.GeoDataFrame'], Dict]]:
+        """Retrieve an expired entry together with its recorded OSM state.
+
+        Only entries written with ``meta`` (see :meth:`cache_data`) are
+        returned, since they can be revalidated layer by layer.
+
+        Returns:
+            ``(data, meta)`` or None if there is no such entry
+        """
+        cache_key = self._get_cache_key(location, radius, layers)
+        meta_path = self._get_meta_path(cache_key)
+        if not meta_path.exists():
+            return None
+        try:
+            with open(meta_path, encoding='utf-8') as f:
+                meta = json.load(f)
+            with open(self._get_cache_path(cache_key), 'rb') as f:
+                return pickle.load(f), meta
+        except Exception as e:
+            logger.warning("Cache read error: %s", e)
+            return None
+    
+    def cache_data(self, location: Any, radius: float, layers: Dict, data: Dict[str, 'gp.GeoDataFrame'],
+                   meta: Optional[Dict] = None) -> None:
         """Store data in cache.
         
         Args:
@@ -94,18 +312,25 @@ class UmapCache:
             radius: Radius in meters
             layers: Layer configuration
             data: GeoDataFrames to cache
+            meta: Optional per-layer OSM state used to revalidate the entry
+                  once it expires
         """
         cache_key = self._get_cache_key(location, radius, layers)
         cache_path = self._get_cache_path(cache_key)
         
         try:
-            with open(cache_path, 'wb') as f:
-                pickle.dump(data, f)
+            # Meta first, so a visible entry always has its recorded state
+            if meta is not None:
+                _write_atomic(self._get_meta_path(cache_key), lambda f: f.write(json.dumps(meta).encode('utf-8')))
+            _write_atomic(cache_path, lambda f: pickle.dump(data, f))
         except Exception as e:
             logger.warning("Cache write error: %s", e)
     
     def clear_cache(self, older_than_days: Optional[int] = None) -> int:
         """Clear cache files.
+
+        Lease locks and temporary files of crashed writers are removed too,
+        whatever ``older_than_days``, but only once abandoned.
         
         Args:
             older_than_days: Only clear files older than this many days.
@@ -124,9 +349,46 @@ class UmapCache:
             try:
                 if cutoff_time is None or cache_file.stat().st_mtime < cutoff_time:
                     cache_file.unlink()
+                    cache_file.with_suffix(".meta.json").unlink(missing_ok=True)
                     removed_count += 1
             except Exception as e:
                 logger.warning("Error removing cache file %s: %s", cache_file, e)
+
+        for meta_file in self.cache_dir.glob("artifacts/*/meta.json"):
+            try:
+                if cutoff_time is None or meta_file.stat().st_mtime < cutoff_time:
+                    shutil.rmtree(meta_file.parent)
+                    removed_count += 1
+            except Exception as e:
+                logger.warning("Error removing artifact %s: %s", meta_file.parent, e)
+
+        for meta_file in self.cache_dir.glob("basemaps/*.json"):
+            try:
+                if cutoff_time is None or meta_file.stat().st_mtime < cutoff_time:
+                    meta_file.unlink()
+                    meta_file.with_suffix(".png").unlink(missing_ok=True)
+                    # Rasters were raw .npy arrays before basemap version 2
+                    meta_file.with_suffix(".npy").unlink(missing_ok=True)
+                    removed_count += 1
+            except Exception as e:
+                logger.warning("Error removing basemap %s: %s", meta_file, e)
+
+        # Locks and temporary files are only removed once abandoned: fresh
+        # ones belong to a process filling or writing an entry right now
+        now = time.time()
+        for path, max_age in self._leftovers():
+            try:
+                if now - path.stat().st_mtime < max_age:
+                    continue
+                if path.is_dir():
+                    shutil.rmtree(path)
+                else:
+                    path.unlink()
+                removed_count += 1
+            except FileNotFoundError:
+                pass
+            except Exception as e:
+                logger.warning("Error removing leftover %s: %s", path, e)
         
         return removed_count
     
@@ -137,13 +399,25 @@ class UmapCache:
             Dictionary with cache statistics
         """
         cache_files = list(self.cache_dir.glob("*.pkl"))
-        total_size = sum(f.stat().st_size for f in cache_files)
+        total_size = 0
+        # Everything under the directory, including locks and temporary files
+        for path in self.cache_dir.rglob("*"):
+            try:
+                if path.is_file():
+                    total_size += path.stat().st_size
+            except OSError:
+                # Renamed or removed by another process meanwhile
+                pass
         
         return {
             'cache_dir': str(self.cache_dir),
             'file_count': len(cache_files),
+            'artifact_count': len(list(self.cache_dir.glob("artifacts/*/meta.json"))),
+            'basemap_count': len(list(self.cache_dir.glob("basemaps/*.json"))),
+            'leftover_count': len(self._leftovers()),
             'total_size_mb': total_size / (1024 * 1024),
-            'max_age_days': self.max_age_seconds / (24 * 3600)
+            'max_age_days': self.max_age_seconds / (24 * 3600),
+            'refresh': self.refresh,
         }
 
 
@@ -159,6 +433,15 @@ def get_cache() -> UmapCache:
     return _cache_instance
 
 
+def configure_cache(cache_dir: Optional[str] = None, max_age_days: float = 7, refresh: bool = False,
+                    lease_seconds: float = 120) -> UmapCache:
+    """Replace the global cache, e.g. to share a directory between workers or
+    to enable delta refresh with a short TTL."""
+    global _cache_instance
+    _cache_instance = UmapCache(cache_dir, max_age_days, refresh, lease_seconds)
+    return _cache_instance
+
+
 def clear_cache(older_than_days: Optional[int] = None) -> int:
     """Clear cache files. Convenience function."""
     return get_cache().clear_cache(older_than_days)
@@ -1,9 +1,27 @@
 """Drawing utilities for Umap."""
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
 from matplotlib.patches import Rectangle
 import matplotlib.patches as mpatches
 import matplotlib.lines as mlines
 import math
 
+# Height of the band below the map that add_poster_layout draws into,
+# as a fraction of the map height
+POSTER_FOOTER = 0.18
+
+
+def new_figure(figsize=(12, 12), dpi: float = 300) -> Figure:
+    """Figure with its own Agg canvas, outside pyplot's global state.
+
+    Unlike ``plt.figure`` this registers nothing with pyplot, so figures
+    can be built and drawn in concurrent threads, and they are freed like
+    any other object once no longer referenced.
+    """
+    fig = Figure(figsize=figsize, dpi=dpi)
+    FigureCanvasAgg(fig)
+    return fig
+
 
 def add_frame(ax, linewidth: float = 0.5, color: str = 'black') -> None:
     """Add a minimalist frame to the plot."""
@@ -20,6 +38,31 @@ def add_frame(ax, linewidth: float = 0.5, color: str = 'black') -> None:
     )
 
 
+def fit_figure(ax, pad: float = 0.5, footer: float = 0.0) -> None:
+    """Size the figure around the map, so the canvas is known before saving.
+
+    The map keeps the size it has inside its axes box; the figure becomes
+    that plus ``pad`` inches on every side and a ``footer`` band below
+    (a fraction of the map height, see :data:`POSTER_FOOTER`). Saving
+    then needs no ``bbox_inches='tight'``, which measures every artist
+    first (with a full extra draw on older matplotlib).
+    """
+    if ax is None:
+        return
+    fig = ax.figure
+    fig_w, fig_h = fig.get_size_inches()
+    _, _, width, height = ax.get_position(original=True).bounds
+    box_w, box_h = width * fig_w, height * fig_h
+    # Height over width of the map; axes use an equal aspect
+    ratio = ax.get_data_ratio()
+    map_w = min(box_w, box_h / ratio)
+    map_h = map_w * ratio
+    footer_h = footer * map_h
+    fig_w, fig_h = map_w + 2 * pad, map_h + 2 * pad + footer_h
+    fig.set_size_inches(fig_w, fig_h)
+    ax.set_position([pad / fig_w, (pad + footer_h) / fig_h, map_w / fig_w, map_h / fig_h])
+
+
 def add_north_arrow(ax, location=(0.95, 0.92), size=0.06, color='black') -> None:
     """Draw a simple north arrow in axes coordinates."""
     if ax is None:
@@ -57,8 +100,8 @@ def add_scale_bar(ax, length_km: float = 1.0, location=(0.08, 0.08), color='blac
 def add_poster_layout(ax, title: str, subtitle: str = None, color: str = '#1f2937') -> None:
     """Add a classic map-poster footer: rule line, spaced city name, subtitle.
 
-    Text is drawn below the axes in axes coordinates so it survives
-    ``savefig(bbox_inches='tight')`` regardless of figure margins.
+    Text is drawn below the axes in axes coordinates, inside the band
+    reserved by ``fit_figure(ax, footer=POSTER_FOOTER)``.
     """
     if ax is None or not title:
         return
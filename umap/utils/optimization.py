@@ -1,6 +1,10 @@
 """Optimization utilities for Umap."""
 import logging
-from typing import Dict, Any, List
+import math
+from copy import deepcopy
+from typing import Dict, Any, List, Optional
+import numpy as np
+import shapely
 import geopandas as gp
 
 logger = logging.getLogger(__name__)
@@ -32,6 +36,55 @@ def _compute_length_m(gdf: gp.GeoDataFrame) -> gp.pd.Series:
         return gdf.geometry.length
 
 
+# Polygon layers drawn in one style that may be dissolved at coarse detail
+DISSOLVE_LAYERS = ('green', 'water', 'building')
+
+# Meters per degree of latitude, to express gap distances in WGS84 units
+_M_PER_DEG = 111320.0
+
+
+# Attribute columns the renderer reads for each layer, besides geometry
+RENDER_COLUMNS: Dict[str, List[str]] = {
+    'streets': ['highway'],
+    'railway': ['railway'],
+    'building': ['building', 'building:levels', 'height'],
+}
+
+
+def required_columns(layer: str, layer_config: Optional[Dict[str, Any]] = None) -> List[str]:
+    """Columns to keep for a layer: the renderer's needs plus any extra
+    ``columns`` requested in the layer configuration.
+    """
+    columns = list(RENDER_COLUMNS.get(layer, []))
+    for column in (layer_config or {}).get('columns', []):
+        if column not in columns:
+            columns.append(column)
+    return columns
+
+
+def project_columns(gdf: gp.GeoDataFrame, columns: List[str]) -> gp.GeoDataFrame:
+    """Drop every attribute column not listed in ``columns``.
+
+    osmnx returns hundreds of sparse tag columns; keeping only the ones the
+    renderer reads shrinks memory and cache size. Retained string columns
+    are converted to categoricals (columns holding lists, such as merged
+    ``highway`` values, are left as objects).
+    """
+    if gdf.empty:
+        return gdf
+    geometry_name = gdf.geometry.name
+    keep = [c for c in gdf.columns if c in columns]
+    # Shallow copy so replacing columns below never touches the source frame
+    projected = gdf[keep + [geometry_name]].copy(deep=False)
+    for column in keep:
+        values = projected[column]
+        if isinstance(values.dtype, gp.pd.StringDtype) or (
+            values.dtype == object and gp.pd.api.types.infer_dtype(values, skipna=True) == 'string'
+        ):
+            projected[column] = values.astype('category')
+    return projected
+
+
 def auto_optimize_layers(radius: float) -> Dict[str, Any]:
     """Automatically optimize layer configuration based on radius.
     
@@ -70,7 +123,9 @@ def auto_optimize_layers(radius: float) -> Dict[str, Any]:
             'min_building_area': 200,
             'street_width_scale': 1.5,
             'major_roads_only': True,
-            'include_minor_water': False
+            'include_minor_water': False,
+            'dissolve_polygons': True,
+            'dissolve_gap': 2.0
         }
     else:
         # Very low detail for very large areas
@@ -82,13 +137,34 @@ def auto_optimize_layers(radius: float) -> Dict[str, Any]:
             'street_width_scale': 2.0,
             'major_roads_only': True,
             'highways_only': True,
-            'include_minor_water': False
+            'include_minor_water': False,
+            'dissolve_polygons': True,
+            'dissolve_gap': 5.0
         }
 
 
+def _isin_any(values: gp.pd.Series, allowed: List[str]) -> gp.pd.Series:
+    """Vectorized ``isin`` that also matches list values on any element.
+
+    osmnx merges OSM ways into one edge and then reports tags such as
+    ``highway`` as lists, which a plain ``isin`` silently never matches.
+    """
+    mask = values.isin(allowed)
+    if values.dtype == object:
+        is_list = values.map(lambda v: isinstance(v, list))
+        if is_list.any():
+            allowed_set = set(allowed)
+            mask[is_list] = values[is_list].map(lambda v: any(x in allowed_set for x in v))
+    return mask
+
+
 def smart_filter_gdf(gdf: gp.GeoDataFrame, layer_type: str, radius: float, optimization_config: Dict[str, Any]) -> gp.GeoDataFrame:
     """Apply smart filtering to GeoDataFrame based on layer type and optimization config.
     
+    Builds one combined boolean mask per layer (areas are computed at most
+    once, in a single projection) and returns a row selection of ``gdf``
+    without copying it up front or adding helper columns.
+    
     Args:
         gdf: GeoDataFrame to filter
         layer_type: Type of layer ('building', 'streets', 'water', etc.)
@@ -96,62 +172,150 @@ def smart_filter_gdf(gdf: gp.GeoDataFrame, layer_type: str, radius: float, optim
         optimization_config: Optimization configuration from auto_optimize_layers
         
     Returns:
-        Filtered GeoDataFrame
+        Filtered GeoDataFrame (``gdf`` itself if nothing is removed)
     """
     if gdf.empty:
         return gdf
     
-    filtered_gdf = gdf.copy()
+    mask = None
     
     if layer_type == 'building':
         # Filter buildings by area (in square meters)
         min_area = optimization_config.get('min_building_area', 50)
-        filtered_gdf['area_m2'] = _compute_area_m2(filtered_gdf)
-        filtered_gdf = filtered_gdf[filtered_gdf['area_m2'] >= min_area]
+        area = _compute_area_m2(gdf)
+        mask = area >= min_area
         
         # For very large areas, keep only important buildings
-        if radius > 15000 and 'building' in filtered_gdf.columns:
+        if radius > 15000 and 'building' in gdf.columns:
             important_buildings = ['commercial', 'industrial', 'public', 'hospital', 'school']
-            mask = filtered_gdf['building'].isin(important_buildings) | (filtered_gdf['area_m2'] > 2000)
-            filtered_gdf = filtered_gdf[mask]
+            mask &= _isin_any(gdf['building'], important_buildings) | (area > 2000)
     
     elif layer_type == 'streets':
         # Filter streets by importance
-        if 'highway' in filtered_gdf.columns:
+        if 'highway' in gdf.columns:
             if optimization_config.get('highways_only', False):
                 # Only major highways
-                major_highways = ['motorway', 'trunk']
-                filtered_gdf = filtered_gdf[filtered_gdf['highway'].isin(major_highways)]
+                mask = _isin_any(gdf['highway'], ['motorway', 'trunk'])
             elif optimization_config.get('major_roads_only', False):
                 # Major roads only
-                major_roads = ['motorway', 'trunk', 'primary', 'secondary']
-                filtered_gdf = filtered_gdf[filtered_gdf['highway'].isin(major_roads)]
+                mask = _isin_any(gdf['highway'], ['motorway', 'trunk', 'primary', 'secondary'])
             elif not optimization_config.get('include_footways', True):
                 # Exclude footways and paths
-                exclude_types = ['footway', 'path', 'steps', 'cycleway']
-                filtered_gdf = filtered_gdf[~filtered_gdf['highway'].isin(exclude_types)]
+                mask = ~_isin_any(gdf['highway'], ['footway', 'path', 'steps', 'cycleway'])
     
     elif layer_type == 'water':
         # Filter water features - only keep major water bodies
         if not optimization_config.get('include_minor_water', True):
-            filtered_gdf['area_m2'] = _compute_area_m2(filtered_gdf)
-            filtered_gdf = filtered_gdf[filtered_gdf['area_m2'] >= 1000]
+            mask = _compute_area_m2(gdf) >= 1000
     
-    return filtered_gdf
+    if mask is None or mask.all():
+        return gdf
+    return gdf[mask.to_numpy()]
+
+
+def union_clusters(geoms: np.ndarray, gap: float = 0.0) -> List:
+    """Union geometries that overlap, touch or lie within ``gap`` of each other.
+
+    Clusters are found with a spatial index and unioned one at a time,
+    which is much cheaper than a single ``union_all`` when most shapes
+    stand alone. With a ``gap``, shapes are grown by half of it, unioned
+    and shrunk back, so narrow gaps between neighbours close up.
+
+    Args:
+        geoms: Array of shapely geometries
+        gap: Largest gap to close, in the units of the geometries
+
+    Returns:
+        One geometry per cluster (lone geometries are returned unchanged)
+    """
+    geoms = np.asarray(geoms, dtype=object)
+    if len(geoms) == 0:
+        return []
+    parent = list(range(len(geoms)))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    tree = shapely.STRtree(geoms)
+    if gap > 0:
+        first, second = tree.query(geoms, predicate='dwithin', distance=gap)
+    else:
+        first, second = tree.query(geoms, predicate='intersects')
+    for i, j in zip(first.tolist(), second.tolist()):
+        if i < j:
+            parent[find(j)] = find(i)
+    clusters: Dict[int, List[int]] = {}
+    for i in range(len(geoms)):
+        clusters.setdefault(find(i), []).append(i)
+
+    merged = []
+    for members in clusters.values():
+        if len(members) == 1:
+            merged.append(geoms[members[0]])
+        elif gap > 0:
+            grown = shapely.buffer(geoms[members], gap / 2, join_style='mitre')
+            merged.append(shapely.buffer(shapely.union_all(grown), -gap / 2, join_style='mitre'))
+        else:
+            merged.append(shapely.union_all(geoms[members]))
+    return merged
+
+
+def dissolve_gdf(gdf: gp.GeoDataFrame, gap: float = 0.0) -> gp.GeoDataFrame:
+    """Merge a polygon layer into as few, simple shapes as possible.
+
+    Overlapping polygons (park subdivisions, building parts) become one
+    shape and, with a ``gap`` in meters, so do neighbours closer than that
+    (building footprints turn into blocks). Attribute columns are dropped;
+    use it only for layers drawn in a single style. Non-polygon rows are
+    kept as they are.
+
+    Args:
+        gdf: GeoDataFrame in WGS84 or a metric CRS
+        gap: Largest gap to close between neighbours, in meters
+
+    Returns:
+        GeoDataFrame of single-part polygons (plus any non-polygon rows)
+    """
+    if gdf.empty:
+        return gdf
+    geoms = np.asarray(gdf.geometry.values, dtype=object)
+    polygonal = np.isin(shapely.get_type_id(geoms), (3, 6))
+    if not polygonal.any():
+        return gdf
+    polygons = geoms[polygonal]
+    stretch = None
+    if gap and gdf.crs is not None and gdf.crs.is_geographic:
+        # A degree of longitude is cos(latitude) times shorter than one of
+        # latitude: scale x so the gap is the same east-west and north-south
+        latitude = (gdf.total_bounds[1] + gdf.total_bounds[3]) / 2
+        stretch = np.array([math.cos(math.radians(latitude)), 1.0])
+        polygons = shapely.transform(polygons, lambda coords: coords * stretch)
+        gap = gap / _M_PER_DEG
+    merged = shapely.get_parts(union_clusters(polygons, gap))
+    merged = merged[(shapely.get_type_id(merged) == 3) & ~shapely.is_empty(merged)]
+    if stretch is not None:
+        merged = shapely.transform(merged, lambda coords: coords / stretch)
+    geometry = np.concatenate([merged, geoms[~polygonal]])
+    return gp.GeoDataFrame(geometry=geometry, crs=gdf.crs)
 
 
 def optimize_layer_config(layers: Dict[str, Any], radius: float) -> Dict[str, Any]:
     """Optimize layer configuration based on radius.
     
     Args:
-        layers: Original layer configuration
+        layers: Original layer configuration (not modified)
         radius: Map radius in meters
         
     Returns:
         Optimized layer configuration
     """
     optimization_config = auto_optimize_layers(radius)
-    optimized_layers = layers.copy()
+    # Deep copy: widths are rescaled in place, and callers may pass shared
+    # module-level configurations such as DEFAULT_LAYERS
+    optimized_layers = deepcopy(layers)
     
     # Apply street width scaling
     if 'streets' in optimized_layers:
@@ -0,0 +1,116 @@
+"""Per-stage timing and memory instrumentation for Umap renders.
+
+A :class:`Profiler` records one entry per pipeline stage (geocoding,
+Overpass download, clipping, filtering, drawing, saving), optionally per
+layer, with wall time, feature and vertex counts and the process peak RSS.
+"""
+import json
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional
+
+try:
+    import resource
+except ImportError:
+    # Not available on Windows; peak RSS is then reported as None
+    resource = None
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Return the peak resident set size of this process in MB."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS reports bytes
+    if sys.platform == 'darwin':
+        return peak / (1024 * 1024)
+    return peak / 1024
+
+
+def count_vertices(gdf) -> int:
+    """Count coordinates in a GeoDataFrame's geometries."""
+    if gdf is None or gdf.empty:
+        return 0
+    import shapely
+    return int(shapely.get_num_coordinates(gdf.geometry.values).sum())
+
+
+class Profiler:
+    """Collects stage records for a render.
+
+    Args:
+        callback: Optional function called with each record as it completes,
+                  e.g. to forward stages to a metrics pipeline.
+    """
+
+    enabled = True
+
+    def __init__(self, callback: Optional[Callable[[Dict[str, Any]], None]] = None):
+        self.records: List[Dict[str, Any]] = []
+        self.callback = callback
+        self._lock = threading.Lock()
+        self._start = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name: str, layer: Optional[str] = None):
+        """Time a block; the yielded dict may be given ``features``/``vertices``."""
+        record: Dict[str, Any] = {'stage': name, 'layer': layer}
+        start = time.perf_counter()
+        try:
+            yield record
+        finally:
+            record['seconds'] = time.perf_counter() - start
+            record['peak_rss_mb'] = peak_rss_mb()
+            with self._lock:
+                self.records.append(record)
+            if self.callback is not None:
+                self.callback(record)
+
+    @property
+    def total_seconds(self) -> float:
+        """Wall time since the profiler was created."""
+        return time.perf_counter() - self._start
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'total_seconds': self.total_seconds,
+            'peak_rss_mb': peak_rss_mb(),
+            'stages': list(self.records),
+        }
+
+    def to_json(self, path: Optional[str] = None, **kwargs) -> str:
+        """Serialize the records as JSON, writing to ``path`` if given."""
+        text = json.dumps(self.to_dict(), indent=kwargs.pop('indent', 2), **kwargs)
+        if path is not None:
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(text)
+        return text
+
+    def summary(self) -> str:
+        """Format the records as a human readable table."""
+        lines = [f"{'stage':<12} {'layer':<10} {'time (s)':>9} {'features':>9} {'vertices':>10} {'rss (MB)':>9}"]
+        for record in self.records:
+            rss = record.get('peak_rss_mb')
+            lines.append(
+                f"{record['stage']:<12} {record['layer'] or '-':<10} {record['seconds']:>9.3f} "
+                f"{record.get('features', ''):>9} {record.get('vertices', ''):>10} "
+                f"{'' if rss is None else f'{rss:.0f}':>9}"
+            )
+        lines.append(f"{'total':<23} {self.total_seconds:>9.3f}")
+        return "\n".join(lines)
+
+
+class _NullProfiler:
+    """Profiler stand-in used when profiling is disabled."""
+
+    enabled = False
+    records: List[Dict[str, Any]] = []
+
+    @contextmanager
+    def stage(self, name: str, layer: Optional[str] = None):
+        yield {}
+
+
+NULL_PROFILER = _NullProfiler()
@@ -98,7 +98,9 @@ STYLES: Dict[str, Dict[str, Any]] = {
                 'roof_ec': '#c4b89e',
                 'roof_lw': 0.25,
                 'shadow_fc': '#8a8577',
-                'shadow_alpha': 0.18
+                'shadow_alpha': 0.18,
+                'merge_shadows': True,        # one shape for overlapping shadows
+                'occlusion_culling': False    # skip buildings hidden behind nearer ones
             }
         }
     }